@@ -0,0 +1,85 @@
+""" Compares generating the code of a pipeline without a fragment cache, with an
+empty one, with one already filled by a previous generation of the same pipeline,
+and with that one after a single stage of the pipeline is edited.
+
+Run from the root of the repository:
+
+    python -m benchmarks.fragment_cache
+"""
+
+import contextlib
+import copy
+import io
+import statistics
+import time
+from src.mls_code_generator.code_generator import CodeGenerator
+from src.mls_code_generator.configuration_loader import ConfigLoader
+from src.mls_code_generator.fragment_cache import FragmentCache
+from src.mls_code_generator.pipeline_loader import EditorPipelineLoader
+from src.mls_code_generator.types import Pipeline
+from benchmarks.pipelines import build_editor, load_nodes
+
+COPIES = [1, 10, 100]
+REPEATS = 30
+
+def load(editor : dict, node_configuration : ConfigLoader) -> Pipeline:
+    pipeline = Pipeline()
+    pipeline.load_pipeline(EditorPipelineLoader(copy.deepcopy(editor), node_configuration))
+    return pipeline
+
+def edit_stage(editor : dict, index : int) -> dict:
+    """
+    Returns a copy of an editor payload with the number params of one stage changed.
+
+    Args:
+        editor (dict): The editor payload.
+        index (int): The position of the stage to edit, among the stages.
+
+    Returns:
+        dict: The edited payload.
+    """
+    edited = copy.deepcopy(editor)
+    stages = [module_id for module_id in edited['modules'] if module_id != 'root']
+    for node in edited['modules'][stages[index % len(stages)]]['nodes']:
+        for param in node['data']['params'].values():
+            if param['type'] == 'number':
+                param['value'] = 1000 + index
+    return edited
+
+def main():
+    """
+    Main function
+    """
+    node_configuration = ConfigLoader(content = load_nodes())
+    print(f"{'copies':>8} {'cache':>8} {'time (ms)':>10} {'hit rate':>9}")
+    for copies in COPIES:
+        editor = build_editor(copies)
+        pipeline = load(editor, node_configuration)
+        edited = [load(edit_stage(editor, i), node_configuration) for i in range(REPEATS)]
+        warm = FragmentCache()
+        with contextlib.redirect_stdout(io.StringIO()):
+            CodeGenerator(warm).generate_code(pipeline)
+        runs = (
+            ("none", lambda i: (None, pipeline)),
+            ("cold", lambda i: (FragmentCache(), pipeline)),
+            ("warm", lambda i: (warm, pipeline)),
+            ("edited", lambda i: (warm, edited[i])),
+        )
+        times = {name: [] for name, _ in runs}
+        caches = {}
+        # The runs are interleaved so they are equally affected by the load of the machine
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i in range(REPEATS):
+                for name, get_run in runs:
+                    fragment_cache, run_pipeline = get_run(i)
+                    start = time.perf_counter()
+                    CodeGenerator(fragment_cache).generate_code(run_pipeline)
+                    times[name].append(time.perf_counter() - start)
+                    caches[name] = fragment_cache
+        for name, _ in runs:
+            fragment_cache = caches[name]
+            hit_rate = "" if fragment_cache is None else f"{fragment_cache.stats()['hit_rate']:.1%}"
+            print(f"{copies:>8} {name:>8} {statistics.median(times[name]) * 1000:>10.2f} {hit_rate:>9}")
+
+if __name__ == '__main__':
+    main()
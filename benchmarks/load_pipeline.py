@@ -0,0 +1,86 @@
+""" Compares loading a pipeline through fix_editor and the PipelineLoader with the
+EditorPipelineLoader, which skips the intermediate copy made by fix_editor.
+
+Both loaders still validate the whole graph in a separate pass before building it.
+The editor loader allocates about 9% less memory at its peak, for any size. Its
+time is noisy: the medians of both loaders vary by up to two times from one run
+to the next. With 100 copies the editor loader took from 9% to 30% less time in
+the runs measured, and there is no difference for a single copy.
+
+Run from the root of the repository:
+
+    python -m benchmarks.load_pipeline
+"""
+
+import copy
+import statistics
+import time
+import tracemalloc
+from src.mls_code_generator.configuration_loader import ConfigLoader
+from src.mls_code_generator.pipeline_loader import EditorPipelineLoader, PipelineLoader
+from src.mls_code_generator.types import Pipeline
+from src.mls_code_generator.utils import fix_editor
+from benchmarks.pipelines import build_editor, load_nodes
+
+COPIES = [1, 10, 100]
+REPEATS = 20
+
+def load_fixed(editor : dict, node_configuration : ConfigLoader) -> Pipeline:
+    pipeline = Pipeline()
+    pipeline.load_pipeline(PipelineLoader(fix_editor(editor), node_configuration))
+    return pipeline
+
+def load_editor(editor : dict, node_configuration : ConfigLoader) -> Pipeline:
+    pipeline = Pipeline()
+    pipeline.load_pipeline(EditorPipelineLoader(editor, node_configuration))
+    return pipeline
+
+def measure(loads : tuple, editor : dict, node_configuration : ConfigLoader) -> list:
+    """
+    Measures the time and the peak memory taken by each loader.
+
+    The runs of the loaders are interleaved, so they are equally affected by the
+    load of the machine.
+
+    Args:
+        loads (tuple): The functions that load the pipeline.
+        editor (dict): The editor payload.
+        node_configuration (ConfigLoader): The compiled nodes configuration.
+
+    Returns:
+        list: The median time in seconds and the peak of memory allocated while
+        loading, for each loader.
+    """
+    times = [[] for _ in loads]
+    for _ in range(REPEATS):
+        for load, load_times in zip(loads, times):
+            payload = copy.deepcopy(editor)
+            start = time.perf_counter()
+            load(payload, node_configuration)
+            load_times.append(time.perf_counter() - start)
+
+    results = []
+    for load, load_times in zip(loads, times):
+        payload = copy.deepcopy(editor)
+        tracemalloc.start()
+        load(payload, node_configuration)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        results.append((statistics.median(load_times), peak))
+    return results
+
+def main():
+    """ 
+    Main function
+    """
+    node_configuration = ConfigLoader(content = load_nodes())
+    print(f"{'copies':>8} {'loader':>8} {'time (ms)':>10} {'peak (KiB)':>11}")
+    for copies in COPIES:
+        editor = build_editor(copies)
+        names = ("fixed", "editor")
+        results = measure((load_fixed, load_editor), editor, node_configuration)
+        for name, (elapsed, peak) in zip(names, results):
+            print(f"{copies:>8} {name:>8} {elapsed * 1000:>10.2f} {peak / 1024:>11.1f}")
+
+if __name__ == '__main__':
+    main()
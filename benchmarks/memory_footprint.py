@@ -0,0 +1,55 @@
+""" Measures the memory taken by a loaded pipeline.
+
+Run from the root of the repository:
+
+    python -m benchmarks.memory_footprint
+"""
+
+import gc
+import json
+import tracemalloc
+from src.mls_code_generator.configuration_loader import ConfigLoader
+from src.mls_code_generator.pipeline_loader import PipelineLoader
+from src.mls_code_generator.types import Pipeline
+from src.mls_code_generator.utils import fix_editor
+from benchmarks.pipelines import build_editor, load_nodes
+
+COPIES = [1, 10, 100]
+
+def measure(copies : int, node_configuration : ConfigLoader) -> tuple:
+    """
+    Loads a synthetic pipeline and measures the memory it keeps once the payload is freed.
+
+    Args:
+        copies (int): The number of copies of the test pipeline.
+        node_configuration (ConfigLoader): The compiled nodes configuration.
+
+    Returns:
+        tuple: The size of the JSON payload and the bytes kept by the loaded pipeline.
+    """
+    payload = json.dumps(build_editor(copies))
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    content = fix_editor(json.loads(payload))
+    pipeline = Pipeline()
+    pipeline.load_pipeline(PipelineLoader(content, node_configuration))
+    del content
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del pipeline
+    return len(payload), after - before
+
+def main():
+    """ 
+    Main function
+    """
+    node_configuration = ConfigLoader(content = load_nodes())
+    print(f"{'copies':>8} {'payload (KiB)':>14} {'pipeline (KiB)':>15} {'ratio':>6}")
+    for copies in COPIES:
+        payload, pipeline = measure(copies, node_configuration)
+        print(f"{copies:>8} {payload / 1024:>14.1f} {pipeline / 1024:>15.1f} {pipeline / payload:>6.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+""" Compares generating the stage modules of a pipeline one after another with
+generating them in a thread pool, for pipelines with a few and with dozens of
+stages. The pool is started before the runs, as a server would keep it.
+
+Generating the stages in threads is experimental and the server does not use it:
+the threads share the interpreter lock, and no gain over the serial run has been
+measured. Process pools are not supported, as the pipeline and the fragment cache
+would have to be sent to the workers.
+
+Run from the root of the repository:
+
+    python -m benchmarks.parallel_stages
+"""
+
+import contextlib
+import io
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from src.mls_code_generator.code_generator import CodeGenerator
+from src.mls_code_generator.configuration_loader import ConfigLoader
+from benchmarks.fragment_cache import load
+from benchmarks.pipelines import build_editor, load_nodes
+
+COPIES = [1, 10, 40]
+REPEATS = 20
+WORKERS = os.cpu_count() or 1
+
+def main():
+    """
+    Main function
+    """
+    node_configuration = ConfigLoader(content = load_nodes())
+    print(f"{WORKERS} workers")
+    print(f"{'stages':>8} {'executor':>9} {'time (ms)':>10} {'speedup':>8}")
+    with ThreadPoolExecutor(WORKERS) as threads:
+        for copies in COPIES:
+            pipeline = load(build_editor(copies), node_configuration)
+            stages = len(pipeline.get_step('root').nodes)
+            runs = (("serial", None), ("threads", threads))
+            times = {name: [] for name, _ in runs}
+            # The runs are interleaved so they are equally affected by the load of the machine
+            with contextlib.redirect_stdout(io.StringIO()):
+                for _ in range(REPEATS):
+                    for name, executor in runs:
+                        start = time.perf_counter()
+                        code_generator = CodeGenerator(
+                            executor=executor, parallel_threshold=1, parallel_jobs=WORKERS
+                        )
+                        code_generator.generate_code(pipeline)
+                        times[name].append(time.perf_counter() - start)
+            serial = statistics.median(times["serial"])
+            for name, _ in runs:
+                median = statistics.median(times[name])
+                print(f"{stages:>8} {name:>9} {median * 1000:>10.2f} {serial / median:>7.2f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+""" Synthetic pipelines for the benchmarks, built from the test pipeline. """
+
+import copy
+import json
+
+FILES_PATH = './src/mls_code_generator/tests/files/'
+
+def load_nodes():
+    """
+    Loads the nodes configuration of the test pipeline.
+
+    Returns:
+        list: The nodes payload.
+    """
+    with open(FILES_PATH + 'nodes.json', 'r', encoding='utf-8') as file:
+        return json.load(file)['nodes']
+
+def build_editor(copies : int) -> dict:
+    """
+    Builds an editor payload with the given number of copies of the test pipeline.
+
+    Every copy gets its own node ids and stage names, and its stages are wired like
+    the ones of the original pipeline.
+
+    Args:
+        copies (int): The number of copies of the test pipeline.
+
+    Returns:
+        dict: The editor payload, in the format sent by the editor.
+    """
+    with open(FILES_PATH + 'mls_editor.json', 'r', encoding='utf-8') as file:
+        original = json.load(file)['modules']
+
+    modules = {'root': {'nodes': [], 'connections': [], 'inputs': {}, 'outputs': {}}}
+    for i in range(copies):
+        suffix = '_' + str(i)
+        for module_id, module in original.items():
+            module = copy.deepcopy(module)
+            for node in module['nodes']:
+                node['id'] += suffix
+                params = node['data']['params']
+                if module_id == 'root' and params['link']['value'] != '':
+                    params['link']['value'] += suffix
+                if module_id == 'root' and i > 0:
+                    params['Stage name']['value'] += ' ' + str(i)
+            for connection in module['connections']:
+                connection['source'] += suffix
+                connection['target'] += suffix
+            if module_id == 'root':
+                modules['root']['nodes'].extend(module['nodes'])
+                modules['root']['connections'].extend(module['connections'])
+            else:
+                modules[module_id + suffix] = module
+    return {'modules': modules}
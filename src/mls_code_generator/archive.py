@@ -0,0 +1,301 @@
+""" Archive: Components that build ZIP archives from pre-compressed entries. """
+
+import hashlib
+import io
+import os
+import struct
+import threading
+import time
+import zlib
+
+COMPRESS_LEVEL = 6
+
+_LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+_CENTRAL_HEADER = struct.Struct("<4s6H3L5H2L")
+_END_OF_CENTRAL_DIRECTORY = struct.Struct("<4s4H2LH")
+
+_VERSION = 20
+_MADE_BY_UNIX = (3 << 8) | _VERSION
+_DEFLATED = 8
+_UTF8_FLAG = 0x800
+_FILE_ATTRIBUTES = 0o100644 << 16
+_MAX_ENTRIES = 0xFFFF
+_MAX_OFFSET = 0xFFFFFFFF
+
+
+def _dos_date_time(date_time):
+    """
+    Converts a (year, month, day, hour, minute, second) tuple to the DOS format used by ZIP.
+
+    Parameters:
+        date_time (tuple): The date and time to convert.
+
+    Returns:
+        tuple: The DOS time and the DOS date.
+    """
+    year, month, day, hour, minute, second = date_time[:6]
+    if year < 1980:
+        year, month, day, hour, minute, second = 1980, 1, 1, 0, 0, 0
+    dos_time = (hour << 11) | (minute << 5) | (second // 2)
+    dos_date = ((year - 1980) << 9) | (month << 5) | day
+    return dos_time, dos_date
+
+
+class ArchiveEntry:
+    """ ArchiveEntry: A file that is deflated once and can be written into many archives. """
+    def __init__(self, name : str, data, date_time : tuple = None) -> None:
+        """
+        Compresses the given data so it can be written as a ZIP entry.
+
+        Parameters:
+            name (str): The name of the entry inside the archive.
+            data (bytes | str): The content of the entry. Strings are encoded as UTF-8.
+            date_time (tuple): The modification time of the entry. Defaults to now.
+        """
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, -zlib.MAX_WBITS)
+        self.name = name
+        self.crc = zlib.crc32(data)
+        self.size = len(data)
+        self.compressed = compressor.compress(data) + compressor.flush()
+        self.date_time = date_time if date_time is not None else time.localtime()[:6]
+
+
+class ArchiveWriter:
+    """ ArchiveWriter: Writes ArchiveEntry objects into an in-memory ZIP archive. """
+    def __init__(self) -> None:
+        self.buffer = io.BytesIO()
+        self.central_directory = []
+
+    def add_entry(self, entry : ArchiveEntry, prefix : str = "") -> None:
+        """
+        Writes an already compressed entry into the archive without compressing it again.
+
+        Parameters:
+            entry (ArchiveEntry): The entry to write.
+            prefix (str): A folder prepended to the name of the entry.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If the archive would need ZIP64 extensions.
+        """
+        name = prefix + entry.name
+        encoded_name = name.encode('utf-8')
+        flags = 0 if name.isascii() else _UTF8_FLAG
+        dos_time, dos_date = _dos_date_time(entry.date_time)
+        offset = self.buffer.tell()
+
+        if len(self.central_directory) >= _MAX_ENTRIES or offset > _MAX_OFFSET:
+            raise ValueError("Archive too large")
+
+        self.buffer.write(_LOCAL_HEADER.pack(
+            b"PK\x03\x04", _VERSION, flags, _DEFLATED, dos_time, dos_date,
+            entry.crc, len(entry.compressed), entry.size, len(encoded_name), 0
+        ))
+        self.buffer.write(encoded_name)
+        self.buffer.write(entry.compressed)
+
+        self.central_directory.append(_CENTRAL_HEADER.pack(
+            b"PK\x01\x02", _MADE_BY_UNIX, _VERSION, flags, _DEFLATED, dos_time, dos_date,
+            entry.crc, len(entry.compressed), entry.size, len(encoded_name), 0, 0, 0, 0,
+            _FILE_ATTRIBUTES, offset
+        ) + encoded_name)
+
+    def add_file(self, name : str, data) -> None:
+        """
+        Compresses the given data and writes it into the archive.
+
+        Parameters:
+            name (str): The name of the file inside the archive.
+            data (bytes | str): The content of the file.
+
+        Returns:
+            None
+        """
+        self.add_entry(ArchiveEntry(name, data))
+
+    def getvalue(self) -> bytes:
+        """
+        Finishes the archive by writing its central directory.
+
+        Returns:
+            bytes: The ZIP archive.
+        """
+        directory_offset = self.buffer.tell()
+        if directory_offset > _MAX_OFFSET:
+            raise ValueError("Archive too large")
+        for record in self.central_directory:
+            self.buffer.write(record)
+        directory_size = self.buffer.tell() - directory_offset
+        entry_count = len(self.central_directory)
+        self.buffer.write(_END_OF_CENTRAL_DIRECTORY.pack(
+            b"PK\x05\x06", 0, 0, entry_count, entry_count,
+            directory_size, directory_offset, 0
+        ))
+        return self.buffer.getvalue()
+
+
+class LibraryArchive:
+    """ LibraryArchive: The MLS library read and compressed once, reused by every archive. """
+    def __init__(self, mls_path : str, check_interval : float = 2.0) -> None:
+        """
+        Initializes a LibraryArchive for the library found at the given path.
+
+        The library is loaded lazily on first use, or eagerly by calling refresh().
+
+        Parameters:
+            mls_path (str): The path to the MLS library.
+            check_interval (float): Seconds between checks for changes in the library.
+        """
+        self.mls_path = mls_path
+        self.check_interval = check_interval
+        self.snapshot = (None, ())
+        self.signature = None
+        self.last_check = None
+        self.lock = threading.Lock()
+
+    def __scan(self):
+        """
+        Lists the files of the library in a deterministic order.
+
+        Returns:
+            list: Tuples with the relative name, the full path and the stat result of each file.
+        """
+        if not os.path.isdir(self.mls_path):
+            raise FileNotFoundError("MLS library not found: " + self.mls_path)
+        files = []
+        for dir_path, dir_names, file_names in os.walk(self.mls_path):
+            dir_names.sort()
+            relative_path = os.path.relpath(dir_path, self.mls_path)
+            for file_name in sorted(file_names):
+                full_path = os.path.join(dir_path, file_name)
+                name = os.path.normpath(os.path.join(relative_path, file_name))
+                files.append((name.replace(os.sep, "/"), full_path, os.stat(full_path)))
+        return files
+
+    def refresh(self, force : bool = False) -> None:
+        """
+        Rebuilds the compressed entries if the content of the library changed.
+
+        The files are only read again when their sizes or modification times change,
+        and only compressed again when their content hash changes.
+
+        Parameters:
+            force (bool): Rebuild the entries even if nothing changed.
+
+        Returns:
+            None
+        """
+        with self.lock:
+            self.last_check = time.monotonic()
+            files = self.__scan()
+            signature = tuple((name, stat.st_size, stat.st_mtime_ns) for name, _, stat in files)
+            if signature == self.signature and not force:
+                return
+
+            content_hash = hashlib.sha256()
+            contents = []
+            for name, full_path, stat in files:
+                with open(full_path, 'rb') as file:
+                    data = file.read()
+                content_hash.update(name.encode('utf-8') + b"\0")
+                content_hash.update(str(len(data)).encode('utf-8') + b"\0")
+                content_hash.update(data)
+                contents.append((name, data, time.localtime(stat.st_mtime)[:6]))
+
+            self.signature = signature
+            if content_hash.hexdigest() == self.snapshot[0] and not force:
+                return
+            self.snapshot = (
+                content_hash.hexdigest(),
+                tuple(ArchiveEntry(name, data, date_time) for name, data, date_time in contents)
+            )
+
+    def __refresh_if_due(self) -> None:
+        if self.last_check is None or time.monotonic() - self.last_check >= self.check_interval:
+            self.refresh()
+
+    def get_entries(self) -> tuple:
+        """
+        Returns the compressed entries of the library, refreshing them if needed.
+
+        Returns:
+            tuple: The ArchiveEntry objects of the library.
+        """
+        return self.get_snapshot()[1]
+
+    def get_hash(self) -> str:
+        """
+        Returns the content hash of the library, refreshing it if needed.
+
+        Returns:
+            str: The hexadecimal SHA-256 of the library content.
+        """
+        return self.get_snapshot()[0]
+
+    def get_snapshot(self) -> tuple:
+        """
+        Returns the content hash and the entries of the library as one consistent pair.
+
+        Returns:
+            tuple: The content hash and the ArchiveEntry objects of the library.
+        """
+        self.__refresh_if_due()
+        return self.snapshot
+
+    def pin(self):
+        """
+        Returns the current version of the library, which is not changed by later refreshes.
+
+        Requests that both key a cache by the hash of the library and pack its entries
+        use one pinned version, so an archive is never stored under the hash of another
+        version of the library.
+
+        Returns:
+            LibrarySnapshot: The current version of the library.
+        """
+        return LibrarySnapshot(*self.get_snapshot())
+
+
+class LibrarySnapshot:
+    """ LibrarySnapshot: One version of the MLS library, used like a LibraryArchive. """
+    def __init__(self, content_hash : str, entries : tuple) -> None:
+        """
+        Initializes a version of the library.
+
+        Parameters:
+            content_hash (str): The content hash of the library.
+            entries (tuple): The ArchiveEntry objects of the library.
+        """
+        self.content_hash = content_hash
+        self.entries = entries
+
+    def get_entries(self) -> tuple:
+        """
+        Returns the compressed entries of this version of the library.
+
+        Returns:
+            tuple: The ArchiveEntry objects of the library.
+        """
+        return self.entries
+
+    def get_hash(self) -> str:
+        """
+        Returns the content hash of this version of the library.
+
+        Returns:
+            str: The hexadecimal SHA-256 of the library content.
+        """
+        return self.content_hash
+
+    def get_snapshot(self) -> tuple:
+        """
+        Returns the content hash and the entries of this version of the library.
+
+        Returns:
+            tuple: The content hash and the ArchiveEntry objects of the library.
+        """
+        return self.content_hash, self.entries
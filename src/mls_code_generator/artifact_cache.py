@@ -0,0 +1,301 @@
+""" ArtifactCache: Caches of generated archives keyed by a hash of the request payload. """
+
+import contextlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+class MemoryArtifactCache:
+    """ MemoryArtifactCache: Generated archives kept in memory with LRU eviction. """
+    def __init__(self, max_bytes : int) -> None:
+        """
+        Initializes an empty cache.
+
+        Parameters:
+            max_bytes (int): The maximum number of bytes of archives kept in the cache.
+                A value of 0 disables the cache.
+        """
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key : str):
+        """
+        Retrieves an archive from the cache and marks it as recently used.
+
+        Parameters:
+            key (str): The hash of the payload that generated the archive.
+
+        Returns:
+            bytes: The archive, or None if it is not in the cache.
+        """
+        with self.lock:
+            data = self.entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key : str, data : bytes) -> None:
+        """
+        Stores an archive in the cache, evicting the least recently used ones if needed.
+
+        Archives larger than the whole budget are not stored.
+
+        Parameters:
+            key (str): The hash of the payload that generated the archive.
+            data (bytes): The archive.
+
+        Returns:
+            None
+        """
+        if len(data) > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self.size -= len(self.entries.pop(key))
+            self.entries[key] = data
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        """
+        Returns the counters of the cache.
+
+        Returns:
+            dict: The number of entries, bytes, hits, misses and evictions of the cache.
+        """
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class DiskArtifactCache:
+    """ DiskArtifactCache: Generated archives shared between processes through a directory. """
+    def __init__(self, directory : str, max_bytes : int, temp_file_ttl : float = 3600,
+                 scan_interval : float = 60) -> None:
+        """
+        Initializes a cache stored in the given directory, creating it if needed.
+
+        Several processes, on one host or sharing a volume, can use the same directory.
+        Archives are written to a temporary file and renamed into place, so readers never
+        see a partial archive. The modification time of each archive is its last use,
+        and the least recently used archives are removed when the directory grows
+        beyond max_bytes.
+
+        The size of the directory is counted by this process as it writes archives, and
+        read again from the directory, which counts the archives written by the other
+        processes, when the eviction runs. Writes only run the eviction when the count
+        goes beyond max_bytes or when the last one is older than scan_interval.
+
+        Parameters:
+            directory (str): The directory where the archives are stored.
+            max_bytes (int): The maximum number of bytes of archives kept in the directory.
+            temp_file_ttl (float): Seconds after which abandoned temporary files are removed.
+            scan_interval (float): The maximum number of seconds between two evictions
+                while archives are written.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.temp_file_ttl = temp_file_ttl
+        self.scan_interval = scan_interval
+        self.entries = 0
+        self.size = 0
+        self.scanned = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.evict()
+
+    def __get_path(self, key : str) -> str:
+        return os.path.join(self.directory, key[:2], key + ".zip")
+
+    def get(self, key : str):
+        """
+        Retrieves an archive from the cache and marks it as recently used.
+
+        Parameters:
+            key (str): The hash of the payload that generated the archive.
+
+        Returns:
+            bytes: The archive, or None if it is not in the cache.
+        """
+        path = self.__get_path(key)
+        try:
+            with open(path, 'rb') as file:
+                data = file.read()
+        except FileNotFoundError:
+            with self.lock:
+                self.misses += 1
+            return None
+        with contextlib.suppress(FileNotFoundError):
+            os.utime(path)
+        with self.lock:
+            self.hits += 1
+        return data
+
+    def put(self, key : str, data : bytes) -> None:
+        """
+        Atomically stores an archive in the cache, evicting the least recently used ones if needed.
+
+        Archives larger than the whole budget are not stored.
+
+        Parameters:
+            key (str): The hash of the payload that generated the archive.
+            data (bytes): The archive.
+
+        Returns:
+            None
+        """
+        if len(data) > self.max_bytes:
+            return
+        path = self.__get_path(key)
+        folder = os.path.dirname(path)
+        os.makedirs(folder, exist_ok=True)
+        file_descriptor, temp_path = tempfile.mkstemp(dir=folder, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(file_descriptor, 'wb') as file:
+                file.write(data)
+            with self.lock:
+                try:
+                    replaced = os.stat(path).st_size
+                except FileNotFoundError:
+                    replaced = None
+                os.replace(temp_path, path)
+                if replaced is None:
+                    self.entries += 1
+                    replaced = 0
+                self.size += len(data) - replaced
+                due = self.size > self.max_bytes \
+                    or time.monotonic() - self.scanned >= self.scan_interval
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(temp_path)
+            raise
+        if due:
+            self.evict()
+
+    @contextlib.contextmanager
+    def __eviction_lock(self):
+        """
+        Takes an exclusive lock on the directory without waiting for it.
+
+        Yields:
+            bool: Whether the lock was acquired. Only one process evicts at a time,
+            the others skip the eviction.
+        """
+        if fcntl is None:
+            yield True
+            return
+        with open(os.path.join(self.directory, ".lock"), 'a+b') as lock_file:
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def __scan(self):
+        """
+        Lists the archives of the cache and removes abandoned temporary files.
+
+        Returns:
+            list: Tuples with the modification time, the size and the path of each archive.
+        """
+        archives = []
+        now = time.time()
+        with os.scandir(self.directory) as folders:
+            for folder in folders:
+                if not folder.is_dir():
+                    continue
+                with os.scandir(folder.path) as files:
+                    for file in files:
+                        try:
+                            stat = file.stat()
+                        except FileNotFoundError:
+                            continue
+                        if file.name.endswith(".zip"):
+                            archives.append((stat.st_mtime, stat.st_size, file.path))
+                        elif file.name.endswith(".tmp") and now - stat.st_mtime > self.temp_file_ttl:
+                            with contextlib.suppress(OSError):
+                                os.remove(file.path)
+        return archives
+
+    def evict(self) -> None:
+        """
+        Removes the least recently used archives until the directory fits in max_bytes,
+        and the temporary files abandoned by writers that failed.
+
+        The directory is scanned, so the number of entries and bytes of the cache are
+        also updated with the archives written by the other processes.
+
+        Returns:
+            None
+        """
+        with self.__eviction_lock() as acquired:
+            if not acquired:
+                return
+            archives = self.__scan()
+            total_size = sum(size for _, size, _ in archives)
+            entries = len(archives)
+            for _, size, path in sorted(archives):
+                if total_size <= self.max_bytes:
+                    break
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(path)
+                    with self.lock:
+                        self.evictions += 1
+                total_size -= size
+                entries -= 1
+            with self.lock:
+                self.entries = entries
+                self.size = total_size
+                self.scanned = time.monotonic()
+
+    def stats(self) -> dict:
+        """
+        Returns the counters of the cache.
+
+        The number of entries and bytes are the ones found by the last eviction plus
+        the archives written by this process since then, so the directory is not read.
+        The hits, misses and evictions only count the operations of this process.
+
+        Returns:
+            dict: The number of entries, bytes, hits, misses and evictions of the cache.
+        """
+        with self.lock:
+            return {
+                "entries": self.entries,
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
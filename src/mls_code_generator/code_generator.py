@@ -1,22 +1,140 @@
 """ CodeGenerator: Component that generates code. """
 
+import os
+from concurrent.futures import ProcessPoolExecutor
 from copy import deepcopy
+from .emitter import CodeEmitter
+from .generation_context import GenerationContext
+from .metrics import PhaseTimer
+from .scheduler import schedule_nodes
+
+PARALLEL_STAGE_THRESHOLD = 16
+
+def get_stage_module(c_step, context) -> str:
+    """
+    Returns the module of a stage, from the fragment cache of the context if the stage
+    did not change since a previous run.
+
+    Parameters:
+        c_step (Step): The stage.
+        context (GenerationContext): The naming state of the generation run.
+
+    Returns:
+        str: The code of the module.
+    """
+    fingerprint = None
+    if context.fragment_cache is not None:
+        fingerprint = c_step.get_fingerprint(context)
+    if fingerprint is None:
+        return _build_stage_module(c_step, context)
+    # Stages that did not change since a previous run reuse its module
+    return context.fragment_cache.get_or_build(
+        ("stage", fingerprint), lambda: _build_stage_module(c_step, context)
+    )
+
+def generate_stage_modules(c_steps : list, fragment_cache=None) -> list:
+    """
+    Generates the modules of some stages in a run of their own, as a job of an executor.
+
+    Parameters:
+        c_steps (list): The stages.
+        fragment_cache (FragmentCache): The cache of node code fragments, if any.
+
+    Returns:
+        list: For each stage, the code of its module, and the position in the stage
+        and the variable name of each node that was renamed.
+    """
+    context = GenerationContext(fragment_cache)
+    modules = []
+    for c_step in c_steps:
+        code = get_stage_module(c_step, context)
+        renames = tuple(
+            (position, context.variable_names[node])
+            for position, node in enumerate(c_step.nodes)
+            if node in context.variable_names
+        )
+        modules.append((code, renames))
+    return modules
+
+def _build_stage_module(c_step, context) -> str:
+    """
+    Generates the module of a stage.
+
+    Parameters:
+        c_step (Step): The stage.
+        context (GenerationContext): The naming state of the generation run.
+
+    Returns:
+        str: The code of the module.
+    """
+    emitter = CodeEmitter()
+    emitter.line('""" ' + c_step.name + '.py """')
+    emitter.line()
+    c_step.emit_dependencies_code(emitter, context)
+    emitter.line()
+    emitter.line("def create_" + c_step.name +"():")
+    with emitter.indent():
+        emitter.line(c_step.r_name + " =  Stage('" + c_step.original_name +  "')")
+        emitter.blank()
+        c_step.emit_code(emitter, context)
+        c_step.emit_output_code(emitter, context)
+        emitter.line()
+        emitter.line("return " + c_step.r_name)
+    emitter.line()
+    return emitter.getvalue()
 
 class CodeGenerator:
     """ CodeGenerator: Component that generates code. """
-    def __init__(self):
+    def __init__(self, fragment_cache=None, executor=None,
+                 parallel_threshold : int = PARALLEL_STAGE_THRESHOLD, parallel_jobs : int = None):
+        """
+        Initializes a CodeGenerator.
+
+        Parameters:
+            fragment_cache (FragmentCache): The cache of node code fragments used by
+                the runs that are not given a context, if any.
+            executor (ThreadPoolExecutor): A thread pool the stage modules are
+                generated in, if any. Without it, the stages are generated one after
+                another. This is experimental: the server does not use it, as the
+                threads share one interpreter lock and benchmarks/parallel_stages.py
+                measured no gain over a serial run.
+            parallel_threshold (int): The minimum number of stage modules of a pipeline
+                for them to be generated in the executor. Smaller pipelines are
+                generated serially, as sending the stages costs more than it saves.
+            parallel_jobs (int): The number of jobs the stages are split into, which
+                should be the number of workers of the executor. Defaults to the number
+                of CPUs.
+
+        Raises:
+            ValueError: If the executor is a process pool, which can not share the
+                pipeline and the fragment cache with the generator.
+        """
+        if isinstance(executor, ProcessPoolExecutor):
+            raise ValueError("The stage modules can only be generated in a thread pool")
+        self.fragment_cache = fragment_cache
+        self.executor = executor
+        self.parallel_threshold = parallel_threshold
+        self.parallel_jobs = parallel_jobs or os.cpu_count() or 1
         self.modules = {}
         self.params = {}
+        self.timings = {}
 
-    def __generate_stage_code(self, pipeline):
+    def __generate_stage_code(self, pipeline, context):
         """
         Generates code for a step in a pipeline.
 
         This function takes a pipeline as input, generates code for each step in the pipeline,
         and stores the generated code in the self.modules dictionary.
 
+        The module of each stage only depends on the stage, so pipelines with at least
+        parallel_threshold stage modules generate them in the executor of the generator,
+        if it has one, split into parallel_jobs jobs of consecutive stages. The modules
+        and the names of the renamed nodes are then added in the order of the stages,
+        so the result is the same as the one of a serial run.
+
         Parameters:
             pipeline (Pipeline): The pipeline for which to generate code.
+            context (GenerationContext): The naming state of the generation run.
 
         Returns:
             None
@@ -24,6 +142,7 @@ class CodeGenerator:
         root = pipeline.get_step('root')
         steps = root.nodes
 
+        c_steps = []
         for step in steps:
             
             if "link" in step.params and step.params["link"]["value"] != "":
@@ -42,104 +161,190 @@ class CodeGenerator:
                 else:
                     steps_name_i_depend_on.add(dep_name)
 
-            c_step = pipeline.get_step(step.id)
-
-            code = ""
-            code += '""" ' + c_step.name + '.py """\n\n'
-            code += c_step.get_dependencies_code()
-            code += "\n"
-            code += "def create_" + c_step.name +"():\n"
-            code += "\t" + c_step.r_name + " =  Stage('" + c_step.original_name +  "')\n\n"
+            c_steps.append(pipeline.get_step(step.id))
 
-            for j in c_step.generate_code().split("\n")[:-1]:
-                code += "\t" + j + "\n"
-            
-            for j in c_step.get_output_code().split("\n"):
-                code += "\t" + j + "\n"
-            
-            code += "\treturn " + c_step.r_name + "\n\n"
+        if self.executor is None or len(c_steps) < self.parallel_threshold:
+            for c_step in c_steps:
+                self.modules[c_step.name] = get_stage_module(c_step, context)
+            return
 
-            self.modules[c_step.name] = code
+        # Each job generates consecutive stages, so a job is sent per worker and not
+        # per stage
+        size = -(-len(c_steps) // self.parallel_jobs)
+        chunks = [c_steps[i:i + size] for i in range(0, len(c_steps), size)]
+        futures = [
+            self.executor.submit(generate_stage_modules, chunk, context.fragment_cache)
+            for chunk in chunks
+        ]
+        for chunk, future in zip(chunks, futures):
+            for c_step, (code, renames) in zip(chunk, future.result()):
+                for position, variable_name in renames:
+                    context.set_variable_name(c_step.nodes[position], variable_name)
+                self.modules[c_step.name] = code
 
-    def __generate_main_code(self, pipeline):
+    def __generate_main_code(self, pipeline, context):
         """
         Generates the main code for the given pipeline.
         
         This function takes a pipeline as input, extracts its steps, and generates the main 
         code by importing the necessary modules, 
         defining the main function, and adding the steps to the orchestrator.
+        The stages are ordered by the same scheduler as the nodes of a stage, and linked
+        stages are resolved through a precomputed map, so the cost grows linearly with
+        the number of stages. When the context has a fragment cache, the main module is
+        reused while the root graph and the names of the stages do not change.
         
         Parameters:
             pipeline (Pipeline): The pipeline for which the main code is to be generated.
+            context (GenerationContext): The naming state of the generation run. Stages
+                that appear several times get a suffixed name in it.
         
         Returns:
             None
         """
         root = pipeline.get_step('root')
-        steps = root.nodes
-        code  = "import warnings\n"
-        code += "warnings.filterwarnings('ignore')\n\n"
-        code += "from mls_lib.orchestration import Pipeline\n"
+        links = {}
+        for step in root.nodes:
+            if "link" in step.params:
+                links[step.id] = step.params["link"]["value"]
+
+        fingerprint = None
+        if context.fragment_cache is not None:
+            fingerprint = self.__get_root_fingerprint(pipeline, root, links, context)
+        if fingerprint is None:
+            code, _ = self.__get_main_module(pipeline, root, links, context)
+        else:
+            code, renames = context.fragment_cache.get_or_build(
+                ("main", fingerprint),
+                lambda: self.__get_main_module(pipeline, root, links, context),
+            )
+            # The stages renamed by a previous run get the same names in this one
+            for position, variable_name in renames:
+                c_step = self.__get_root_step(pipeline, root.nodes[position], links)
+                context.set_step_name(c_step, variable_name)
 
+        self.modules["main"] = code
+
+    def __get_root_step(self, pipeline, node, links : dict):
+        """
+        Returns the stage of a node of the root step.
+
+        Parameters:
+            pipeline (Pipeline): The pipeline.
+            node (Node): The node of the root step.
+            links (dict): The stage each node of the root step is linked to, by node id.
+
+        Returns:
+            Step: The stage of the node, or the one it is linked to if the node has none.
+        """
+        try:
+            return pipeline.get_step(node.id)
+        except ValueError:
+            return pipeline.get_step(links.get(node.id, ""))
+
+    def __get_root_fingerprint(self, pipeline, root, links : dict, context) -> tuple:
+        """
+        Gets a fingerprint of everything the main module is generated from: the name of
+        each stage, whether it is linked, the connections between the stages and the
+        graph of the root step.
+
+        Parameters:
+            pipeline (Pipeline): The pipeline.
+            root (Step): The root step of the pipeline.
+            links (dict): The stage each node of the root step is linked to, by node id.
+            context (GenerationContext): The naming state of the generation run.
+
+        Returns:
+            tuple: The fingerprint, or None if a node of the root step has no stage.
+        """
+        stages = []
+        positions = {}
+        for position, node in enumerate(root.nodes):
+            try:
+                c_step = self.__get_root_step(pipeline, node, links)
+            except ValueError:
+                return None
+            positions.setdefault(c_step, position)
+            stages.append((c_step, links.get(node.id, "") != ""))
+
+        fingerprint = []
+        for c_step, linked in stages:
+            dependencies = tuple(
+                (positions.get(inp), context.get_step_name(inp), inp_port, me_port)
+                for inp, inp_port, me_port in c_step.dependencies
+            )
+            fingerprint.append((
+                c_step.name, context.get_step_name(c_step), linked, positions[c_step],
+                dependencies,
+            ))
+        return tuple(fingerprint), root.get_wiring_fingerprint()
+
+    def __get_main_module(self, pipeline, root, links : dict, context) -> tuple:
+        """
+        Generates the main module, naming the stages that appear several times.
+
+        Parameters:
+            pipeline (Pipeline): The pipeline.
+            root (Step): The root step of the pipeline.
+            links (dict): The stage each node of the root step is linked to, by node id.
+            context (GenerationContext): The naming state of the generation run.
+
+        Returns:
+            tuple: The code of the module, and the position in the root step and the
+            name of each stage that was renamed.
+        """
+        steps = root.nodes
+        emitter = CodeEmitter()
+        emitter.line("import warnings")
+        emitter.line("warnings.filterwarnings('ignore')")
+        emitter.line()
+        emitter.line("from mls_lib.orchestration import Pipeline")
 
         for step in steps:
             c_step = pipeline.get_step(step.id)
             # Linked stages do not need new modules
-            if "link" in step.params and step.params["link"]["value"] != "":
+            if links.get(step.id, "") != "":
                 continue
-            code += "from " + c_step.name + " import create_" + c_step.name + "\n"
-
-        code += "\n"
-        code += "def main():\n"
-        code += "\troot = Pipeline()\n"
-
-        copy_nodes = steps.copy()
-        node_dependencies = []
-        appearence_count = {}
-        while len(copy_nodes) > 0:
-            for node in copy_nodes:
-                if not node.is_ready():
-                    continue
-                try:
-                    c_step = pipeline.get_step(node.id)
-                except ValueError:
-                    the_step_i_want = ""
-                    for temp in steps:
-                        if temp.id == node.id:
-                            the_step_i_want = temp.params["link"]["value"]
-                    c_step = pipeline.get_step(the_step_i_want)
-                original_c_step_name = c_step.name
-                if c_step.name in appearence_count:
-                    appearence_count[c_step.name] += 1
+            emitter.line("from " + c_step.name + " import create_" + c_step.name)
+
+        emitter.line()
+        emitter.line("def main():")
+        renames = []
+        positions = {node: position for position, node in enumerate(steps)}
+        with emitter.indent():
+            emitter.line("root = Pipeline()")
+
+            appearence_count = {}
+            for node in schedule_nodes(steps):
+                c_step = self.__get_root_step(pipeline, node, links)
+                original_c_step_name = context.get_step_name(c_step)
+                variable_name = original_c_step_name
+                if variable_name in appearence_count:
+                    appearence_count[variable_name] += 1
                 else:
-                    appearence_count[c_step.name] = 1
-                if appearence_count[c_step.name] > 1:
-                    c_step.name = c_step.name + "_" + str(appearence_count[c_step.name])
-                
-                variable_name = c_step.name
-                
-                code += "\t" + variable_name + " = create_" + original_c_step_name + "()\n"
-                code += "\troot.add_stage(" + variable_name + ", \n"
-                for dependency in c_step.dependencies:
-                    inp, inp_port, me_port = dependency
-                    code += "\t\t" + me_port + " = (" + inp.name + ", '" + inp_port + "'),\n"
-                code += "\t)\n"
-                node_dependencies.append(variable_name)
-                code += "\n"
-                copy_nodes.remove(node)
-
-                # Update next nodes so they now they can be added to the code now
-                for p in node.sources:
-                    for target, target_port in node.sources[p]:
-                        target.past_dependency(target, target_port)
-                break
-
-        code += "\troot.execute()\n"
-        code += "\nif __name__ == '__main__':\n\tmain()"
+                    appearence_count[variable_name] = 1
+                if appearence_count[variable_name] > 1:
+                    variable_name = variable_name + "_" + str(appearence_count[variable_name])
+                    context.set_step_name(c_step, variable_name)
+                    renames.append((positions[node], variable_name))
 
-        self.modules["main"] = code
+                emitter.line(variable_name + " = create_" + original_c_step_name + "()")
+                emitter.line("root.add_stage(" + variable_name + ", ")
+                with emitter.indent():
+                    for dependency in c_step.dependencies:
+                        inp, inp_port, me_port = dependency
+                        emitter.line(me_port + " = (" + context.get_step_name(inp) + ", '" + inp_port + "'),")
+                emitter.line(")")
+                emitter.blank()
 
-    def __get_params_file(self, pipeline):
+            emitter.line("root.execute()")
+        emitter.line()
+        emitter.line("if __name__ == '__main__':")
+        with emitter.indent():
+            emitter.line("main()", end="")
+        return emitter.getvalue(), tuple(renames)
+
+    def __get_params_file(self, pipeline, context):
         """
         Generates the code for the parameters file.
 
@@ -148,6 +353,7 @@ class CodeGenerator:
 
         Parameters:
             pipeline (Pipeline): The pipeline for which the parameters file is to be generated.
+            context (GenerationContext): The naming state of the generation run.
 
         Returns:
             None
@@ -167,26 +373,39 @@ class CodeGenerator:
                     for j in label_params:
                         node_params.update(j)
                 if len(node_params.keys()) > 0:
-                    self.params[c_step.name] = node_params
+                    self.params[context.get_step_name(c_step)] = node_params
             except ValueError:
                 continue
         
-    def generate_code(self, pipeline):
+    def generate_code(self, pipeline, context=None):
         """
         Generates code for a given pipeline.
 
         This function takes a pipeline as input, generates code for each step in the pipeline,
         and generates the main code that orchestrates the steps.
 
+        The pipeline is not modified: the names given during the run are kept in the
+        context, so a loaded pipeline can be generated many times, also from several
+        threads at once.
+
         Parameters:
             pipeline (Pipeline): The pipeline for which to generate code.
+            context (GenerationContext): The naming state of the run. A new one,
+                using the fragment cache of the generator, is created if not given.
 
         Returns:
             None
         """
-        self.__generate_stage_code(pipeline)
-        self.__generate_main_code(pipeline)
-        self.__get_params_file(pipeline)
+        if context is None:
+            context = GenerationContext(self.fragment_cache)
+        timer = PhaseTimer()
+        with timer.phase("stages"):
+            self.__generate_stage_code(pipeline, context)
+        with timer.phase("main"):
+            self.__generate_main_code(pipeline, context)
+        with timer.phase("params"):
+            self.__get_params_file(pipeline, context)
+        self.timings = timer.timings
     def get_modules(self):
         """
         Returns a deep copy of the modules dictionary.
@@ -209,3 +428,14 @@ class CodeGenerator:
             dict: A deep copy of the params dictionary.
         """
         return deepcopy(self.params)
+    def get_timings(self):
+        """
+        Returns the time spent in each stage of the last code generation.
+
+        Parameters:
+            None
+
+        Returns:
+            dict: The seconds spent generating the stage modules, the main module and the params.
+        """
+        return dict(self.timings)
@@ -1,41 +1,106 @@
 """ CodePacker: Component that writes the code. """
-from os import write
 import shutil
 import yaml
+from .archive import ArchiveWriter
 class CodePacker():
     """ CodePacker: Component that writes the code. """
     def __init__(self) -> None:
         pass
 
+    def get_package_files(self, code, params):
+        """
+        Renders the generated modules and the params file as package files.
+
+        Args:
+            code (dict): A dictionary containing the code modules to be packaged.
+            params (dict): A dictionary containing the parameters of the pipeline.
+
+        Returns:
+            dict: A dictionary with the file names as keys and their contents as values.
+        """
+        files = {}
+        for module in code:
+            files[str(module) + ".py"] = code[module].replace("\t", "    ")
+        files["params.yaml"] = yaml.dump(params)
+        return files
+
     def generate_package(self, code, params, write_path, mls_path):
         """
         Generates a package from the provided code and writes it to the specified path.
-        
+
         Args:
             code (dict): A dictionary containing the code modules to be packaged.
             write_path (str): The path where the package will be written.
             mls_path (str): The path to the MLS library.
-        
+
         Returns:
             None
         """
-        for module in code:
-            module_code = code[module]
-            module_write_path = write_path + str(module) + ".py"
-
-            file = open(module_write_path, 'w', encoding='utf-8')
-            module_code = module_code.replace("\t", "    ")
-            file.write(module_code)
+        for file_name, file_content in self.get_package_files(code, params).items():
+            file = open(write_path + file_name, 'w', encoding='utf-8')
+            file.write(file_content)
             file.close()
 
-        params_file_path = write_path + "params.yaml"
-
-        file = open(params_file_path, 'w', encoding='utf-8')
-        yaml.dump(params, file)
-        file.close()
-
         # file = open(write_path + "__init__.py", 'w', encoding='utf-8')
         # file.write("")
         # file.close()
 
         shutil.copytree(mls_path, write_path+'/mls_lib')
+
+    def add_to_archive(self, writer, files, library, root="src/"):
+        """
+        Writes a package into an archive that is being built.
+
+        The package files are compressed into the archive, while the already
+        compressed entries of the MLS library are copied into it as they are.
+
+        Args:
+            writer (ArchiveWriter): The archive being built.
+            files (dict): The package files, as returned by get_package_files.
+            library (LibraryArchive): The compressed MLS library.
+            root (str): The folder of the archive where the package is placed.
+
+        Returns:
+            None
+        """
+        for file_name, file_content in files.items():
+            writer.add_file(root + file_name, file_content)
+        for entry in library.get_entries():
+            writer.add_entry(entry, root + "mls_lib/")
+
+    def pack_archive(self, files, library, root="src/"):
+        """
+        Packs already rendered package files and the MLS library into an in-memory ZIP archive.
+
+        Nothing is written to the filesystem, and the MLS library is not compressed again.
+
+        Args:
+            files (dict): The package files, as returned by get_package_files.
+            library (LibraryArchive): The compressed MLS library.
+            root (str): The folder of the archive where the package is placed.
+
+        Returns:
+            bytes: The ZIP archive containing the package.
+        """
+        writer = ArchiveWriter()
+        self.add_to_archive(writer, files, library, root)
+        return writer.getvalue()
+
+    def generate_batch_archive(self, packages, library):
+        """
+        Generates a single in-memory ZIP archive with one folder per package.
+
+        Args:
+            packages (dict): A dictionary with the folder names as keys and tuples
+                with the code modules and the params of each package as values.
+            library (LibraryArchive): The compressed MLS library.
+
+        Returns:
+            bytes: The ZIP archive containing all the packages.
+        """
+        writer = ArchiveWriter()
+        for folder, (code, params) in packages.items():
+            self.add_to_archive(
+                writer, self.get_package_files(code, params), library, folder + "/src/"
+            )
+        return writer.getvalue()
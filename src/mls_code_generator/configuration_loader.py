@@ -1,6 +1,9 @@
 """ Configuration Loader """
 
+import threading
+from collections import OrderedDict
 from . types import CustomNode
+from . utils import canonical_hash
 class ConfigLoader:
     """ Configuration Loader """
     def __init__(self, content) -> None:
@@ -31,3 +34,78 @@ class ConfigLoader:
         if node_name not in self.all_nodes:
             raise ValueError("Node not found")
         return self.all_nodes[node_name]
+
+class ConfigRegistry:
+    """ ConfigRegistry: Compiled ConfigLoader instances shared by the hash of their content """
+    def __init__(self, max_size : int = 16) -> None:
+        """
+        Initializes an empty registry.
+
+        Parameters:
+            max_size (int): The maximum number of configurations kept in the registry.
+                The least recently used ones are evicted first.
+        """
+        self.max_size = max_size
+        self.loaders = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, config_hash : str):
+        """
+        Retrieves a configuration by the hash of its content.
+
+        Args:
+            config_hash (str): The hash of the nodes payload.
+
+        Returns:
+            ConfigLoader: The configuration, or None if it is not in the registry.
+        """
+        with self.lock:
+            loader = self.loaders.get(config_hash)
+            if loader is None:
+                self.misses += 1
+                return None
+            self.loaders.move_to_end(config_hash)
+            self.hits += 1
+            return loader
+
+    def load(self, content, config_hash : str = None) -> tuple:
+        """
+        Returns the configuration for the given nodes payload, compiling it only
+        if it is not in the registry yet.
+
+        Args:
+            content (list): The nodes payload.
+            config_hash (str): The hash of the payload, if already known.
+
+        Returns:
+            tuple: The hash of the payload and its ConfigLoader.
+        """
+        if config_hash is None:
+            config_hash = canonical_hash(content)
+        loader = self.get(config_hash)
+        if loader is None:
+            loader = ConfigLoader(content=content)
+            with self.lock:
+                self.loaders[config_hash] = loader
+                while len(self.loaders) > self.max_size:
+                    self.loaders.popitem(last=False)
+                    self.evictions += 1
+        return config_hash, loader
+
+    def stats(self) -> dict:
+        """
+        Returns the counters of the registry.
+
+        Returns:
+            dict: The number of entries, hits, misses and evictions of the registry.
+        """
+        with self.lock:
+            return {
+                "entries": len(self.loaders),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,83 @@
+""" CodeEmitter: Collects generated code line by line and joins it once. """
+
+import contextlib
+
+class CodeEmitter:
+    """ CodeEmitter: A buffer of generated code lines with an indentation level. """
+    def __init__(self, indent_text : str = "\t", level : int = 0) -> None:
+        """
+        Initializes an empty emitter.
+
+        Parameters:
+            indent_text (str): The text added once per indentation level.
+            level (int): The initial indentation level.
+        """
+        self.indent_text = indent_text
+        self.level = level
+        self.prefix = indent_text * level
+        self.parts = []
+
+    def line(self, text : str = "", end : str = "\n") -> None:
+        """
+        Adds a line at the current indentation level.
+
+        Empty lines are indented too. If the text spans several lines, each of them
+        is indented.
+
+        Parameters:
+            text (str): The text of the line.
+            end (str): The text that ends the line.
+
+        Returns:
+            None
+        """
+        if self.prefix and "\n" in text:
+            text = text.replace("\n", "\n" + self.prefix)
+        self.parts.append(self.prefix + text + end)
+
+    def lines(self, lines) -> None:
+        """
+        Adds several lines at the current indentation level.
+
+        Parameters:
+            lines (iterable): The texts of the lines.
+
+        Returns:
+            None
+        """
+        for text in lines:
+            self.line(text)
+
+    def blank(self) -> None:
+        """
+        Adds an empty line that is not indented.
+
+        Returns:
+            None
+        """
+        self.parts.append("\n")
+
+    @contextlib.contextmanager
+    def indent(self, levels : int = 1):
+        """
+        Indents the lines added inside the with block.
+
+        Parameters:
+            levels (int): The number of levels to indent.
+        """
+        self.level += levels
+        self.prefix = self.indent_text * self.level
+        try:
+            yield self
+        finally:
+            self.level -= levels
+            self.prefix = self.indent_text * self.level
+
+    def getvalue(self) -> str:
+        """
+        Returns the code added so far.
+
+        Returns:
+            str: The code.
+        """
+        return "".join(self.parts)
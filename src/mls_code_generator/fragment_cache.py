@@ -0,0 +1,125 @@
+""" FragmentCache: Generated code shared by the nodes and stages that produce the same code. """
+
+import threading
+from collections import OrderedDict
+
+def _get_size(fragment) -> int:
+    """
+    Counts the characters of the code held by a fragment.
+
+    Parameters:
+        fragment: A fragment, such as the code of a task or of a module, or a tuple
+            with the code of a module and what else was built with it.
+
+    Returns:
+        int: The number of characters of the strings of the fragment. Other values,
+        such as the small import sets of the nodes, are not counted.
+    """
+    if isinstance(fragment, str):
+        return len(fragment)
+    if isinstance(fragment, tuple):
+        return sum(_get_size(item) for item in fragment)
+    return 0
+
+class FragmentCache:
+    """ FragmentCache: Code fragments and import sets of nodes, and modules of stages, with LRU eviction. """
+    def __init__(self, max_size : int = 4096, max_bytes : int = 64 * 1024 * 1024) -> None:
+        """
+        Initializes an empty cache.
+
+        The cache keeps whole modules besides the fragments of nodes, so it is bounded
+        both by its number of fragments and by the size of their code, which grows
+        with the size of the pipelines.
+
+        The size bound only covers the stored code. The keys are not counted, although
+        the fingerprints of stages hold the names, params and wiring of their nodes, so
+        a full cache takes more memory than max_bytes. Counting them means walking every
+        fingerprint as it is stored, which made the first generation of 500 stages
+        about 20 ms slower in benchmarks/fragment_cache.py.
+
+        Parameters:
+            max_size (int): The maximum number of fragments kept in the cache.
+                The least recently used ones are evicted first. A value of 0
+                disables the cache.
+            max_bytes (int): The maximum number of characters of code kept in the
+                cache, leaving out the keys. Fragments larger than that are not stored.
+        """
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get_or_build(self, key : tuple, build):
+        """
+        Returns the fragment stored under the given key, building and storing it if it
+        is not in the cache.
+
+        The fragment is built outside the lock, so two threads that miss the same key
+        at once may both build it. Fragments must not be modified once returned, as
+        they are shared by every generation that hits them.
+
+        Parameters:
+            key (tuple): Everything the fragment depends on.
+            build (callable): A function without arguments that returns the fragment.
+
+        Returns:
+            The fragment.
+        """
+        with self.lock:
+            fragment = self.entries.get(key)
+            if fragment is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return fragment
+            self.misses += 1
+
+        fragment = build()
+        size = _get_size(fragment)
+        if size > self.max_bytes:
+            return fragment
+        with self.lock:
+            if key in self.entries:
+                self.size -= _get_size(self.entries.pop(key))
+            self.entries[key] = fragment
+            self.size += size
+            while len(self.entries) > self.max_size or self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= _get_size(evicted)
+                self.evictions += 1
+        return fragment
+
+    def clear(self) -> None:
+        """
+        Removes every fragment from the cache. The counters are kept.
+
+        Returns:
+            None
+        """
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self) -> dict:
+        """
+        Returns the counters of the cache.
+
+        Returns:
+            dict: The number of entries, characters of code, hits, misses and
+            evictions of the cache, and the share of the lookups that were hits.
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "max_size": self.max_size,
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
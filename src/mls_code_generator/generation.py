@@ -0,0 +1,158 @@
+""" Generation: Builds the archive of a pipeline from its editor code. """
+
+import os
+from .archive import LibraryArchive
+from .code_generator import CodeGenerator
+from .code_packer import CodePacker
+from .configuration_loader import ConfigRegistry
+from .fragment_cache import FragmentCache
+from .metrics import PhaseTimer
+from .pipeline_loader import EditorPipelineLoader
+from .types import Pipeline
+
+class UnknownNodesError(LookupError):
+    """ UnknownNodesError: Raised by a worker that has not compiled the nodes payload of a job. """
+
+def generate_files(code, node_configuration, timer=None, fragment_cache=None):
+    """
+    Generates the code of a pipeline.
+
+    Parameters:
+        code (dict): The editor code of the pipeline.
+        node_configuration (ConfigLoader): The compiled nodes configuration.
+        timer (PhaseTimer): Collects the time spent in each phase, if given.
+        fragment_cache (FragmentCache): The cache of node code fragments, if any.
+
+    Returns:
+        tuple: The generated modules and the params of the pipeline.
+    """
+    timer = timer if timer is not None else PhaseTimer()
+
+    with timer.phase("load_pipeline"):
+        pipeline_loader = EditorPipelineLoader(code, node_configuration)
+        pipeline = Pipeline()
+        pipeline.load_pipeline(pipeline_loader)
+
+    code_generator = CodeGenerator(fragment_cache)
+    code_generator.generate_code(pipeline)
+    for stage, seconds in code_generator.get_timings().items():
+        timer.add("generate_code_" + stage, seconds)
+
+    return code_generator.get_modules(), code_generator.get_params()
+
+def generate_archive(code, node_configuration, library, timer=None, fragment_cache=None):
+    """
+    Generates the code of a pipeline and packages it into a ZIP archive.
+
+    Parameters:
+        code (dict): The editor code of the pipeline.
+        node_configuration (ConfigLoader): The compiled nodes configuration.
+        library (LibraryArchive): The compressed MLS library.
+        timer (PhaseTimer): Collects the time spent in each phase, if given.
+        fragment_cache (FragmentCache): The cache of node code fragments, if any.
+
+    Returns:
+        bytes: The ZIP archive containing the generated code files.
+    """
+    timer = timer if timer is not None else PhaseTimer()
+    files = generate_package_files(code, node_configuration, timer, fragment_cache)
+    with timer.phase("archive"):
+        return CodePacker().pack_archive(files, library)
+
+def generate_package_files(code, node_configuration, timer=None, fragment_cache=None):
+    """
+    Generates the code of a pipeline and renders it as package files, without the
+    MLS library.
+
+    Parameters:
+        code (dict): The editor code of the pipeline.
+        node_configuration (ConfigLoader): The compiled nodes configuration.
+        timer (PhaseTimer): Collects the time spent in each phase, if given.
+        fragment_cache (FragmentCache): The cache of node code fragments, if any.
+
+    Returns:
+        dict: The contents of the modules and of the params file, by file name.
+    """
+    timer = timer if timer is not None else PhaseTimer()
+    modules, params = generate_files(code, node_configuration, timer, fragment_cache)
+    with timer.phase("package"):
+        return CodePacker().get_package_files(modules, params)
+
+_worker_library = None
+_worker_registry = None
+_worker_fragment_cache = None
+
+def init_worker(mls_path, nodes=None, fragment_cache_size=0):
+    """
+    Initializes a worker process of a generation pool.
+
+    The MLS library is compressed and the given nodes configuration is compiled
+    once, when the worker starts, so jobs do not pay for them. The jobs of a worker
+    can share a cache of node code fragments.
+
+    Parameters:
+        mls_path (str): The path to the MLS library.
+        nodes (list): A nodes payload to compile in advance, if any.
+        fragment_cache_size (int): The number of fragments kept in the cache of the
+            worker, or 0 to generate every fragment again.
+
+    Returns:
+        None
+    """
+    global _worker_library, _worker_registry, _worker_fragment_cache
+    _worker_library = LibraryArchive(mls_path)
+    _worker_registry = ConfigRegistry()
+    _worker_fragment_cache = (
+        FragmentCache(fragment_cache_size) if fragment_cache_size > 0 else None
+    )
+    if os.path.isdir(mls_path):
+        _worker_library.refresh()
+    if nodes is not None:
+        _worker_registry.load(nodes)
+
+def run_generation_job(code, nodes, nodes_hash=None):
+    """
+    Generates the archive of a pipeline inside a worker process.
+
+    Parameters:
+        code (dict): The editor code of the pipeline.
+        nodes (list): The nodes payload.
+        nodes_hash (str): The hash of the nodes payload, if already known.
+
+    Returns:
+        tuple: The content hash of the MLS library packed in the archive, which the
+        worker may have refreshed after the server read its own, and the ZIP archive
+        containing the generated code files.
+    """
+    _, node_configuration = _worker_registry.load(nodes, nodes_hash)
+    library = _worker_library.pin()
+    data = generate_archive(code, node_configuration, library, fragment_cache=_worker_fragment_cache)
+    return library.get_hash(), data
+
+def run_files_job(code, nodes=None, nodes_hash=None):
+    """
+    Generates the code of a pipeline inside a worker process, without packaging it.
+
+    The nodes payload can be left out once the worker has compiled it, so it is not
+    sent again with every job.
+
+    Parameters:
+        code (dict): The editor code of the pipeline.
+        nodes (list): The nodes payload, or None to use the one compiled by the
+            worker for nodes_hash.
+        nodes_hash (str): The hash of the nodes payload, if already known.
+
+    Returns:
+        tuple: The generated modules and the params of the pipeline.
+
+    Raises:
+        UnknownNodesError: If nodes is None and the worker has not compiled the
+            nodes payload of nodes_hash.
+    """
+    if nodes is None:
+        node_configuration = _worker_registry.get(nodes_hash)
+        if node_configuration is None:
+            raise UnknownNodesError(nodes_hash)
+    else:
+        _, node_configuration = _worker_registry.load(nodes, nodes_hash)
+    return generate_files(code, node_configuration, fragment_cache=_worker_fragment_cache)
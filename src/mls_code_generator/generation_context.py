@@ -0,0 +1,132 @@
+""" GenerationContext: The naming state of one code generation run. """
+
+class _FragmentKey:
+    """ _FragmentKey: The fragment key of a node, hashed once per run. """
+    __slots__ = ("key", "hash")
+
+    def __init__(self, key : tuple) -> None:
+        self.key = key
+        self.hash = hash(key)
+
+    def __hash__(self) -> int:
+        return self.hash
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, _FragmentKey):
+            return NotImplemented
+        return self.key == other.key
+
+class GenerationContext:
+    """ GenerationContext: The names given to nodes and steps during one code generation run.
+
+    Nodes and steps that share a name get a numeric suffix when the code is generated.
+    The suffixed names are kept here instead of on the nodes and steps, so a loaded
+    pipeline is never modified and can be generated many times, also concurrently,
+    with a new context for each run.
+    """
+    def __init__(self, fragment_cache=None) -> None:
+        """
+        Initializes the naming state of a run.
+
+        Parameters:
+            fragment_cache (FragmentCache): The cache of node code fragments shared
+                between runs, if any.
+        """
+        self.variable_names = {}
+        self.step_names = {}
+        self.fragment_cache = fragment_cache
+        self.fragment_keys = {}
+
+    def get_variable_name(self, node) -> str:
+        """
+        Returns the variable name of a node in this run.
+
+        Parameters:
+            node (Node): The node.
+
+        Returns:
+            str: The name given to the node in this run, or its own variable name.
+        """
+        return self.variable_names.get(node, node.variable_name)
+
+    def set_variable_name(self, node, variable_name : str) -> None:
+        """
+        Gives a node a variable name for this run.
+
+        Parameters:
+            node (Node): The node.
+            variable_name (str): The variable name of the node.
+
+        Returns:
+            None
+        """
+        self.variable_names[node] = variable_name
+
+    def get_step_name(self, step) -> str:
+        """
+        Returns the name of a step in this run.
+
+        Parameters:
+            step (Step): The step.
+
+        Returns:
+            str: The name given to the step in this run, or its own name.
+        """
+        return self.step_names.get(step, step.name)
+
+    def set_step_name(self, step, name : str) -> None:
+        """
+        Gives a step a name for this run.
+
+        Parameters:
+            step (Step): The step.
+            name (str): The name of the step.
+
+        Returns:
+            None
+        """
+        self.step_names[step] = name
+
+    def get_fragment(self, node, kind : str, build, *key):
+        """
+        Returns a fragment of the generated code of a node from the fragment cache.
+
+        Nodes of the same type with the same params share their fragments. The key of
+        each node is computed once per run.
+
+        Parameters:
+            node (Node): The node.
+            kind (str): The kind of fragment, such as "code" or "imports".
+            build (callable): A function without arguments that builds the fragment.
+            *key: The values the fragment depends on besides the type and params of
+                the node, such as its variable name.
+
+        Returns:
+            The fragment, built with build if there is no cache, if the node can not
+            be cached or if the fragment is not in the cache.
+        """
+        if self.fragment_cache is None:
+            return build()
+        node_key = self.get_fragment_key(node)
+        if node_key is None:
+            return build()
+        return self.fragment_cache.get_or_build((kind, node_key) + key, build)
+
+    def get_fragment_key(self, node):
+        """
+        Returns the fragment key of a node, computed once per run.
+
+        Parameters:
+            node (Node): The node.
+
+        Returns:
+            The key of the node, which hashes and compares like the one returned by its
+            get_fragment_key, or None if the code of the node can not be shared.
+        """
+        if node in self.fragment_keys:
+            return self.fragment_keys[node]
+        node_key = node.get_fragment_key()
+        if node_key is not None:
+            node_key = _FragmentKey(node_key)
+        self.fragment_keys[node] = node_key
+        return node_key
@@ -0,0 +1,192 @@
+""" Jobs: Asynchronous generation jobs run by an executor. """
+
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+
+class QueueFullError(RuntimeError):
+    """ QueueFullError: Raised when too many jobs are waiting to be run. """
+
+class Job:
+    """ Job: A unit of work submitted to the JobManager. """
+    def __init__(self, future : Future) -> None:
+        self.id = uuid.uuid4().hex
+        self.future = future
+        self.created = time.monotonic()
+        self.finished = None
+
+    def get_status(self) -> str:
+        """
+        Returns the status of the job.
+
+        Returns:
+            str: One of "queued", "running", "done" or "failed".
+        """
+        if self.future.done():
+            if self.future.cancelled() or self.future.exception() is not None:
+                return "failed"
+            return "done"
+        if self.future.running():
+            return "running"
+        return "queued"
+
+    def get_error(self):
+        """
+        Returns the error of a failed job.
+
+        Returns:
+            str: The description of the error, or None if the job did not fail.
+        """
+        if not self.future.done():
+            return None
+        if self.future.cancelled():
+            return "cancelled"
+        error = self.future.exception()
+        if error is None:
+            return None
+        return type(error).__name__ + ": " + str(error)
+
+class JobManager:
+    """ JobManager: Submits jobs to an executor and keeps their results until they expire. """
+    def __init__(self, executor, max_pending : int = 64, ttl : float = 600) -> None:
+        """
+        Initializes a JobManager.
+
+        Parameters:
+            executor (Executor): The executor that runs the jobs, usually a ProcessPoolExecutor.
+            max_pending (int): The maximum number of jobs queued or running at the same time.
+            ttl (float): Seconds a finished job is kept before it expires.
+        """
+        self.executor = executor
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self.jobs = {}
+        self.batch_futures = set()
+        self.lock = threading.Lock()
+
+    def __purge_expired(self) -> None:
+        now = time.monotonic()
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job.finished is not None and now - job.finished > self.ttl
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
+
+    def __add(self, future : Future, on_result) -> Job:
+        job = Job(future)
+        self.jobs[job.id] = job
+
+        def finish(done_future):
+            job.finished = time.monotonic()
+            if on_result is not None and not done_future.cancelled() \
+                    and done_future.exception() is None:
+                on_result(done_future.result())
+
+        future.add_done_callback(finish)
+        return job
+
+    def __count_pending(self) -> int:
+        self.batch_futures = {future for future in self.batch_futures if not future.done()}
+        pending = sum(1 for job in self.jobs.values() if not job.future.done())
+        return pending + len(self.batch_futures)
+
+    def submit(self, function, *args, on_result=None) -> Job:
+        """
+        Submits a job to the executor.
+
+        Parameters:
+            function (callable): The function run by the job. It must be picklable
+                when the executor is a ProcessPoolExecutor.
+            *args: The arguments of the function.
+            on_result (callable): A function called with the result when the job succeeds.
+
+        Returns:
+            Job: The submitted job.
+
+        Raises:
+            QueueFullError: If max_pending jobs are already queued or running.
+        """
+        with self.lock:
+            self.__purge_expired()
+            if self.__count_pending() >= self.max_pending:
+                raise QueueFullError("Too many pending jobs")
+            return self.__add(self.executor.submit(function, *args), on_result)
+
+    def submit_batch(self, function, args_list : list) -> list:
+        """
+        Submits several jobs at once, for a caller that waits for their results.
+
+        The jobs count towards max_pending while they are queued or running, but they
+        are not kept once finished, as their results are only returned to the caller.
+
+        Parameters:
+            function (callable): The function run by the jobs. It must be picklable
+                when the executor is a ProcessPoolExecutor.
+            args_list (list): The arguments of each job.
+
+        Returns:
+            list: The futures of the jobs, in the same order as their arguments.
+
+        Raises:
+            QueueFullError: If the jobs do not fit in max_pending with the ones already
+                queued or running. No job is submitted then.
+        """
+        with self.lock:
+            self.__purge_expired()
+            if self.__count_pending() + len(args_list) > self.max_pending:
+                raise QueueFullError("Too many pending jobs")
+            futures = [self.executor.submit(function, *args) for args in args_list]
+            self.batch_futures.update(futures)
+            return futures
+
+    def complete(self, result) -> Job:
+        """
+        Registers a job whose result is already known, for example from a cache.
+
+        Parameters:
+            result: The result of the job.
+
+        Returns:
+            Job: The finished job.
+        """
+        future = Future()
+        future.set_result(result)
+        with self.lock:
+            self.__purge_expired()
+            return self.__add(future, None)
+
+    def get(self, job_id : str):
+        """
+        Retrieves a job by its id.
+
+        Parameters:
+            job_id (str): The id of the job.
+
+        Returns:
+            Job: The job, or None if it does not exist or has expired.
+        """
+        with self.lock:
+            self.__purge_expired()
+            return self.jobs.get(job_id)
+
+    def stats(self) -> dict:
+        """
+        Returns the number of jobs in each status.
+
+        Returns:
+            dict: The number of queued, running, done and failed jobs. The jobs of
+            batches are only counted while they are queued or running.
+        """
+        with self.lock:
+            self.__purge_expired()
+            self.__count_pending()
+            jobs = list(self.jobs.values())
+            batch_futures = list(self.batch_futures)
+        counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+        for job in jobs:
+            counts[job.get_status()] += 1
+        for future in batch_futures:
+            counts["running" if future.running() else "queued"] += 1
+        return counts
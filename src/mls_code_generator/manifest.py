@@ -0,0 +1,142 @@
+""" Manifest: The hashes of the files of a generated package, used to send only the files that changed. """
+
+import hashlib
+import io
+import threading
+import zipfile
+from collections import OrderedDict
+from .utils import canonical_hash
+
+def build_manifest(files : dict) -> dict:
+    """
+    Computes the hash of each file of a package.
+
+    Args:
+        files (dict): The package files, as returned by CodePacker.get_package_files.
+
+    Returns:
+        dict: The hexadecimal SHA-256 of each file, by file name.
+    """
+    return {
+        name: hashlib.sha256(content.encode("utf-8")).hexdigest()
+        for name, content in files.items()
+    }
+
+def read_package_files(data : bytes, root : str = "src/") -> dict:
+    """
+    Reads the package files of an archive, without the MLS library.
+
+    Args:
+        data (bytes): The ZIP archive, as built by CodePacker.pack_archive.
+        root (str): The folder of the archive where the package is placed.
+
+    Returns:
+        dict: The contents of the modules and of the params file, by file name.
+    """
+    library = root + "mls_lib/"
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        return {
+            name[len(root):]: archive.read(name).decode("utf-8")
+            for name in archive.namelist()
+            if name.startswith(root) and not name.startswith(library)
+        }
+
+def get_result_hash(manifest : dict, library_hash : str) -> str:
+    """
+    Computes the hash of a generation result from its manifest and its MLS library.
+
+    Args:
+        manifest (dict): The hash of each file of the package.
+        library_hash (str): The content hash of the MLS library.
+
+    Returns:
+        str: The hash of the result.
+    """
+    return canonical_hash(manifest, library_hash)
+
+def diff_manifests(base : dict, manifest : dict) -> tuple:
+    """
+    Compares the manifest of a result with the one of a previous result.
+
+    Args:
+        base (dict): The manifest of the previous result.
+        manifest (dict): The manifest of the new result.
+
+    Returns:
+        tuple: The sorted names of the files that are new or changed, and the sorted
+        names of the files that were removed.
+    """
+    changed = sorted(name for name, file_hash in manifest.items() if base.get(name) != file_hash)
+    removed = sorted(name for name in base if name not in manifest)
+    return changed, removed
+
+class ManifestStore:
+    """ ManifestStore: The manifests of recent results by result hash, with LRU eviction. """
+    def __init__(self, max_size : int = 1024) -> None:
+        """
+        Initializes an empty store.
+
+        Args:
+            max_size (int): The maximum number of manifests kept in the store.
+                The least recently used ones are evicted first.
+        """
+        self.max_size = max_size
+        self.manifests = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, result_hash : str):
+        """
+        Retrieves the manifest of a result.
+
+        Args:
+            result_hash (str): The hash of the result.
+
+        Returns:
+            tuple: The manifest and the library hash of the result, or None if the
+            result is not in the store.
+        """
+        with self.lock:
+            entry = self.manifests.get(result_hash)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.manifests.move_to_end(result_hash)
+            self.hits += 1
+            return entry
+
+    def put(self, result_hash : str, manifest : dict, library_hash : str) -> None:
+        """
+        Stores the manifest of a result.
+
+        Args:
+            result_hash (str): The hash of the result.
+            manifest (dict): The hash of each file of the result.
+            library_hash (str): The content hash of the MLS library of the result.
+
+        Returns:
+            None
+        """
+        with self.lock:
+            self.manifests[result_hash] = (manifest, library_hash)
+            self.manifests.move_to_end(result_hash)
+            while len(self.manifests) > self.max_size:
+                self.manifests.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        """
+        Returns the counters of the store.
+
+        Returns:
+            dict: The number of entries, hits, misses and evictions of the store.
+        """
+        with self.lock:
+            return {
+                "entries": len(self.manifests),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
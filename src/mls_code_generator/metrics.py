@@ -0,0 +1,230 @@
+""" Metrics: Counters and histograms exposed in the Prometheus text format. """
+
+import contextlib
+import math
+import threading
+import time
+
+TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SIZE_BUCKETS = tuple(1024 * 4 ** i for i in range(10))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(name + '="' + _escape(value) + '"' for name, value in labels) + "}"
+
+
+def _format_value(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class PhaseTimer:
+    """ PhaseTimer: Measures how long each phase of a process takes. """
+    def __init__(self) -> None:
+        self.timings = {}
+
+    @contextlib.contextmanager
+    def phase(self, name : str):
+        """
+        Measures the time spent inside the with block and adds it to the given phase.
+
+        Parameters:
+            name (str): The name of the phase.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name : str, seconds : float) -> None:
+        """
+        Adds time to a phase.
+
+        Parameters:
+            name (str): The name of the phase.
+            seconds (float): The time spent in the phase.
+
+        Returns:
+            None
+        """
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+
+class Metric:
+    """ Metric: Base class of the metrics, holding one series per set of label values. """
+    type_name = "untyped"
+
+    def __init__(self, name : str, documentation : str, labelnames : tuple = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def _key(self, labels : dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError("Wrong labels for metric " + self.name + ": " + str(sorted(labels)))
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> list:
+        """
+        Renders the metric in the Prometheus text format.
+
+        Returns:
+            list: The lines of the metric.
+        """
+        lines = [
+            "# HELP " + self.name + " " + self.documentation,
+            "# TYPE " + self.name + " " + self.type_name,
+        ]
+        with self.lock:
+            series = sorted(self.series.items())
+        for key, value in series:
+            lines.extend(self._render_series(list(zip(self.labelnames, key)), value))
+        return lines
+
+    def _render_series(self, labels : list, value) -> list:
+        return [self.name + _format_labels(labels) + " " + _format_value(value)]
+
+
+class Counter(Metric):
+    """ Counter: A value that only goes up. """
+    type_name = "counter"
+
+    def inc(self, amount : float = 1, **labels) -> None:
+        """
+        Increments the counter.
+
+        Parameters:
+            amount (float): The amount to add.
+            **labels: The values of the labels of the series.
+
+        Returns:
+            None
+        """
+        key = self._key(labels)
+        with self.lock:
+            self.series[key] = self.series.get(key, 0) + amount
+
+
+class Histogram(Metric):
+    """ Histogram: Counts observations in cumulative buckets. """
+    type_name = "histogram"
+
+    def __init__(self, name : str, documentation : str, labelnames : tuple = (),
+                 buckets : tuple = TIME_BUCKETS) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value : float, **labels) -> None:
+        """
+        Records an observation.
+
+        Parameters:
+            value (float): The observed value.
+            **labels: The values of the labels of the series.
+
+        Returns:
+            None
+        """
+        key = self._key(labels)
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def _render_series(self, labels : list, value) -> list:
+        bucket_counts, total, count = value
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, bucket_counts):
+            cumulative += bucket_count
+            lines.append(
+                self.name + "_bucket" + _format_labels(labels + [("le", _format_value(bound))])
+                + " " + str(cumulative)
+            )
+        lines.append(self.name + "_sum" + _format_labels(labels) + " " + _format_value(total))
+        lines.append(self.name + "_count" + _format_labels(labels) + " " + str(count))
+        return lines
+
+
+class MetricsRegistry:
+    """ MetricsRegistry: The metrics of a process, rendered together. """
+    def __init__(self) -> None:
+        self.metrics = []
+        self.collectors = []
+
+    def counter(self, name : str, documentation : str, labelnames : tuple = ()) -> Counter:
+        """
+        Creates a counter and registers it.
+
+        Returns:
+            Counter: The new counter.
+        """
+        metric = Counter(name, documentation, labelnames)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name : str, documentation : str, labelnames : tuple = (),
+                  buckets : tuple = TIME_BUCKETS) -> Histogram:
+        """
+        Creates a histogram and registers it.
+
+        Returns:
+            Histogram: The new histogram.
+        """
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, name : str, documentation : str, type_name : str,
+                      labelnames : tuple, collect) -> None:
+        """
+        Registers a metric whose values are read when the metrics are rendered.
+
+        Parameters:
+            name (str): The name of the metric.
+            documentation (str): The description of the metric.
+            type_name (str): The Prometheus type of the metric, "counter" or "gauge".
+            labelnames (tuple): The names of the labels of the metric.
+            collect (callable): A function without arguments that returns a list of
+                tuples with the label values and the value of each series.
+
+        Returns:
+            None
+        """
+        self.collectors.append((name, documentation, type_name, tuple(labelnames), collect))
+
+    def render(self) -> str:
+        """
+        Renders all the metrics in the Prometheus text format.
+
+        Returns:
+            str: The metrics.
+        """
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for name, documentation, type_name, labelnames, collect in self.collectors:
+            lines.append("# HELP " + name + " " + documentation)
+            lines.append("# TYPE " + name + " " + type_name)
+            for label_values, value in collect():
+                labels = list(zip(labelnames, label_values))
+                lines.append(name + _format_labels(labels) + " " + _format_value(value))
+        return "\n".join(lines) + "\n"
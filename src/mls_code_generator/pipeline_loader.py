@@ -1,9 +1,9 @@
 """ PipelineLoader: Component that loads a pipeline. """
 
-from os import link
 from .types.node import Node
 from .types.step import Step
 from .types.pipeline import Pipeline
+from .validation import validate_pipeline
 class PipelineLoader:
     """ PipelineLoader: Component that loads a pipeline. """
     def __init__(self, content, node_config) -> None:
@@ -17,14 +17,21 @@ class PipelineLoader:
         It creates all the steps and nodes from the content, adds connections between them,
         and sets the data for each step from the parent node.
         It also injects output routes and sets the parent for each node.
+        The graph is validated first, so pipelines that can not be generated are
+        rejected before anything is built.
 
         Parameters:
             parent (Pipeline): The parent pipeline to load the new pipeline into.
 
         Returns:
             None
+
+        Raises:
+            PipelineValidationError: If the graph has unknown nodes or stages, cycles,
+                or nodes that can never be scheduled.
         """
-        
+        validate_pipeline(self.content)
+
         all_steps = {}
         all_nodes = {}
         available_nodes = self.node_config
@@ -103,5 +110,120 @@ class PipelineLoader:
         for step in all_steps.values():
             for node in step.nodes:
                 node.set_parent(step)
+
+        ## Release the raw editor data, which the steps no longer need
+        for node in all_nodes.values():
+            node.data = None
+        parent.add_steps(all_steps)
+        parent.add_nodes(all_nodes)
+
+class EditorPipelineLoader:
+    """ EditorPipelineLoader: Component that loads a pipeline straight from the editor payload. """
+    def __init__(self, content, node_config) -> None:
+        self.content = content
+        self.node_config = node_config
+    def load_pipeline(self, parent : Pipeline):
+        """
+        Loads a pipeline from the editor payload and node configuration.
+
+        This function builds the same pipeline as a PipelineLoader fed with the output of
+        fix_editor, without building that intermediate copy of the payload. Each module is
+        read once: its nodes are created, their params, names and parents are set as they
+        are read, and then its connections are added. Only the stages of the root step
+        are visited again, to add the linked steps and the connections between steps.
+
+        Parameters:
+            parent (Pipeline): The parent pipeline to load the new pipeline into.
+
+        Returns:
+            None
+
+        Raises:
+            PipelineValidationError: If the graph has unknown nodes or stages, cycles,
+                or nodes that can never be scheduled.
+        """
+        modules = self.content['modules']
+        validate_pipeline(modules)
+        available_nodes = self.node_config.get_all_nodes()
+
+        all_steps = {}
+        all_nodes = {}
+        input_nodes = {}
+
+        ## Creating the steps with their nodes and connections
+        for step_id, module in modules.items():
+            current_step = Step(step_id)
+            all_steps[step_id] = current_step
+            step_inputs = input_nodes[step_id] = []
+            for node in module['nodes']:
+                node_name = node['nodeName']
+                if node_name not in available_nodes:
+                    class_node = Node()
+                else:
+                    class_node = available_nodes[node_name].get_copy()
+
+                params = node['data']['params']
+                if step_id == 'root':
+                    # The steps read their name from the data of their node
+                    class_node.set_data({'nodeName': node_name, 'id': node['id'], 'params': params})
+                else:
+                    class_node.set_values(node['id'], node_name, params)
+
+                ## Inject Output routes and inputs
+                if class_node.node_name == 'Output':
+                    class_node.params = {
+                        "key" : class_node.params["key"]
+                    }
+                if class_node.node_name == 'Input':
+                    step_inputs.append(class_node)
+                else:
+                    class_node.variable_name = class_node.node_name.replace(" ", "_").lower()
+
+                class_node.set_parent_step(current_step)
+                class_node.set_parent(current_step)
+                current_step.add_node(class_node)
+                all_nodes[class_node.id] = class_node
+
+            for connection in module['connections']:
+                current_step.add_connection(
+                    connection['source'],
+                    connection['target'],
+                    connection['sourceOutput'],
+                    connection['targetInput']
+                )
+
+        ## Add linked steps, which become the parent of the nodes they share
+        for linked_steps in modules['root']['nodes']:
+            if linked_steps['id'] in all_steps:
+                continue
+            current_step = Step(linked_steps['id'])
+            link = linked_steps['data']['params']['link']['value']
+            for node in all_steps[link].nodes:
+                current_step.add_node(node)
+                node.set_parent(current_step)
+            all_steps[linked_steps['id']] = current_step
+            input_nodes[linked_steps['id']] = input_nodes[link]
+
+        ## Adding data to the steps from the parent node, and then their inputs
+        for step in all_steps.values():
+            if step.id not in all_nodes:
+                continue
+            step.set_data(all_nodes[step.id].data)
+        for step_id, step in all_steps.items():
+            for node in input_nodes[step_id]:
+                node.variable_name = step.r_name
+
+        ## Add connections between steps
+        for connection in modules['root']['connections']:
+            target_step = all_steps[connection['target']]
+            target_step.add_main_connection(
+                all_steps[connection['source']],
+                connection['sourceOutput'],
+                connection['targetInput']
+            )
+
+        ## Release the raw editor data, which the steps no longer need
+        for node in all_nodes.values():
+            node.data = None
         parent.add_steps(all_steps)
         parent.add_nodes(all_nodes)
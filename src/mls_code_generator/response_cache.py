@@ -0,0 +1,92 @@
+""" ResponseCache: Serialized responses built from files, cached until the files change. """
+
+import gzip
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+class CachedResponse:
+    """ CachedResponse: A serialized response body with its gzip version and ETag. """
+    def __init__(self, body : bytes) -> None:
+        """
+        Compresses the body and computes its ETag.
+
+        Parameters:
+            body (bytes): The serialized response body.
+        """
+        self.body = body
+        self.gzip_body = gzip.compress(body, mtime=0)
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+
+class FileResponseCache:
+    """ FileResponseCache: Responses cached until the modification time of their files changes. """
+    def __init__(self, max_entries : int = 64) -> None:
+        """
+        Initializes an empty cache.
+
+        Parameters:
+            max_entries (int): The maximum number of responses kept in the cache.
+                The least recently used ones are evicted first.
+        """
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key : str, paths : list, render) -> CachedResponse:
+        """
+        Returns the cached response for the given key, rendering it again if any of
+        its files changed since it was cached.
+
+        Parameters:
+            key (str): The name of the response.
+            paths (list): The files the response is built from.
+            render (callable): A function without arguments that returns the response body.
+
+        Returns:
+            CachedResponse: The response.
+
+        Raises:
+            FileNotFoundError: If any of the files does not exist.
+        """
+        signature = []
+        for path in paths:
+            stat = os.stat(path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        signature = tuple(signature)
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        response = CachedResponse(render())
+        with self.lock:
+            self.entries[key] = (signature, response)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        return response
+
+    def stats(self) -> dict:
+        """
+        Returns the counters of the cache.
+
+        Returns:
+            dict: The number of entries, hits, misses and evictions of the cache.
+        """
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
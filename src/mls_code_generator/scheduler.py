@@ -0,0 +1,81 @@
+""" Scheduler: Orders the nodes of a graph so that they come after their dependencies. """
+
+from heapq import heapify, heappop, heappush
+
+def schedule_nodes(nodes : list, is_passthrough=None):
+    """
+    Yields the nodes of a graph in dependency order, in O((V + E) log V).
+
+    The graph is given by the dependencies and sources of the nodes. Each node keeps a
+    count of its unresolved dependencies, which is decremented once for every source
+    that is scheduled, and the nodes whose count reaches zero wait in a ready queue
+    ordered by their position in the list.
+
+    The order is the one of the original scan-based scheduler: each pass goes over the
+    list from the start and emits the first ready node. Passthrough nodes (Input and
+    Output nodes in a stage) are resolved when the pass reaches them without ending it,
+    and the node right after a resolved passthrough node is not visited in that pass.
+
+    Parameters:
+        nodes (list): The nodes to schedule.
+        is_passthrough (callable): A function that tells whether a node is a
+            passthrough node. Passthrough nodes are resolved but not yielded.
+
+    Yields:
+        Node: The nodes that are not passthrough nodes, in dependency order.
+
+    Raises:
+        ValueError: If some nodes can never be scheduled, because of a cycle or a
+            dependency on a node that is not in the list.
+    """
+    count = len(nodes)
+    positions = {node: i for i, node in enumerate(nodes)}
+    pending = [len(node.dependencies) for node in nodes]
+    next_alive = list(range(1, count + 1))
+    previous_alive = list(range(-1, count - 1))
+    ready = [i for i in range(count) if pending[i] == 0]
+    heapify(ready)
+    remaining = count
+
+    def resolve(position):
+        # Unlink the node from the list and release the nodes that depend on it
+        following, preceding = next_alive[position], previous_alive[position]
+        if following < count:
+            previous_alive[following] = preceding
+        if preceding >= 0:
+            next_alive[preceding] = following
+        for targets in nodes[position].sources.values():
+            for target, _ in targets:
+                target_position = positions.get(target)
+                if target_position is None:
+                    continue
+                pending[target_position] -= 1
+                if pending[target_position] == 0:
+                    heappush(ready, target_position)
+        return following
+
+    while remaining > 0:
+        cursor = -1
+        deferred = []
+        progressed = False
+        while ready:
+            position = heappop(ready)
+            if position <= cursor:
+                deferred.append(position)
+                continue
+            node = nodes[position]
+            following = resolve(position)
+            remaining -= 1
+            progressed = True
+            if is_passthrough is not None and is_passthrough(node):
+                if following >= count:
+                    break
+                cursor = following
+                continue
+            yield node
+            break
+        for position in deferred:
+            heappush(ready, position)
+        if not progressed:
+            blocked = [str(nodes[i]) for i in range(count) if pending[i] > 0]
+            raise ValueError("Nodes can not be scheduled: " + ", ".join(blocked))
@@ -0,0 +1,11 @@
+import pytest
+
+
+@pytest.fixture
+def mls_path(tmp_path) -> str:
+    library = tmp_path / "mls_lib"
+    (library / "orchestration").mkdir(parents=True)
+    (library / "__init__.py").write_text("")
+    (library / "orchestration" / "__init__.py").write_text("from .stage import Stage\n")
+    (library / "orchestration" / "stage.py").write_text("class Stage:\n    pass\n" * 50)
+    return str(library) + "/"
@@ -0,0 +1,100 @@
+import pytest
+import io
+import os
+import zipfile
+from ..archive import ArchiveEntry, ArchiveWriter, LibraryArchive
+
+
+def test_archive_entry():
+    entry = ArchiveEntry("módulo.py", "print('hello')\n")
+    assert entry.name == "módulo.py"
+    assert entry.size == len("print('hello')\n")
+    assert len(entry.date_time) == 6
+
+
+def test_archive_writer():
+    shared = ArchiveEntry("shared.txt", b"shared content " * 100)
+    writer = ArchiveWriter()
+    writer.add_file("main.py", "def main():\n    pass\n")
+    writer.add_file("módulo.py", "")
+    writer.add_entry(shared, "first/")
+    writer.add_entry(shared, "second/")
+
+    with zipfile.ZipFile(io.BytesIO(writer.getvalue())) as archive:
+        assert archive.testzip() is None
+        assert archive.namelist() == ["main.py", "módulo.py", "first/shared.txt", "second/shared.txt"]
+        assert archive.read("main.py") == b"def main():\n    pass\n"
+        assert archive.read("módulo.py") == b""
+        assert archive.read("second/shared.txt") == b"shared content " * 100
+
+
+def test_empty_archive():
+    with zipfile.ZipFile(io.BytesIO(ArchiveWriter().getvalue())) as archive:
+        assert archive.namelist() == []
+
+
+def test_library_archive(mls_path):
+    library = LibraryArchive(mls_path)
+    assert [entry.name for entry in library.get_entries()] == [
+        "__init__.py",
+        "orchestration/__init__.py",
+        "orchestration/stage.py",
+    ]
+    assert len(library.get_hash()) == 64
+
+
+def test_library_archive_reuses_entries(mls_path):
+    library = LibraryArchive(mls_path, check_interval=0)
+    entries = library.get_entries()
+    content_hash = library.get_hash()
+
+    # Touching a file without changing its content keeps the compressed entries
+    path = os.path.join(mls_path, "__init__.py")
+    os.utime(path, ns=(0, 0))
+    assert library.get_entries() is entries
+    assert library.get_hash() == content_hash
+
+
+def test_library_archive_refreshes_on_change(mls_path):
+    library = LibraryArchive(mls_path, check_interval=0)
+    content_hash = library.get_hash()
+
+    with open(os.path.join(mls_path, "__init__.py"), "w", encoding="utf-8") as file:
+        file.write("VERSION = 2\n")
+    os.utime(os.path.join(mls_path, "__init__.py"), ns=(0, 0))
+
+    assert library.get_hash() != content_hash
+    writer = ArchiveWriter()
+    for entry in library.get_entries():
+        writer.add_entry(entry, "mls_lib/")
+    with zipfile.ZipFile(io.BytesIO(writer.getvalue())) as archive:
+        assert archive.read("mls_lib/__init__.py") == b"VERSION = 2\n"
+
+
+def test_library_archive_pin(mls_path):
+    library = LibraryArchive(mls_path, check_interval=0)
+    pinned = library.pin()
+    content_hash, entries = pinned.get_snapshot()
+
+    with open(os.path.join(mls_path, "__init__.py"), "w", encoding="utf-8") as file:
+        file.write("VERSION = 2\n")
+    os.utime(os.path.join(mls_path, "__init__.py"), ns=(0, 0))
+
+    assert library.get_hash() != content_hash
+    assert pinned.get_hash() == content_hash
+    assert pinned.get_entries() is entries
+
+
+def test_library_archive_interval(mls_path):
+    library = LibraryArchive(mls_path, check_interval=3600)
+    content_hash = library.get_hash()
+    with open(os.path.join(mls_path, "__init__.py"), "w", encoding="utf-8") as file:
+        file.write("VERSION = 2\n")
+    assert library.get_hash() == content_hash
+    library.refresh()
+    assert library.get_hash() != content_hash
+
+
+def test_missing_library(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        LibraryArchive(str(tmp_path / "missing")).get_entries()
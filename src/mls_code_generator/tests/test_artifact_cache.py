@@ -0,0 +1,136 @@
+import pytest
+import os
+from concurrent.futures import ThreadPoolExecutor
+from ..artifact_cache import DiskArtifactCache, MemoryArtifactCache
+
+
+@pytest.fixture
+def memory_cache() -> MemoryArtifactCache:
+    return MemoryArtifactCache(max_bytes=10)
+
+
+def test_memory_cache_get_put(memory_cache: MemoryArtifactCache):
+    assert memory_cache.get("a") is None
+    memory_cache.put("a", b"1234")
+    assert memory_cache.get("a") == b"1234"
+    assert memory_cache.stats() == {
+        "entries": 1,
+        "bytes": 4,
+        "max_bytes": 10,
+        "hits": 1,
+        "misses": 1,
+        "evictions": 0,
+    }
+
+
+def test_memory_cache_lru_eviction(memory_cache: MemoryArtifactCache):
+    memory_cache.put("a", b"1234")
+    memory_cache.put("b", b"1234")
+    memory_cache.get("a")
+    memory_cache.put("c", b"1234")
+
+    assert memory_cache.get("b") is None
+    assert memory_cache.get("a") == b"1234"
+    assert memory_cache.get("c") == b"1234"
+    assert memory_cache.stats()["bytes"] == 8
+    assert memory_cache.stats()["evictions"] == 1
+
+
+def test_memory_cache_replace(memory_cache: MemoryArtifactCache):
+    memory_cache.put("a", b"1234")
+    memory_cache.put("a", b"123456")
+    assert memory_cache.get("a") == b"123456"
+    assert memory_cache.stats()["bytes"] == 6
+
+
+def test_memory_cache_too_large(memory_cache: MemoryArtifactCache):
+    memory_cache.put("a", b"12345678901")
+    assert memory_cache.get("a") is None
+    assert MemoryArtifactCache(max_bytes=0).stats()["entries"] == 0
+
+
+@pytest.fixture
+def disk_cache(tmp_path) -> DiskArtifactCache:
+    return DiskArtifactCache(str(tmp_path / "cache"), max_bytes=10)
+
+
+def test_disk_cache_get_put(disk_cache: DiskArtifactCache):
+    assert disk_cache.get("aabb") is None
+    disk_cache.put("aabb", b"1234")
+    assert disk_cache.get("aabb") == b"1234"
+    assert os.path.exists(os.path.join(disk_cache.directory, "aa", "aabb.zip"))
+    assert disk_cache.stats() == {
+        "entries": 1,
+        "bytes": 4,
+        "max_bytes": 10,
+        "hits": 1,
+        "misses": 1,
+        "evictions": 0,
+    }
+
+
+def test_disk_cache_shared_directory(disk_cache: DiskArtifactCache):
+    other_replica = DiskArtifactCache(disk_cache.directory, max_bytes=10)
+    disk_cache.put("aabb", b"1234")
+    assert other_replica.get("aabb") == b"1234"
+
+
+def test_disk_cache_lru_eviction(disk_cache: DiskArtifactCache):
+    disk_cache.put("aa01", b"1234")
+    os.utime(os.path.join(disk_cache.directory, "aa", "aa01.zip"), (1, 1))
+    disk_cache.put("bb01", b"1234")
+    os.utime(os.path.join(disk_cache.directory, "bb", "bb01.zip"), (2, 2))
+    disk_cache.get("aa01")
+    disk_cache.put("cc01", b"1234")
+
+    assert disk_cache.get("bb01") is None
+    assert disk_cache.get("aa01") == b"1234"
+    assert disk_cache.get("cc01") == b"1234"
+    assert disk_cache.stats()["evictions"] == 1
+
+
+def test_disk_cache_removes_abandoned_temp_files(disk_cache: DiskArtifactCache):
+    folder = os.path.join(disk_cache.directory, "aa")
+    os.makedirs(folder)
+    temp_path = os.path.join(folder, ".abandoned.tmp")
+    with open(temp_path, "wb") as file:
+        file.write(b"partial")
+    os.utime(temp_path, (1, 1))
+    disk_cache.put("aabb", b"1234")
+    disk_cache.stats()
+    assert os.path.exists(temp_path)
+    disk_cache.evict()
+    assert not os.path.exists(temp_path)
+
+
+def test_disk_cache_counts_size_without_scanning(disk_cache: DiskArtifactCache):
+    other_replica = DiskArtifactCache(disk_cache.directory, max_bytes=10)
+    other_replica.put("aabb", b"1234")
+    disk_cache.put("ccdd", b"12")
+    disk_cache.put("ccdd", b"123")
+    assert disk_cache.stats()["entries"] == 1
+    assert disk_cache.stats()["bytes"] == 3
+
+    # The eviction reads the directory, with the archives of the other replica
+    disk_cache.evict()
+    assert disk_cache.stats()["entries"] == 2
+    assert disk_cache.stats()["bytes"] == 7
+
+
+def test_disk_cache_evicts_after_scan_interval(disk_cache: DiskArtifactCache):
+    other_replica = DiskArtifactCache(disk_cache.directory, max_bytes=10, scan_interval=0)
+    disk_cache.put("aabb", b"12345678")
+    os.utime(os.path.join(disk_cache.directory, "aa", "aabb.zip"), (1, 1))
+    # Within its own count, but the directory is read again as the interval has passed
+    other_replica.put("ccdd", b"1234")
+    assert other_replica.get("aabb") is None
+    assert other_replica.stats()["evictions"] == 1
+
+
+def test_disk_cache_concurrent_writers(disk_cache: DiskArtifactCache):
+    disk_cache.max_bytes = 1000
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda i: disk_cache.put("aabb", bytes([i % 256]) * 10), range(64)))
+    data = disk_cache.get("aabb")
+    assert len(data) == 10 and len(set(data)) == 1
+    assert disk_cache.stats()["entries"] == 1
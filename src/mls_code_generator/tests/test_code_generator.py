@@ -2,9 +2,14 @@ import pytest
 from ..code_generator import CodeGenerator
 from ..pipeline_loader import PipelineLoader
 from ..configuration_loader import ConfigLoader
+from ..fragment_cache import FragmentCache
+from ..generation_context import GenerationContext
 from ..types import Pipeline
+import copy
 import json
 import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from unittest.mock import Mock
 
 """
 content = request.json
@@ -58,4 +63,159 @@ def test_generate_code(ready_pipeline: Pipeline):
     
     with open("./tests/files/params.json", "r", encoding="utf-8") as file:
         excepted_params = json.load(file)
-        assert excepted_params == code_generator.params
\ No newline at end of file
+        assert excepted_params == code_generator.params
+
+def test_generate_code_timings(ready_pipeline: Pipeline):
+    code_generator = CodeGenerator()
+    assert code_generator.get_timings() == {}
+    code_generator.generate_code(ready_pipeline)
+    assert set(code_generator.get_timings()) == {"stages", "main", "params"}
+
+
+def names(pipeline: Pipeline) -> tuple:
+    return (
+        {node_id: node.variable_name for node_id, node in pipeline.nodes.items()},
+        {step_id: step.name for step_id, step in pipeline.steps.items()},
+    )
+
+def generate(pipeline: Pipeline, fragment_cache=None) -> tuple:
+    code_generator = CodeGenerator(fragment_cache)
+    code_generator.generate_code(pipeline)
+    return code_generator.get_modules(), code_generator.get_params()
+
+def test_generate_code_is_repeatable(ready_pipeline: Pipeline):
+    before = names(ready_pipeline)
+    first = generate(ready_pipeline)
+    assert generate(ready_pipeline) == first
+    assert names(ready_pipeline) == before
+
+    with open("./tests/files/modules.json", "r") as file:
+        assert first[0] == json.load(file)
+
+def test_generate_code_concurrently(ready_pipeline: Pipeline):
+    expected = generate(ready_pipeline)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda _: generate(ready_pipeline), range(16)))
+    assert all(result == expected for result in results)
+
+def test_generate_code_with_fragment_cache(ready_pipeline: Pipeline):
+    expected = generate(ready_pipeline)
+    fragment_cache = FragmentCache()
+    assert generate(ready_pipeline, fragment_cache) == expected
+    misses = fragment_cache.stats()["misses"]
+    assert generate(ready_pipeline, fragment_cache) == expected
+    stats = fragment_cache.stats()
+    assert stats["misses"] == misses
+    assert stats["hits"] > 0
+
+def test_generate_code_concurrently_with_fragment_cache(ready_pipeline: Pipeline):
+    expected = generate(ready_pipeline)
+    fragment_cache = FragmentCache(max_size=4)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(
+            lambda _: generate(ready_pipeline, fragment_cache), range(16)
+        ))
+    assert all(result == expected for result in results)
+
+def test_generate_code_in_parallel(ready_pipeline: Pipeline):
+    serial_context = GenerationContext()
+    CodeGenerator().generate_code(ready_pipeline, serial_context)
+    expected = generate(ready_pipeline)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        code_generator = CodeGenerator(executor=executor, parallel_threshold=1, parallel_jobs=3)
+        context = GenerationContext()
+        code_generator.generate_code(ready_pipeline, context)
+    assert (code_generator.modules, code_generator.params) == expected
+    assert list(code_generator.modules) == list(expected[0])
+    assert context.variable_names == serial_context.variable_names
+
+def test_generate_code_in_parallel_with_fragment_cache(ready_pipeline: Pipeline):
+    expected = generate(ready_pipeline)
+    fragment_cache = FragmentCache()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        for _ in range(2):
+            code_generator = CodeGenerator(
+                fragment_cache, executor, parallel_threshold=1, parallel_jobs=3
+            )
+            code_generator.generate_code(ready_pipeline)
+            assert (code_generator.modules, code_generator.params) == expected
+    assert fragment_cache.stats()["hits"] > 0
+
+def test_generate_code_in_process_pool():
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        with pytest.raises(ValueError):
+            CodeGenerator(executor=executor)
+
+def test_generate_code_below_parallel_threshold(ready_pipeline: Pipeline):
+    executor = Mock()
+    code_generator = CodeGenerator(executor=executor, parallel_threshold=100)
+    code_generator.generate_code(ready_pipeline)
+    executor.submit.assert_not_called()
+    assert (code_generator.modules, code_generator.params) == generate(ready_pipeline)
+
+@pytest.fixture
+def load_code():
+    with open("./tests/files/nodes.json", "r", encoding="utf-8") as file:
+        node_configuration = ConfigLoader(content=json.load(file)["nodes"])
+
+    def load(code: dict) -> Pipeline:
+        pipeline = Pipeline()
+        pipeline.load_pipeline(PipelineLoader(copy.deepcopy(code), node_configuration))
+        return pipeline
+    return load
+
+def generate_modules(pipeline: Pipeline, fragment_cache=None) -> dict:
+    code_generator = CodeGenerator(fragment_cache)
+    code_generator.generate_code(pipeline)
+    return code_generator.modules
+
+def test_generate_code_reuses_unchanged_stages(load_code):
+    with open("./tests/files/mls_editor_fixed.json", "r", encoding="utf-8") as file:
+        code = json.load(file)
+    fragment_cache = FragmentCache()
+    first = generate_modules(load_code(code), fragment_cache)
+
+    edited_step = None
+    for step_id, step in code.items():
+        for node in step["nodes"]:
+            for param in node["params"].values():
+                if step_id != "root" and param["type"] == "number":
+                    param["value"] = 0.5
+                    param["isParam"] = "custom"
+                    edited_step = step_id
+        if edited_step is not None:
+            break
+    edited = load_code(code)
+    second = generate_modules(edited, fragment_cache)
+
+    assert second == generate_modules(edited)
+    edited_name = edited.get_step(edited_step).name
+    assert second[edited_name] != first[edited_name]
+    for name, module in second.items():
+        if name != edited_name:
+            assert module is first[name]
+
+def test_generate_code_reuses_main_with_linked_stages(load_code):
+    with open("./tests/files/mls_editor_fixed.json", "r", encoding="utf-8") as file:
+        code = json.load(file)
+    first_stage = code["root"]["nodes"][3]
+    for k in range(2):
+        linked = copy.deepcopy(first_stage)
+        linked["id"] = "linked" + str(k)
+        linked["params"]["link"]["value"] = first_stage["id"]
+        # Linked stages carry an extra character at the end of their name
+        linked["params"]["Stage name"]["value"] += "X"
+        code["root"]["nodes"].append(linked)
+        for connection in list(code["root"]["connections"]):
+            if connection["source"] == first_stage["id"]:
+                connection = dict(connection, source=linked["id"])
+                code["root"]["connections"].append(connection)
+                break
+
+    expected = generate(load_code(code))
+    assert set(expected[1]) == {"model_train", "model_train_2", "model_train_3"}
+    fragment_cache = FragmentCache()
+    assert generate(load_code(code), fragment_cache) == expected
+    misses = fragment_cache.stats()["misses"]
+    assert generate(load_code(code), fragment_cache) == expected
+    assert fragment_cache.stats()["misses"] == misses
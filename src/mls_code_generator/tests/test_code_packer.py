@@ -0,0 +1,73 @@
+import pytest
+import io
+import zipfile
+import yaml
+from ..archive import LibraryArchive
+from ..code_packer import CodePacker
+
+
+@pytest.fixture
+def code() -> dict:
+    return {
+        "main": "def main():\n\tpass\n",
+        "data_collection": "def create_data_collection():\n\treturn None\n",
+    }
+
+
+@pytest.fixture
+def params() -> dict:
+    return {"data_collection": {"train_percentage": 0.3}}
+
+
+def test_get_package_files(code, params):
+    files = CodePacker().get_package_files(code, params)
+    assert files["main.py"] == "def main():\n    pass\n"
+    assert files["data_collection.py"] == "def create_data_collection():\n    return None\n"
+    assert yaml.safe_load(files["params.yaml"]) == params
+
+
+def test_generate_package(code, params, mls_path, tmp_path):
+    write_path = tmp_path / "out" / "src"
+    write_path.mkdir(parents=True)
+    CodePacker().generate_package(code, params, str(write_path) + "/", mls_path)
+
+    assert (write_path / "main.py").read_text() == "def main():\n    pass\n"
+    assert yaml.safe_load((write_path / "params.yaml").read_text()) == params
+    assert (write_path / "mls_lib" / "orchestration" / "stage.py").exists()
+
+
+def test_pack_archive(code, params, mls_path):
+    code_packer = CodePacker()
+    files = code_packer.get_package_files(code, params)
+    data = code_packer.pack_archive(files, LibraryArchive(mls_path))
+
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.testzip() is None
+        assert sorted(archive.namelist()) == [
+            "src/data_collection.py",
+            "src/main.py",
+            "src/mls_lib/__init__.py",
+            "src/mls_lib/orchestration/__init__.py",
+            "src/mls_lib/orchestration/stage.py",
+            "src/params.yaml",
+        ]
+        assert archive.read("src/main.py").decode("utf-8") == "def main():\n    pass\n"
+        assert yaml.safe_load(archive.read("src/params.yaml")) == params
+        assert archive.read("src/mls_lib/orchestration/stage.py") == b"class Stage:\n    pass\n" * 50
+
+
+def test_generate_batch_archive(code, params, mls_path):
+    data = CodePacker().generate_batch_archive(
+        {"first": (code, params), "second": ({"main": "pass\n"}, {})},
+        LibraryArchive(mls_path),
+    )
+
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.testzip() is None
+        names = archive.namelist()
+        assert "first/src/data_collection.py" in names
+        assert "first/src/mls_lib/orchestration/stage.py" in names
+        assert "second/src/main.py" in names
+        assert "second/src/mls_lib/orchestration/stage.py" in names
+        assert "second/src/data_collection.py" not in names
+        assert yaml.safe_load(archive.read("second/src/params.yaml")) == {}
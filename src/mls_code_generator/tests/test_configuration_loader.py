@@ -0,0 +1,45 @@
+import pytest
+import json
+from ..configuration_loader import ConfigLoader, ConfigRegistry
+from ..types import CustomNode
+
+
+@pytest.fixture
+def nodes() -> list:
+    with open("./tests/files/nodes.json", "r", encoding="utf-8") as file:
+        return json.load(file)["nodes"]
+
+
+def test_config_loader(nodes):
+    config = ConfigLoader(content=nodes)
+    assert len(config.get_all_nodes()) == len(nodes)
+    node = config.get_node(nodes[0]["node"])
+    assert isinstance(node, CustomNode)
+    assert node.node_name == nodes[0]["node"]
+    with pytest.raises(ValueError):
+        config.get_node("node_that_is_not_there")
+
+
+def test_config_registry_reuses_loaders(nodes):
+    registry = ConfigRegistry()
+    config_hash, loader = registry.load(nodes)
+    same_hash, same_loader = registry.load(json.loads(json.dumps(nodes)))
+
+    assert config_hash == same_hash
+    assert loader is same_loader
+    assert registry.get(config_hash) is loader
+    assert registry.get("unknown") is None
+    assert registry.stats() == {"entries": 1, "hits": 2, "misses": 2, "evictions": 0}
+
+
+def test_config_registry_eviction(nodes):
+    registry = ConfigRegistry(max_size=2)
+    first_hash, _ = registry.load(nodes[:1])
+    second_hash, _ = registry.load(nodes[:2])
+    registry.get(first_hash)
+    third_hash, _ = registry.load(nodes[:3])
+
+    assert registry.get(second_hash) is None
+    assert registry.get(first_hash) is not None
+    assert registry.get(third_hash) is not None
+    assert registry.stats()["evictions"] == 1
@@ -0,0 +1,27 @@
+from ..emitter import CodeEmitter
+
+
+def test_emitter_lines():
+    emitter = CodeEmitter()
+    emitter.line("a = 1")
+    emitter.lines(["b = 2", "c = 3"])
+    assert emitter.getvalue() == "a = 1\nb = 2\nc = 3\n"
+
+
+def test_emitter_indent():
+    emitter = CodeEmitter()
+    emitter.line("def f():")
+    with emitter.indent():
+        emitter.line("x = 1")
+        emitter.line()
+        emitter.blank()
+        with emitter.indent():
+            emitter.line("y = 2")
+        emitter.line("return x", end="")
+    assert emitter.getvalue() == "def f():\n\tx = 1\n\t\n\n\t\ty = 2\n\treturn x"
+
+
+def test_emitter_indents_every_line_of_a_text():
+    emitter = CodeEmitter(indent_text="    ", level=1)
+    emitter.line("# first\nsecond")
+    assert emitter.getvalue() == "    # first\n    second\n"
@@ -0,0 +1,70 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock
+from ..fragment_cache import FragmentCache
+from ..generation_context import _FragmentKey
+
+
+def test_fragment_cache_hit():
+    cache = FragmentCache()
+    build = Mock(return_value="code")
+
+    assert cache.get_or_build(("task", 1), build) == "code"
+    assert cache.get_or_build(("task", 1), build) == "code"
+
+    build.assert_called_once()
+    assert cache.stats() == {
+        "entries": 1, "max_size": 4096, "bytes": 4, "max_bytes": 64 * 1024 * 1024,
+        "hits": 1, "misses": 1, "evictions": 0, "hit_rate": 0.5,
+    }
+
+
+def test_fragment_cache_eviction():
+    cache = FragmentCache(max_size=2)
+    cache.get_or_build("a", lambda: "a")
+    cache.get_or_build("b", lambda: "b")
+    cache.get_or_build("a", lambda: "a")
+    cache.get_or_build("c", lambda: "c")
+
+    assert list(cache.entries) == ["a", "c"]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_fragment_cache_byte_bound():
+    cache = FragmentCache(max_bytes=10)
+    cache.get_or_build("a", lambda: "1234")
+    cache.get_or_build("b", lambda: ("1234", ((0, "x"),)))
+    cache.get_or_build("c", lambda: "1234")
+    cache.get_or_build("d", lambda: "12345678901")
+
+    assert list(cache.entries) == ["b", "c"]
+    assert cache.stats()["bytes"] == 9
+    assert cache.stats()["evictions"] == 1
+
+
+def test_fragment_cache_disabled():
+    cache = FragmentCache(max_size=0)
+    build = Mock(return_value="code")
+    cache.get_or_build("a", build)
+    cache.get_or_build("a", build)
+    assert build.call_count == 2
+    assert cache.stats()["entries"] == 0
+
+
+def test_fragment_cache_concurrently():
+    cache = FragmentCache(max_size=8)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(
+            lambda i: cache.get_or_build(i % 16, lambda: str(i % 16)), range(1000)
+        ))
+    assert results == [str(i % 16) for i in range(1000)]
+    stats = cache.stats()
+    assert stats["hits"] + stats["misses"] == 1000
+    assert stats["entries"] == 8
+
+
+def test_fragment_key_equality():
+    key = _FragmentKey(("schema", 1))
+    assert key == _FragmentKey(("schema", 1))
+    assert key != _FragmentKey(("schema", 2))
+    assert key != ("schema", 1)
+    assert key != None
@@ -0,0 +1,106 @@
+import pytest
+import io
+import json
+import zipfile
+from ..archive import LibraryArchive
+from ..configuration_loader import ConfigLoader
+from ..metrics import PhaseTimer
+from ..generation import (
+    UnknownNodesError,
+    generate_archive,
+    generate_files,
+    init_worker,
+    run_files_job,
+    run_generation_job,
+)
+
+
+@pytest.fixture
+def nodes() -> list:
+    with open("./tests/files/nodes.json", "r", encoding="utf-8") as file:
+        return json.load(file)["nodes"]
+
+
+@pytest.fixture
+def code() -> dict:
+    with open("./tests/files/mls_editor.json", "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def read_modules(data: bytes) -> dict:
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        return {
+            name[len("src/"):-len(".py")]: archive.read(name).decode("utf-8")
+            for name in archive.namelist()
+            if name.endswith(".py") and not name.startswith("src/mls_lib/")
+        }
+
+
+def expected_modules() -> dict:
+    with open("./tests/files/modules.json", "r", encoding="utf-8") as file:
+        return {
+            name: module.replace("\t", "    ")
+            for name, module in json.load(file).items()
+        }
+
+
+def test_generate_archive(code, nodes, mls_path):
+    data = generate_archive(code, ConfigLoader(content=nodes), LibraryArchive(mls_path))
+    assert read_modules(data) == expected_modules()
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert "src/mls_lib/__init__.py" in archive.namelist()
+        assert "src/params.yaml" in archive.namelist()
+
+
+def test_run_generation_job(code, nodes, mls_path):
+    init_worker(mls_path, nodes)
+    library_hash, data = run_generation_job(code, nodes)
+    assert read_modules(data) == expected_modules()
+    assert library_hash == LibraryArchive(mls_path).get_hash()
+
+
+def test_generate_files(code, nodes):
+    modules, params = generate_files(code, ConfigLoader(content=nodes))
+    with open("./tests/files/modules.json", "r", encoding="utf-8") as file:
+        assert modules == json.load(file)
+    with open("./tests/files/params.json", "r", encoding="utf-8") as file:
+        assert params == json.load(file)
+
+
+def test_run_files_job(code, nodes, mls_path):
+    init_worker(mls_path, nodes)
+    modules, _ = run_files_job(code, nodes)
+    with open("./tests/files/modules.json", "r", encoding="utf-8") as file:
+        assert modules == json.load(file)
+
+
+def test_run_files_job_with_fragment_cache(code, nodes, mls_path):
+    init_worker(mls_path, nodes, fragment_cache_size=4096)
+    first, _ = run_files_job(code, nodes)
+    second, _ = run_files_job(code, nodes)
+    assert first == second
+    with open("./tests/files/modules.json", "r", encoding="utf-8") as file:
+        assert second == json.load(file)
+
+
+def test_run_files_job_by_nodes_hash(code, nodes, mls_path):
+    init_worker(mls_path)
+    with pytest.raises(UnknownNodesError):
+        run_files_job(code, None, "nodes")
+    run_files_job(code, nodes, "nodes")
+    modules, _ = run_files_job(code, None, "nodes")
+    with open("./tests/files/modules.json", "r", encoding="utf-8") as file:
+        assert modules == json.load(file)
+
+
+def test_generation_timings(code, nodes, mls_path):
+    timer = PhaseTimer()
+    generate_archive(code, ConfigLoader(content=nodes), LibraryArchive(mls_path), timer)
+    assert set(timer.timings) == {
+        "load_pipeline",
+        "generate_code_stages",
+        "generate_code_main",
+        "generate_code_params",
+        "package",
+        "archive",
+    }
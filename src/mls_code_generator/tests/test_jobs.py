@@ -0,0 +1,94 @@
+import pytest
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from ..jobs import JobManager, QueueFullError
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        yield pool
+
+
+def wait_for(job, timeout=5):
+    job.future.exception(timeout=timeout)
+    deadline = time.monotonic() + timeout
+    while job.finished is None and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+def test_submit_job(executor):
+    manager = JobManager(executor)
+    results = []
+    job = manager.submit(lambda a, b: a + b, 1, 2, on_result=results.append)
+    wait_for(job)
+
+    assert manager.get(job.id) is job
+    assert job.get_status() == "done"
+    assert job.get_error() is None
+    assert job.future.result() == 3
+    assert results == [3]
+
+
+def test_failed_job(executor):
+    manager = JobManager(executor)
+
+    def fail():
+        raise ValueError("bad pipeline")
+
+    job = manager.submit(fail)
+    wait_for(job)
+    assert job.get_status() == "failed"
+    assert job.get_error() == "ValueError: bad pipeline"
+
+
+def test_bounded_queue(executor):
+    manager = JobManager(executor, max_pending=2)
+    release = threading.Event()
+    running = manager.submit(release.wait)
+    queued = manager.submit(release.wait)
+
+    with pytest.raises(QueueFullError):
+        manager.submit(release.wait)
+    assert queued.get_status() == "queued"
+    assert manager.stats()["queued"] + manager.stats()["running"] == 2
+
+    release.set()
+    wait_for(running)
+    wait_for(queued)
+    manager.submit(lambda: None)
+
+
+def test_submit_batch(executor):
+    manager = JobManager(executor, max_pending=3)
+    release = threading.Event()
+    job = manager.submit(release.wait)
+
+    with pytest.raises(QueueFullError):
+        manager.submit_batch(lambda a: a, [(1,), (2,), (3,)])
+    futures = manager.submit_batch(lambda a: a, [(1,), (2,)])
+    with pytest.raises(QueueFullError):
+        manager.submit(release.wait)
+    assert manager.stats()["queued"] + manager.stats()["running"] == 3
+
+    release.set()
+    assert [future.result(timeout=5) for future in futures] == [1, 2]
+    wait_for(job)
+    assert manager.submit_batch(lambda a: a, [(1,), (2,), (3,)])[2].result(timeout=5) == 3
+    assert manager.stats()["done"] == 1
+
+
+def test_complete_job(executor):
+    manager = JobManager(executor)
+    job = manager.complete(b"archive")
+    assert job.get_status() == "done"
+    assert manager.get(job.id).future.result() == b"archive"
+
+
+def test_job_expiry(executor):
+    manager = JobManager(executor, ttl=0)
+    job = manager.complete(b"archive")
+    time.sleep(0.01)
+    assert manager.get(job.id) is None
+    assert manager.get("unknown") is None
@@ -0,0 +1,82 @@
+import pytest
+import hashlib
+import json
+from ..archive import LibraryArchive
+from ..configuration_loader import ConfigLoader
+from ..generation import generate_archive, generate_package_files
+from ..manifest import (
+    ManifestStore,
+    build_manifest,
+    diff_manifests,
+    get_result_hash,
+    read_package_files,
+)
+
+
+@pytest.fixture
+def nodes() -> list:
+    with open("./tests/files/nodes.json", "r", encoding="utf-8") as file:
+        return json.load(file)["nodes"]
+
+
+@pytest.fixture
+def code() -> dict:
+    with open("./tests/files/mls_editor.json", "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def test_build_manifest():
+    manifest = build_manifest({"main.py": "print(1)\n", "params.yaml": ""})
+    assert manifest == {
+        "main.py": hashlib.sha256(b"print(1)\n").hexdigest(),
+        "params.yaml": hashlib.sha256(b"").hexdigest(),
+    }
+
+
+def test_diff_manifests():
+    base = {"a.py": "1", "b.py": "2", "c.py": "3"}
+    manifest = {"a.py": "1", "b.py": "4", "d.py": "5"}
+    assert diff_manifests(base, manifest) == (["b.py", "d.py"], ["c.py"])
+    assert diff_manifests(manifest, manifest) == ([], [])
+    assert diff_manifests({}, manifest) == (["a.py", "b.py", "d.py"], [])
+
+
+def test_get_result_hash():
+    manifest = {"a.py": "1", "b.py": "2"}
+    assert get_result_hash(manifest, "lib") == get_result_hash({"b.py": "2", "a.py": "1"}, "lib")
+    assert get_result_hash(manifest, "lib") != get_result_hash(manifest, "other")
+    assert get_result_hash(manifest, "lib") != get_result_hash({"a.py": "1"}, "lib")
+
+
+def test_manifest_store():
+    store = ManifestStore(max_size=2)
+    store.put("a", {"a.py": "1"}, "lib")
+    store.put("b", {"b.py": "2"}, "lib")
+    assert store.get("a") == ({"a.py": "1"}, "lib")
+    store.put("c", {"c.py": "3"}, "lib")
+
+    assert store.get("b") is None
+    assert list(store.manifests) == ["a", "c"]
+    assert store.stats() == {"entries": 2, "hits": 1, "misses": 1, "evictions": 1}
+
+
+def test_diff_generated_packages(code, nodes):
+    node_configuration = ConfigLoader(content=nodes)
+    base = build_manifest(generate_package_files(code, node_configuration))
+    for module in code["modules"].values():
+        for node in module["nodes"]:
+            for param in node["data"]["params"].values():
+                if param["type"] == "number":
+                    param["value"] = "0.5"
+    files = generate_package_files(code, node_configuration)
+
+    assert diff_manifests(base, build_manifest(files)) == (["params.yaml"], [])
+
+
+def test_read_package_files(code, nodes, mls_path):
+    node_configuration = ConfigLoader(content=nodes)
+    files = generate_package_files(code, node_configuration)
+    data = generate_archive(code, node_configuration, LibraryArchive(mls_path))
+
+    # The result hash of a full archive is the base of the first delta
+    assert read_package_files(data) == files
@@ -0,0 +1,63 @@
+import pytest
+from ..metrics import MetricsRegistry, PhaseTimer
+
+
+@pytest.fixture
+def registry() -> MetricsRegistry:
+    return MetricsRegistry()
+
+
+def test_phase_timer():
+    timer = PhaseTimer()
+    with timer.phase("load"):
+        pass
+    timer.add("load", 1.0)
+    timer.add("generate", 0.5)
+    assert timer.timings["load"] >= 1.0
+    assert timer.timings["generate"] == 0.5
+
+
+def test_counter(registry: MetricsRegistry):
+    counter = registry.counter("requests_total", "Requests.", ("endpoint",))
+    counter.inc(endpoint="create_app")
+    counter.inc(2, endpoint="create_app")
+    counter.inc(endpoint='say "hi"')
+
+    assert registry.render() == (
+        "# HELP requests_total Requests.\n"
+        "# TYPE requests_total counter\n"
+        'requests_total{endpoint="create_app"} 3\n'
+        'requests_total{endpoint="say \\"hi\\""} 1\n'
+    )
+    with pytest.raises(ValueError):
+        counter.inc(phase="wrong")
+
+
+def test_histogram(registry: MetricsRegistry):
+    histogram = registry.histogram("phase_seconds", "Phases.", ("phase",), buckets=(0.1, 1))
+    histogram.observe(0.05, phase="load")
+    histogram.observe(0.5, phase="load")
+    histogram.observe(5, phase="load")
+
+    assert registry.render() == (
+        "# HELP phase_seconds Phases.\n"
+        "# TYPE phase_seconds histogram\n"
+        'phase_seconds_bucket{phase="load",le="0.1"} 1\n'
+        'phase_seconds_bucket{phase="load",le="1"} 2\n'
+        'phase_seconds_bucket{phase="load",le="+Inf"} 3\n'
+        'phase_seconds_sum{phase="load"} 5.55\n'
+        'phase_seconds_count{phase="load"} 3\n'
+    )
+
+
+def test_collector(registry: MetricsRegistry):
+    registry.add_collector(
+        "cache_hits_total", "Cache hits.", "counter", ("cache",),
+        lambda: [(("memory",), 3), (("disk",), 1)],
+    )
+    assert registry.render() == (
+        "# HELP cache_hits_total Cache hits.\n"
+        "# TYPE cache_hits_total counter\n"
+        'cache_hits_total{cache="memory"} 3\n'
+        'cache_hits_total{cache="disk"} 1\n'
+    )
@@ -95,6 +95,16 @@ def test_custom_node_copy(example_custom_node_config):
     assert node.outputs == new_node.outputs
 
 
+def test_custom_node_copy_shares_schema(example_custom_node_config):
+    node = CustomNode(example_custom_node_config)
+    new_node = node.get_copy()
+
+    assert new_node.schema is node.schema
+    assert new_node.params is not node.params
+    new_node.params["train_percentage"]["value"] = "0.5"
+    assert node.params["train_percentage"]["value"] is None
+
+
 @pytest.fixture
 def example_node_data():
     return {
@@ -229,6 +239,21 @@ def test_data_assignation_orchestration_node(
         assert node.params[key]["type"] == value["type"]
 
 
+def test_node_slots(node: Node, example_custom_node_config):
+    assert not hasattr(node, "__dict__")
+    assert not hasattr(CustomNode(example_custom_node_config), "__dict__")
+    node.add_dependency("dep", "port", "src", "src_port")
+    assert node.dependencies[0].source == "src"
+    assert node.dependencies[0].target_port == "port"
+
+
+def test_node_parents_are_lazy(node: Node):
+    assert node._parent is None
+    assert node._parent_step is None
+    parent_step = node.parent_step
+    assert node.parent_step is parent_step
+
+
 def test_node_set_parent(node: Node):
     p = Mock()
     node.set_parent(p)
@@ -272,6 +297,17 @@ def test_past_dependency(node: Node):
     assert node.ready == [True]
 
 
+def test_past_dependency_same_port(node: Node):
+    node.add_dependency("dep", "port", "src", "src_port")
+    node.add_dependency("dep", "port", "other_src", "src_port")
+    node.past_dependency("dep", "port")
+    assert node.ready == [True, False]
+    assert not node.is_ready()
+    node.past_dependency("dep", "port")
+    assert node.ready == [True, True]
+    assert node.is_ready()
+
+
 def test_get_output(loaded_node: CustomNode):
     assert loaded_node.get_output("features_train") == "features_train"
     t = "no_feature"
@@ -309,6 +345,23 @@ def test_generate_code(loaded_node: CustomNode, loaded_node_with_param: CustomNo
     assert loaded_node_with_param.generate_code() == code
 
 
+def test_get_param_slots(loaded_node: CustomNode):
+    assert loaded_node.get_param_slots() is loaded_node.schema.param_slots
+    assert [slot[:2] for slot in loaded_node.get_param_slots()] == [
+        ("description", "description"), ("train_percentage", "number")
+    ]
+    assert loaded_node.get_param_slots()[0][2] is None
+    loaded_node.params["extra"] = {"value": ["a", "b"], "type": "list"}
+    assert loaded_node.get_param_slots() is not loaded_node.schema.param_slots
+    code = """ = TrainTestSplitter(\n\ttrain_percentage = 0.3,\n\textra = [\n\t\t'a',\n\t\t'b'\n\t]\n)\n"""
+    assert loaded_node.generate_code() == code
+
+
+def test_generate_code_unknown_param_type(loaded_node: CustomNode):
+    loaded_node.params["train_percentage"]["type"] = "unknown"
+    with pytest.raises(ValueError):
+        loaded_node.generate_code()
+
 def test_get_dependencies_code(loaded_node_with_param: CustomNode):
     other_node = loaded_node_with_param.get_copy()
     loaded_node_with_param.add_dependency(other_node, "port", other_node, "src_port")
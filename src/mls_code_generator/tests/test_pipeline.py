@@ -1,8 +1,10 @@
 import pytest
+import copy
 import json
 from unittest.mock import Mock
 from ..types import Pipeline
-from ..pipeline_loader import PipelineLoader
+from ..code_generator import CodeGenerator
+from ..pipeline_loader import EditorPipelineLoader, PipelineLoader
 from ..configuration_loader import ConfigLoader
 
 @pytest.fixture
@@ -63,4 +65,40 @@ def test_get_step(ready_pipeline: Pipeline):
     assert received_step.id == "0c7788842ca589f9"
     assert str(received_step.nodes) == "[Input, Output, Output, Label Encoder train, Select Columns, Select Columns]"
     assert received_step.data == {'nodeName': 'Step', 'id': '0c7788842ca589f9', 'params': {'Stage name': {'type': 'description', 'value': 'Feature Engineering'}, 'color': {'type': 'color', 'value': 'rgba(255, 99, 132, 0.75)'}, 'link': {'type': 'link', 'value': ''}}}
-    assert received_step.original_name == "Feature Engineering"
\ No newline at end of file
+    assert received_step.original_name == "Feature Engineering"
+
+def test_load_pipeline_releases_node_data(ready_pipeline: Pipeline):
+    for node in ready_pipeline.nodes.values():
+        assert node.data is None
+
+
+@pytest.fixture
+def editor_code() -> dict:
+    with open("./tests/files/mls_editor.json", "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def test_editor_pipeline_loader(editor_code: dict, ready_pipeline: Pipeline):
+    with open("./tests/files/nodes.json", "r", encoding="utf-8") as file:
+        nodes = json.load(file)["nodes"]
+    original = copy.deepcopy(editor_code)
+
+    pipeline = Pipeline()
+    pipeline.load_pipeline(EditorPipelineLoader(editor_code, ConfigLoader(content=nodes)))
+
+    assert editor_code == original
+    assert list(pipeline.steps) == list(ready_pipeline.steps)
+    for step_id, step in pipeline.steps.items():
+        expected = ready_pipeline.get_step(step_id)
+        assert (step.name, step.r_name, step.data) == (expected.name, expected.r_name, expected.data)
+        assert [node.id for node in step.nodes] == [node.id for node in expected.nodes]
+    for node_id, node in pipeline.nodes.items():
+        expected = ready_pipeline.get_node(node_id)
+        assert (node.variable_name, node.params) == (expected.variable_name, expected.params)
+        assert node.parent.id == expected.parent.id
+        assert node.data is None
+
+    code_generator = CodeGenerator()
+    code_generator.generate_code(pipeline)
+    with open("./tests/files/modules.json", "r", encoding="utf-8") as file:
+        assert code_generator.modules == json.load(file)
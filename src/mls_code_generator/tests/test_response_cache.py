@@ -0,0 +1,62 @@
+import pytest
+import gzip
+import os
+from unittest.mock import Mock
+from ..response_cache import CachedResponse, FileResponseCache
+
+
+@pytest.fixture
+def config_file(tmp_path) -> str:
+    path = tmp_path / "nodes.json"
+    path.write_text('{"nodes": []}')
+    return str(path)
+
+
+def test_cached_response():
+    response = CachedResponse(b'{"nodes": []}')
+    assert gzip.decompress(response.gzip_body) == b'{"nodes": []}'
+    assert response.etag == CachedResponse(b'{"nodes": []}').etag
+    assert response.etag != CachedResponse(b'{"nodes": [1]}').etag
+
+
+def test_file_response_cache_hit(config_file):
+    cache = FileResponseCache()
+    render = Mock(return_value=b"body")
+
+    first = cache.get("nodes", [config_file], render)
+    second = cache.get("nodes", [config_file], render)
+
+    assert first is second
+    render.assert_called_once()
+    assert cache.stats() == {
+        "entries": 1, "max_entries": 64, "hits": 1, "misses": 1, "evictions": 0,
+    }
+
+
+def test_file_response_cache_eviction(config_file):
+    cache = FileResponseCache(max_entries=2)
+    cache.get("a", [config_file], lambda: b"a")
+    cache.get("b", [config_file], lambda: b"b")
+    cache.get("a", [config_file], lambda: b"a")
+    cache.get("c", [config_file], lambda: b"c")
+
+    assert list(cache.entries) == ["a", "c"]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_file_response_cache_invalidation(config_file):
+    cache = FileResponseCache()
+    first = cache.get("nodes", [config_file], lambda: b"old")
+
+    with open(config_file, "w", encoding="utf-8") as file:
+        file.write('{"nodes": [1]}')
+    os.utime(config_file, ns=(1, 1))
+
+    second = cache.get("nodes", [config_file], lambda: b"new")
+    assert second.body == b"new"
+    assert second.etag != first.etag
+
+
+def test_file_response_cache_missing_file(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        FileResponseCache().get("missing", [str(tmp_path / "missing.json")], lambda: b"")
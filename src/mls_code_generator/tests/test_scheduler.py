@@ -0,0 +1,95 @@
+import pytest
+import random
+from ..scheduler import schedule_nodes
+from ..types import Node, Step
+
+
+def is_passthrough(node):
+    return node.node_name in ["Input", "Output"]
+
+
+def scan_order(nodes, passthrough):
+    """ The original rescan-from-the-start scheduler of Step.generate_code. """
+    order = []
+    copy_nodes = nodes.copy()
+    while len(copy_nodes) > 0:
+        for node in copy_nodes:
+            if not node.is_ready():
+                continue
+            if passthrough and is_passthrough(node):
+                copy_nodes.remove(node)
+                for p in node.sources:
+                    for target, target_port in node.sources[p]:
+                        target.past_dependency(target, target_port)
+                continue
+            order.append(node)
+            copy_nodes.remove(node)
+            for p in node.sources:
+                for target, target_port in node.sources[p]:
+                    target.past_dependency(target, target_port)
+            break
+    return order
+
+
+def random_step(seed):
+    rng = random.Random(seed)
+    step = Step("step")
+    size = rng.randint(1, 12)
+    names = [rng.choice(["Input", "Output", "A", "B"]) for _ in range(size)]
+    topological = list(range(size))
+    rng.shuffle(topological)
+    for i in range(size):
+        node = Node()
+        node.set_data({"id": str(i), "nodeName": names[i], "params": {}})
+        step.add_node(node)
+    for target_rank in range(1, size):
+        for port in range(rng.randint(0, 2)):
+            source_rank = rng.randrange(target_rank)
+            step.add_connection(
+                str(topological[source_rank]), str(topological[target_rank]),
+                "out", "in_" + str(port)
+            )
+    return step
+
+
+@pytest.mark.parametrize("passthrough", [True, False])
+def test_schedule_matches_scan_order(passthrough):
+    for seed in range(500):
+        expected = scan_order(random_step(seed).nodes, passthrough)
+        nodes = random_step(seed).nodes
+        actual = list(schedule_nodes(nodes, is_passthrough if passthrough else None))
+        assert [node.id for node in actual] == [node.id for node in expected], seed
+
+
+def test_schedule_skips_node_after_passthrough():
+    step = Step("step")
+    for i, name in enumerate(["Input", "A", "B"]):
+        node = Node()
+        node.set_data({"id": str(i), "nodeName": name, "params": {}})
+        step.add_node(node)
+    assert [node.id for node in schedule_nodes(step.nodes, is_passthrough)] == ["2", "1"]
+
+
+def test_schedule_cycle():
+    step = Step("step")
+    for i in range(3):
+        node = Node()
+        node.set_data({"id": str(i), "nodeName": "A", "params": {}})
+        step.add_node(node)
+    step.add_connection("1", "2", "out", "in")
+    step.add_connection("2", "1", "out", "in")
+    order = schedule_nodes(step.nodes)
+    assert next(order).id == "0"
+    with pytest.raises(ValueError):
+        next(order)
+
+
+def test_schedule_multiple_connections_to_one_port():
+    step = Step("step")
+    for i in range(3):
+        node = Node()
+        node.set_data({"id": str(i), "nodeName": "A", "params": {}})
+        step.add_node(node)
+    step.add_connection("0", "2", "out", "in")
+    step.add_connection("1", "2", "out", "in")
+    assert [node.id for node in schedule_nodes(step.nodes)] == ["0", "1", "2"]
@@ -70,4 +70,9 @@ def test_generate_main_code(ready_step: Step):
 def test_generate_dependencies_code(ready_step: Step):
     with open("./tests/files/step_dependencies_code.txt", "r", encoding="utf-8") as file:
         expected_code = file.read()
-    assert ready_step.get_dependencies_code() == expected_code
\ No newline at end of file
+    assert ready_step.get_dependencies_code() == expected_code
+
+def test_get_node(ready_step: Step):
+    for node in ready_step.nodes:
+        assert ready_step.get_node(node.id) is node
+    assert ready_step.get_node("node_that_is_not_there") is None
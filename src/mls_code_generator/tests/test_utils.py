@@ -1,6 +1,6 @@
 import pytest
 from unittest.mock import MagicMock, patch
-from ..utils import fix_editor
+from ..utils import canonical_hash, fix_editor, resolve_inside
 import json
 import os
 def test_fix_editor():
@@ -9,4 +9,22 @@ def test_fix_editor():
     out = fix_editor(d)
     with open("./tests/files/mls_editor_fixed.json", "r") as f:
         d2 = json.load(f)
-        assert out == d2
\ No newline at end of file
+        assert out == d2
+
+def test_canonical_hash():
+    assert canonical_hash({"a": 1, "b": [1, 2]}) == canonical_hash({"b": [1, 2], "a": 1})
+    assert canonical_hash({"a": 1}, {"b": 2}) != canonical_hash({"a": 1, "b": 2})
+    assert canonical_hash({"b": [1, 2]}) != canonical_hash({"b": [2, 1]})
+
+
+def test_resolve_inside(tmp_path):
+    directory = str(tmp_path / "templates")
+    os.makedirs(directory)
+    path = resolve_inside(directory, "x.json")
+    assert path == os.path.join(os.path.realpath(directory), "x.json")
+    assert resolve_inside(directory + "/", "./x.json") == path
+    assert resolve_inside(directory, ".//x.json") == path
+    assert resolve_inside(directory, "sub/../x.json") == path
+    assert resolve_inside(directory, "../x.json") is None
+    assert resolve_inside(directory, "/etc/passwd") is None
+    assert resolve_inside(directory, "") is None
@@ -0,0 +1,88 @@
+import pytest
+import json
+import pickle
+from ..validation import PipelineValidationError, validate_pipeline
+from ..configuration_loader import ConfigLoader
+from ..pipeline_loader import PipelineLoader
+from ..types import Pipeline
+
+
+@pytest.fixture
+def code() -> dict:
+    with open("./tests/files/mls_editor_fixed.json", "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def make_step(node_ids, connections) -> dict:
+    return {
+        "nodes": [{"id": node_id, "nodeName": "A", "params": {}} for node_id in node_ids],
+        "connections": [
+            {"source": source, "sourceOutput": "out", "target": target, "targetInput": "in"}
+            for source, target in connections
+        ],
+    }
+
+
+def get_errors(content) -> list:
+    with pytest.raises(PipelineValidationError) as error:
+        validate_pipeline(content)
+    return error.value.errors
+
+
+def test_validate_valid_pipeline(code):
+    validate_pipeline(code)
+
+
+def test_validate_unknown_node():
+    errors = get_errors({
+        "root": make_step([], []),
+        "step": make_step(["a", "b", "c"], [("a", "b"), ("x", "c")]),
+    })
+    assert [error["code"] for error in errors] == ["unknown_node", "unreachable"]
+    assert errors[0]["node"] == "x"
+    assert errors[1]["nodes"] == ["c"]
+
+
+def test_validate_unknown_target():
+    errors = get_errors({"root": make_step([], []), "step": make_step(["a"], [("a", "x")])})
+    assert [(error["code"], error["node"]) for error in errors] == [("unknown_node", "x")]
+
+
+def test_validate_cycle():
+    errors = get_errors({
+        "root": make_step([], []),
+        "step": make_step(["a", "b", "c", "d"], [("a", "b"), ("b", "c"), ("c", "b"), ("c", "d")]),
+    })
+    assert [error["code"] for error in errors] == ["cycle", "unreachable"]
+    assert errors[0]["step"] == "step"
+    assert errors[0]["nodes"] == ["b", "c"]
+    assert errors[1]["nodes"] == ["d"]
+
+
+def test_validate_unknown_step(code):
+    code["root"]["nodes"].append({
+        "nodeName": "Step", "id": "missing",
+        "params": {"link": {"type": "link", "value": "also_missing"}},
+    })
+    errors = get_errors(code)
+    assert [(error["code"], error["node"]) for error in errors] == [("unknown_step", "missing")]
+
+
+def test_validation_error_pickle():
+    error = PipelineValidationError([{"code": "cycle", "message": "cycle"}])
+    copy = pickle.loads(pickle.dumps(error))
+    assert copy.errors == error.errors
+    assert str(copy) == str(error)
+
+
+def test_load_invalid_pipeline(code):
+    with open("./tests/files/nodes.json", "r", encoding="utf-8") as file:
+        nodes = json.load(file)["nodes"]
+    code["root"]["connections"].append({
+        "source": code["root"]["connections"][0]["target"], "sourceOutput": "out",
+        "target": code["root"]["connections"][0]["source"], "targetInput": "in",
+    })
+    pipeline = Pipeline()
+    with pytest.raises(PipelineValidationError):
+        pipeline.load_pipeline(PipelineLoader(code, ConfigLoader(content=nodes)))
+    assert pipeline.steps == {}
@@ -1,4 +1,4 @@
-from . node import Node
-from . custom_node import CustomNode
+from . node import Dependency, Node, Source
+from . custom_node import CustomNode, NodeSchema
 from . pipeline import Pipeline
 from . step import Step
@@ -1,30 +1,135 @@
-from . node import Node
+from . node import Node, compile_param_slots
+
+def _freeze(value):
+    # The values of the params are JSON values, so freezing their lists and
+    # dictionaries is enough to make them hashable
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple((key, _freeze(item)) for key, item in value.items())
+    return value
+
+class NodeSchema:
+    """ NodeSchema: The configuration of a node type, compiled once and shared by its nodes. """
+    __slots__ = (
+        "config", "node_name", "params", "inputs", "outputs", "origin", "dependencies",
+        "param_slots",
+    )
 
-class CustomNode(Node):
     def __init__(self, config):
-        super().__init__()
+        """
+        Compiles the configuration of a node type.
+
+        Parameters:
+            config (dict): The configuration of the node type from the nodes catalogue.
+
+        Attributes:
+            config (dict): The configuration of the node type.
+            node_name (str): The name of the node type.
+            params (tuple): The label and the type of each parameter.
+            inputs (tuple): The labels of the input ports.
+            outputs (tuple): The labels of the output ports.
+            origin (dict): The origin of the code of the node type.
+            dependencies (dict): The module dependencies of the node type.
+            param_slots (tuple): The slots used to generate the code of the params, with
+                the formatter of each param type already picked.
+        """
         self.config = config
-        for param in config['params']:
-            self.params[param['param_label']] = {
-                "value" : None,
-                "type" : param['param_type']
-            }
-        for input_socket in config['inputs']:
-            self.inputs.append(input_socket['port_label'])
-        for output_socket in config['outputs']:
-            self.outputs.append(output_socket['port_label'])
         self.node_name = config['node']
+        self.params = tuple(
+            (param['param_label'], param['param_type']) for param in config['params']
+        )
+        self.inputs = tuple(input_socket['port_label'] for input_socket in config['inputs'])
+        self.outputs = tuple(output_socket['port_label'] for output_socket in config['outputs'])
         self.origin = config['origin']
-        self.module_dependencies = config['dependencies']
+        self.dependencies = config['dependencies']
+        self.param_slots = compile_param_slots(self.params, self.origin)
+
+class CustomNode(Node):
+    __slots__ = ("schema",)
+
+    def __init__(self, config, schema=None):
+        """
+        Initializes a node of the type described by the given configuration.
+
+        Parameters:
+            config (dict): The configuration of the node type.
+            schema (NodeSchema): The compiled configuration, shared with the other nodes
+                of the same type. It is compiled from config if not given.
+        """
+        super().__init__()
+        if schema is None:
+            schema = NodeSchema(config)
+        self.schema = schema
+        for label, param_type in schema.params:
+            self.params[label] = {
+                "value" : None,
+                "type" : param_type
+            }
+        self.inputs = schema.inputs
+        self.outputs = schema.outputs
+        self.node_name = schema.node_name
+        self.origin = schema.origin
+        self.module_dependencies = schema.dependencies
+
+    @property
+    def config(self) -> dict:
+        """ The configuration of the node type, kept once by the shared schema. """
+        return self.schema.config
+
+    def get_param_slots(self) -> tuple:
+        """
+        Gets the slots used to generate the code of the params of this node.
+
+        The slots compiled by the schema are used while the params of the node have the
+        labels and types of the node type, and they are compiled again otherwise.
+
+        Returns:
+            tuple: The (label, type, formatter) slot of each param, see compile_param_slots.
+        """
+        slots = self.schema.param_slots
+        if len(slots) != len(self.params):
+            return super().get_param_slots()
+        for (label, param_type, _), (param, values) in zip(slots, self.params.items()):
+            if label != param or param_type != values['type']:
+                return super().get_param_slots()
+        return slots
+
+    def get_fragment_key(self):
+        """
+        Gets a key of everything the code and the dependencies of this node depend on,
+        besides its variable name and its wiring, so nodes with the same key can share
+        them.
+
+        The key holds the schema of the node type, and the type, value and label of
+        each param. The name of the step is only part of it when a param is a label,
+        as the labels are prefixed with it.
+
+        Returns:
+            tuple: The key.
+        """
+        key = [self.schema]
+        has_labels = False
+        for label, values in self.params.items():
+            value = values['value']
+            if isinstance(value, (list, dict)):
+                value = _freeze(value)
+            is_param = values.get("isParam", "custom")
+            if is_param != "custom":
+                has_labels = True
+            key += (label, values['type'], value, is_param, values.get("param_label", ""))
+        key.append(self.parent_step.name if has_labels else None)
+        return tuple(key)
+
     def get_copy(self):
         """
-        Returns a deep copy of the CustomNode object.
+        Returns a new CustomNode object of the same type.
 
-        This method creates a new instance of the CustomNode
-        class with the same configuration as the current object.
-        It copies all the attributes and values from the current object to the new object.
+        This method creates a new instance of the CustomNode class that shares the
+        compiled schema of the current object, so the configuration is not parsed again.
+        The new object only has its own parameter values.
 
         Returns:
             CustomNode: A new CustomNode object with the same configuration as the current object.
         """
-        return CustomNode(self.config)
+        return CustomNode(self.config, self.schema)
@@ -1,11 +1,106 @@
 """ Node: Component that represents a node in a pipeline. """
+from collections import deque, namedtuple
 from operator import is_
 from typing import final
 from . pipeline import Pipeline
 from . step import Step
+from ..emitter import CodeEmitter
+
+Dependency = namedtuple("Dependency", ["source", "source_port", "target", "target_port"])
+Source = namedtuple("Source", ["target", "target_port"])
+
+def _format_text(label : str, values : dict, indent : str) -> list:
+    return [label + " = '" + str(values['value']) + "'"]
+
+def _format_number(label : str, values : dict, indent : str) -> list:
+    return [label + " = " + str(values['value'])]
+
+def _format_boolean(label : str, values : dict, indent : str) -> list:
+    return [label + " = " + str(values['value']).lower()]
+
+def _format_list(label : str, values : dict, indent : str) -> list:
+    param_list = values['value']
+    lines = [label + " = ["]
+    for value in param_list[:-1]:
+        lines.append(indent + "'" + str(value) + "',")
+    if len(param_list) > 0:
+        lines.append(indent + "'" + str(param_list[-1]) + "'")
+    lines.append("]")
+    return lines
+
+def _format_map(label : str, values : dict, indent : str) -> list:
+    param_map = values['value']
+    lines = [label + " = {"]
+    for sub_map in param_map[:-1]:
+        lines.append(indent + "'" + str(sub_map['key']) + "': '" + str(sub_map['value']) + "',")
+    if len(param_map) > 0:
+        lines.append(indent + "'" + str(param_map[-1]['key']) + "': '" + str(param_map[-1]['value']) + "'")
+    lines.append("}")
+    return lines
+
+def _format_unknown(label : str, values : dict, indent : str) -> list:
+    raise ValueError("Unknown param type: " + values['type'])
+
+def _parse_map(value : list) -> dict:
+    return {sub_map['key']: sub_map['value'] for sub_map in value}
+
+# The lines of a param in the call that creates a node, by param type. Each formatter
+# takes the label and the values of the param and the text of one indentation level.
+PARAM_FORMATTERS = {
+    "string": _format_text,
+    "option": _format_text,
+    "option_of_options": _format_text,
+    "number": _format_number,
+    "boolean": _format_boolean,
+    "list": _format_list,
+    "map": _format_map,
+}
+
+# The value written to the params file for a label param, by param type
+LABEL_PARSERS = {
+    "string": lambda value: value,
+    "option": lambda value: value,
+    "option_of_options": lambda value: value,
+    "number": float,
+    "boolean": lambda value: bool(value.lower()),
+    "list": lambda value: value,
+    "map": _parse_map,
+}
+
+# The param types that are written in the generated code
+CODE_PARAM_TYPES = frozenset(PARAM_FORMATTERS)
+
+def compile_param_slots(params, origin : dict) -> tuple:
+    """
+    Compiles the params of a node into the slots used to generate its code.
+
+    Parameters:
+        params (iterable): The label and the type of each param, in order.
+        origin (dict): The origin of the code of the node.
+
+    Returns:
+        tuple: A (label, type, formatter) slot for each param. The formatter is None for
+        the params that are only written when they are labels: the descriptions and the
+        param the class of the node is read from.
+    """
+    origin_param = origin.get("parameter") if origin else None
+    slots = []
+    for label, param_type in params:
+        if param_type == "description" or label == origin_param:
+            formatter = None
+        else:
+            formatter = PARAM_FORMATTERS.get(param_type, _format_unknown)
+        slots.append((label, param_type, formatter))
+    return tuple(slots)
 
 class Node:
     """ Node: Component that represents a node in a pipeline. """
+    __slots__ = (
+        "id", "data", "dependencies", "sources", "node_name", "_parent", "_parent_step",
+        "ready", "pending", "dependency_slots", "input_slots", "params", "inputs", "outputs",
+        "origin", "origin_label", "module_dependencies", "variable_name",
+    )
+
     def __init__(self):
         """
         Initializes a Node object with the given parameters.
@@ -15,13 +110,20 @@ class Node:
 
         Attributes:
             id (str): The unique identifier for this node.
-            data (dict): The data associated with this node.
-            dependencies (list): A list of tuples where each tuple is a dependency of this node.
-            sources (dict): A dictionary where the keys are the ports of this node and the values are lists of tuples where each tuple is a source of this node.
+            data (dict): The data associated with this node. The PipelineLoader releases it
+                once the pipeline is loaded.
+            dependencies (list): A list of Dependency tuples where each tuple is a dependency of this node.
+            sources (dict): A dictionary where the keys are the ports of this node and the values are lists of Source tuples where each tuple is a source of this node.
             node_name (str): The name of this node.
-            parent (Pipeline): The parent pipeline of this node.
-            parent_step (Step): The parent step of this node.
+            parent (Pipeline): The parent pipeline of this node. An empty one is created
+                the first time it is read, if none was set.
+            parent_step (Step): The parent step of this node. An empty one is created
+                the first time it is read, if none was set.
             ready (list): A list of booleans indicating whether the node is ready to be executed.
+            pending (int): The number of dependencies of this node that are not resolved yet.
+            dependency_slots (dict): Queues of the indices of the unresolved dependencies of this node,
+                by destination node and port, in the order they were added.
+            input_slots (dict): The index of the first dependency connected to each input port.
             params (dict): A dictionary of the parameters of this node.
             inputs (list): A list of strings representing the inputs of this node.
             outputs (list): A list of strings representing the outputs of this node.
@@ -35,9 +137,12 @@ class Node:
         self.dependencies = []
         self.sources = {}
         self.node_name = None
-        self.parent = Pipeline()
-        self.parent_step = Step("0")
+        self._parent = None
+        self._parent_step = None
         self.ready = []
+        self.pending = 0
+        self.dependency_slots = {}
+        self.input_slots = {}
         self.params = {}
         self.inputs = []
         self.outputs = []
@@ -61,34 +166,70 @@ class Node:
         Returns:
             None
         """
-        self.id = data['id']
         self.data = data
+        self.set_values(data['id'], data['nodeName'], data['params'])
+
+    def set_values(self, node_id : str, node_name : str, params : dict):
+        """
+        Sets the id, the name and the params of the node.
+
+        This function does the work of set_data without keeping the dictionary the
+        values come from, so nodes can be loaded straight from the editor payload.
+        The function also sets the node_name of the node if it is not already set.
+        The function also sets the origin_label of the node.
+
+        Parameters:
+            node_id (str): The id of the node.
+            node_name (str): The name of the node.
+            params (dict): The params of the node, as sent by the editor.
+
+        Returns:
+            None
+        """
+        self.id = node_id
         if self.node_name is None:
-            self.node_name = data['nodeName']
-        for param in data['params']:
-            self.params[param] = {}
-            try:
-                param_val = data['params'][param]['value']
-                self.params[param]['value'] = param_val
-            except KeyError:
-                self.params[param]['value'] = ""
-            self.params[param]['type'] = data['params'][param]['type']
-
-            self.params[param]["isParam"] = "custom"
-            self.params[param]["param_label"] = ""
-            if self.node_name in ["Input", "Output", "Step"]:
+            self.node_name = node_name
+        orchestration = self.node_name in ["Input", "Output", "Step"]
+        for param, values in params.items():
+            self.params[param] = {
+                'value': values.get('value', ""),
+                'type': values['type'],
+                "isParam": "custom",
+                "param_label": "",
+            }
+            if orchestration:
                 continue
-            if "isParam" in data['params'][param]:
-                self.params[param]["isParam"] = data['params'][param]["isParam"]
-            if "param_label" in data['params'][param]:
-                self.params[param]["param_label"] = data['params'][param]["param_label"]
-                
+            if "isParam" in values:
+                self.params[param]["isParam"] = values["isParam"]
+            if "param_label" in values:
+                self.params[param]["param_label"] = values["param_label"]
+
         self.origin_label = ""
         if "custom" in self.origin:
             self.origin_label = self.origin["custom"]
         elif "parameter" in self.origin:
             self.origin_label = self.get_param(self.origin["parameter"])
 
+    @property
+    def parent(self) -> Pipeline:
+        if self._parent is None:
+            self._parent = Pipeline()
+        return self._parent
+
+    @parent.setter
+    def parent(self, parent : Pipeline):
+        self._parent = parent
+
+    @property
+    def parent_step(self) -> Step:
+        if self._parent_step is None:
+            self._parent_step = Step("0")
+        return self._parent_step
+
+    @parent_step.setter
+    def parent_step(self, parent_step : Step):
+        self._parent_step = parent_step
+
     def set_parent(self, parent : Pipeline):
         """
         Sets the parent pipeline of the node.
@@ -136,8 +277,12 @@ class Node:
             None
         """
 
-        self.dependencies.append((src, src_port, dep, port))
+        slot = len(self.dependencies)
+        self.dependencies.append(Dependency(src, src_port, dep, port))
         self.ready.append(False)
+        self.pending += 1
+        self.dependency_slots.setdefault((dep, port), deque()).append(slot)
+        self.input_slots.setdefault(port, slot)
     
     def add_source(self, my_port : str, target, target_port : str):
         """
@@ -157,9 +302,9 @@ class Node:
         """
 
         if my_port in self.sources:
-            self.sources[my_port].append((target, target_port))
+            self.sources[my_port].append(Source(target, target_port))
         else:
-            self.sources[my_port] = [(target, target_port)]
+            self.sources[my_port] = [Source(target, target_port)]
     
     def is_ready(self) -> bool:
         """
@@ -172,38 +317,38 @@ class Node:
         Returns:
             bool: True if the node is ready, False otherwise.
         """
-        for i in self.ready:
-            if not i:
-                return False
-        return True
+        return self.pending == 0
     
     def past_dependency(self, src : str, src_port : str) -> None :
         """
         Marks a dependency as resolved.
 
-        This function iterates through the dependencies of the node and checks if
-        there is a dependency with the specified source node and source port. If
-        such a dependency is found, it marks the corresponding entry in the ready
-        list as True, indicating that the dependency is resolved.
+        This function looks up the first unresolved dependency with the specified
+        destination node and port. If such a dependency is found, it marks the
+        corresponding entry in the ready list as True, indicating that the
+        dependency is resolved. When several connections end in the same port,
+        each call resolves the next one.
 
         Parameters:
-            src (str): The source node of the dependency.
-            src_port (str): The source port of the dependency.
+            src (str): The destination node of the dependency.
+            src_port (str): The destination port of the dependency.
 
         Returns:
             None
         """
-        
-        for i, dep in enumerate(self.dependencies):
-            if dep[2] == src and dep[3] == src_port:
-                self.ready[i] = True
-                return None            
+        slots = self.dependency_slots.get((src, src_port))
+        if not slots:
+            return None
+        self.ready[slots.popleft()] = True
+        self.pending -= 1
+        return None
     
     def _get_input(self, side):
-        for dep in self.dependencies:
-            if dep[3] == side:
-                return dep[0], dep[1]
-        return [None, None]      
+        slot = self.input_slots.get(side)
+        if slot is None:
+            return [None, None]
+        dep = self.dependencies[slot]
+        return dep[0], dep[1]
     
     def get_output(self, port):
         if port not in self.outputs:
@@ -227,69 +372,145 @@ class Node:
     def __str__(self) -> str:
         return self.node_name  
     
-    def generate_code(self):
+    def generate_code(self, context=None):
+        """
+        Generates the code that creates this node.
+
+        Parameters:
+            context (GenerationContext): The naming state of the generation run, if any.
+                The node's own variable name is used otherwise.
+
+        Returns:
+            str: The generated code.
+        """
+        emitter = CodeEmitter()
+        self.emit_code(emitter, context)
+        return emitter.getvalue()
+
+    def emit_code(self, emitter : CodeEmitter, context=None) -> None:
+        """
+        Adds the code that creates this node to an emitter.
+
+        Parameters:
+            emitter (CodeEmitter): The emitter the code is added to.
+            context (GenerationContext): The naming state of the generation run, if any.
+                The node's own variable name is used otherwise.
+
+        Returns:
+            None
+        """
         if self.origin is None:
-            return "# " + self.node_name + " not implemented yet\n"
-        
-        final_code = ""
+            emitter.line("# " + self.node_name + " not implemented yet")
+            return
+
+        variable_name = self.variable_name if context is None else context.get_variable_name(self)
         if "description" in self.params:
             description = self.get_param("description")
             if description is not None and len(description) > 0:
-                final_code += "# " + str(self.get_param("description")) + "\n"
-        final_code += self.variable_name + " = " + self.origin_label + "("
+                emitter.line("# " + str(self.get_param("description")))
+
+        # Each param is a list of lines, indented relative to the param
+        indent = emitter.indent_text
+        param_lines = []
+        for label, _, formatter in self.get_param_slots():
+            values = self.params[label]
+            if values.get("isParam", "custom") != "custom":
+                param_lines.append([label + " =  ParamLoader.load('" + self.get_param_label(label) + "')"])
+            elif formatter is not None:
+                param_lines.append(formatter(label, values, indent))
+
+        self.__emit_call(emitter, variable_name + " = " + self.origin_label + "(", param_lines)
+
+    def __emit_call(self, emitter : CodeEmitter, header : str, param_lines : list) -> None:
+        """
+        Adds the call that creates this node, with its params separated by commas.
+
+        The params are laid out on their own lines when get_param_count finds any.
+        The layout of the nodes whose written params do not match that count is kept
+        as it always was.
+
+        Parameters:
+            emitter (CodeEmitter): The emitter the code is added to.
+            header (str): The assignment and the opening of the call.
+            param_lines (list): The lines of each param.
+
+        Returns:
+            None
+        """
+        # The indent is part of the text, so the line breaks inside the values of the
+        # params only get the indentation of the code around the call
+        indent = emitter.indent_text
+        lines = []
+        for param in param_lines:
+            lines.extend(indent + line for line in param[:-1])
+            lines.append(indent + param[-1] + ",")
         if self.get_param_count() > 0:
-            final_code += "\n"
-        for param in self.params:
-            if self.is_param_label(param):
-                final_code += "\t" + param + " =  ParamLoader.load('" + self.get_param_label(param) + "'),\n"
-                continue
-            if self.get_param_type(param) == "description":
-                continue
-            if ( "parameter" in self.origin ) and ( param == self.origin["parameter"] ):
-                continue
-            if (self.get_param_type(param) in ["string", "option", "option_of_options"]):
-                final_code += "\t" + param + " = '" + str(self.get_param(param)) + "',\n"
-            elif (self.get_param_type(param) == "number"):
-                final_code += "\t" + param + " = " + str(self.get_param(param)) + ",\n"
-            elif (self.get_param_type(param) == "boolean"):
-                final_code += "\t" + param + " = " + str(self.get_param(param)).lower() + ",\n"
-            elif (self.get_param_type(param) == "list"):
-                param_list = self.get_param(param)
-                final_code += "\t" + param + " = [\n"
-                for value in param_list[:-1]:
-                    final_code += "\t\t'" + str(value) + "',\n"
-                if len(param_list) > 0:
-                    final_code += "\t\t'" + str(param_list[-1]) + "'\n\t],\n"
-                else:
-                    final_code += "\t],\n"
-            elif (self.get_param_type(param) == "map"):
-                param_map = self.get_param(param)
-                final_code += "\t" + param + " = {\n"
-                for sub_map in param_map[:-1]:
-                    final_code += "\t\t'" + str(sub_map['key']) + "': '" + str(sub_map['value']) + "',\n"
-                if len(param_map) > 0:
-                    final_code += "\t\t'" + str(param_map[-1]['key']) + "': '" + str(param_map[-1]['value']) + "'\n"
-                final_code += "\t},\n"
+            if lines:
+                lines[-1] = lines[-1][:-1]
+                emitter.line(header)
+                emitter.lines(lines)
             else:
-                raise ValueError("Unknown param type: " + self.get_param_type(param))
-        if self.get_param_count() > 0:
-            final_code = final_code[:-2]
-            final_code += "\n"
-        final_code += ")\n"
-        return final_code
+                emitter.line(header[:-1])
+            emitter.line(")")
+        elif lines:
+            emitter.line(header + lines[0])
+            emitter.lines(lines[1:])
+            emitter.line(")")
+        else:
+            emitter.line(header + ")")
     
-    def get_dependencies_code(self):
+    def get_fragment_key(self):
+        """
+        Gets a key of everything the code and the dependencies of this node depend on,
+        besides its variable name and its wiring, so nodes with the same key can share
+        them.
+
+        Returns:
+            tuple: The key, or None if the code of the node can not be shared. Nodes
+            that are not of a catalogue type are never shared.
+        """
+        return None
+
+    def get_dependencies_code(self, context=None):
+        """
+        Generates the code that passes the outputs of the dependencies of this node to it.
+
+        Parameters:
+            context (GenerationContext): The naming state of the generation run, if any.
+                The dependencies' own variable names are used otherwise.
+
+        Returns:
+            list: The code of each dependency.
+        """
         code_parts = []
-        for dependency in self.dependencies:
-            inp, inp_port, _, me_port = dependency
-            if inp.node_name == "Input":
-                inp_port = inp.get_param('key')
-            if inp.variable_name == "":
+        for me_port, inp_name, inp_port in self.get_dependency_wiring(context):
+            if inp_name == "":
                 code = me_port + " = None"
             else:
-                code = me_port + " = (" + inp.variable_name + ", '" + inp_port + "')"
+                code = me_port + " = (" + inp_name + ", '" + inp_port + "')"
             code_parts.append(code)
         return code_parts
+
+    def get_dependency_wiring(self, context=None) -> tuple:
+        """
+        Gets the outputs passed to each input port of this node.
+
+        Parameters:
+            context (GenerationContext): The naming state of the generation run, if any.
+                The dependencies' own variable names are used otherwise.
+
+        Returns:
+            tuple: The input port, the variable name of the dependency and its output
+            port, for each dependency. The output port of an Input node is its key.
+        """
+        wiring = []
+        for dependency in self.dependencies:
+            inp, inp_port, _, me_port = dependency
+            if inp.node_name == "Input":
+                inp_port = inp.get_param('key')
+            inp_name = inp.variable_name if context is None else context.get_variable_name(inp)
+            wiring.append((me_port, inp_name, inp_port))
+        return tuple(wiring)
     
     def is_param_label(self, param):
         if "isParam" in self.params[param] and self.params[param]["isParam"] != "custom":
@@ -303,28 +524,28 @@ class Node:
         """
         Gets the number of parameters in the current node that are available for code generation.
 
-        This function counts the number of parameters in the current node that are of a type that can be used in the code generation process.
+        This function counts the number of parameters in the current node whose type is
+        one of CODE_PARAM_TYPES.
 
         Returns:
             int: The number of parameters that are available for code generation.
         """
         count = 0
-        for param in self.params:
-            if (self.get_param_type(param) in self.__get_available_param_types()):
+        for values in self.params.values():
+            if values['type'] in CODE_PARAM_TYPES:
                 count += 1
         return count
 
-    def __get_available_param_types(self):
+    def get_param_slots(self) -> tuple:
         """
-        Gets a list of the available parameter types that can be used in the code generation process.
-
-        This function returns a list of strings where each string is a type of parameter that can be used in the code generation process.
-        The available parameter types are: string, number, boolean, list, map, option, and option_of_options.
+        Gets the slots used to generate the code of the params of this node.
 
         Returns:
-            list: A list of strings of the available parameter types.
+            tuple: The (label, type, formatter) slot of each param, see compile_param_slots.
         """
-        return ["string", "number", "boolean", "list", "map", "option", "option_of_options"]
+        return compile_param_slots(
+            ((label, values['type']) for label, values in self.params.items()), self.origin
+        )
     
     def port_is_multiple(self, port):
         """
@@ -347,10 +568,11 @@ class Node:
         If the port is a multiple output port, it returns True, otherwise it returns False.
         If the port is not connected to any dependencies, it returns None.
         """
-        for dep in self.dependencies:
-            if dep[3] == port:
-                return dep[0].port_is_multiple(dep[1])
-        return None
+        slot = self.input_slots.get(port)
+        if slot is None:
+            return None
+        dep = self.dependencies[slot]
+        return dep[0].port_is_multiple(dep[1])
     
     def get_dependencies(self) -> dict:
         """
@@ -394,20 +616,8 @@ class Node:
         for param in self.params:
             if not self.is_param_label(param):
                 continue
-            param_value = None
-            param_type = self.get_param_type(param)
-            if param_type in ["string", "option", "option_of_options"]:
-                param_value = self.get_param(param)
-            elif param_type == "number":
-                param_value = float(self.get_param(param))
-            elif param_type == "boolean":
-                param_value = bool(self.get_param(param).lower())
-            elif param_type == "list":
-                param_value = self.get_param(param)
-            elif param_type == "map":
-                param_value = {}
-                for sub_map in self.get_param(param):
-                    param_value[sub_map['key']] = sub_map['value']
+            parser = LABEL_PARSERS.get(self.get_param_type(param))
+            param_value = None if parser is None else parser(self.get_param(param))
             result.append({self.params[param]["param_label"] : param_value})
         return result
     
\ No newline at end of file
@@ -1,4 +1,6 @@
 class Pipeline:
+    __slots__ = ("nodes", "steps", "pipeline_id")
+
     def __init__(self):
         self.nodes = {}
         self.steps = {}
@@ -1,9 +1,20 @@
+from ..emitter import CodeEmitter
+from ..generation_context import GenerationContext
+from ..scheduler import schedule_nodes
 
+def _is_stage_io_node(node) -> bool:
+    return node.node_name in ['Input', 'Output']
 
 class Step:
+    __slots__ = (
+        "id", "nodes", "node_index", "data", "original_name", "name", "r_name", "outs",
+        "variable_name", "dependencies",
+    )
+
     def __init__(self, id : str) -> None:
         self.id = id
         self.nodes = []
+        self.node_index = {}
         self.data = ""
         self.original_name = ""
         self.name = ""
@@ -29,7 +40,9 @@ class Step:
 
     def add_node(self, node) -> None:
         """
-        Adds a new node to the step's collection of nodes.
+        Adds a new node to the step's collection of nodes and indexes it by its ID.
+
+        If several nodes share an ID, the first one added is the one found by ID.
 
         Args:
             node (Node): The node to be added to the step.
@@ -38,6 +51,7 @@ class Step:
             None
         """
         self.nodes.append(node)
+        self.node_index.setdefault(node.id, node)
     def add_connection(self, source : str, target : str,
                        source_port : str, target_port : str) -> None:
         """
@@ -52,18 +66,8 @@ class Step:
         Returns:
             None
         """
-        # find target node
-        target_node = None
-        for node in self.nodes:
-            if node.id == target:
-                target_node = node
-                break
-        # find source node
-        source_node = None
-        for node in self.nodes:
-            if node.id == source:
-                source_node = node
-                break
+        target_node = self.node_index.get(target)
+        source_node = self.node_index.get(source)
         # add dependency
         if target_node is not None:
             target_node.add_dependency(target_node, target_port, source_node, source_port)
@@ -80,71 +84,101 @@ class Step:
             None
         """
         self.data = data
+        stage_name = data['params']['Stage name']['value']
+        # Linked stages carry an extra character at the end of their name
         if data['params']['link']['value'] != "":
-            data['params']['Stage name']['value'] = data['params']['Stage name']['value'][:-1]
-        self.name = data['params']['Stage name']['value'].replace("-"," ")
-        self.original_name = data['params']['Stage name']['value']
+            stage_name = stage_name[:-1]
+        self.name = stage_name.replace("-"," ")
+        self.original_name = stage_name
         self.r_name = "".join([i.lower()[0] for i in self.name.split(" ")])
         self.variable_name = self.r_name
         self.name = self.name.lower()
         self.name = self.name.replace(' ', '_')
-    def generate_code(self):
+    def generate_code(self, context=None):
         """
         Generates the code for the current step by iterating over its nodes, 
         resolving dependencies, and generating code for each node.
 
         Parameters:
-            None
+            context (GenerationContext): The naming state of the generation run. Pass the
+                same context to get_output_code so it uses the same names.
 
         Returns:
             str: The generated code for the current step.
         """
+        emitter = CodeEmitter()
+        self.emit_code(emitter, context)
+        return emitter.getvalue()
+
+    def emit_code(self, emitter : CodeEmitter, context=None) -> None:
+        """
+        Adds the code of the nodes of the current step to an emitter.
+
+        The nodes are emitted by an indegree-counting scheduler, so the cost grows
+        with the number of nodes and connections of the step instead of quadratically.
+        The suffixed variable names of repeated nodes are kept in the context, and the
+        step and its nodes are not modified. When the context has a fragment cache, the
+        code of each node and of its task is taken from it.
+
+        Parameters:
+            emitter (CodeEmitter): The emitter the code is added to.
+            context (GenerationContext): The naming state of the generation run. Pass the
+                same context to emit_output_code so it uses the same names.
+
+        Returns:
+            None
+        """
+        if context is None:
+            context = GenerationContext()
         print("Generating code for module: ", self.name)
-        code = ""
-        copy_nodes = self.nodes.copy()
         node_count = dict()
-        node_dependencies = []
-
-        while(len(copy_nodes) > 0):
-            for node in copy_nodes:
-                # Gross exploration of the graph
-                if not node.is_ready():
-                    continue
-                # Pass ready dependencies to next nodes as these ones don't need to be generated
-                if node.node_name in ['Input', 'Output']:
-                    copy_nodes.remove(node)
-                    for p in node.sources:
-                        for target, target_port in node.sources[p]:
-                            target.past_dependency(target, target_port)
-                    continue
-                node_name = node.node_name
-                variable_name = node.variable_name
-                if node_count.get(node_name) is None:
-                    node_count[node_name] = 1
-                else:
-                    node_count[node_name] += 1
-                if node_count[node_name] > 1:
-                    variable_name += "_" + str(node_count[node_name])
-                    node.variable_name = variable_name
-                variable_name = node.variable_name
-                code += node.generate_code()
-                code += self.r_name + ".add_task(\n\t"
-
-                code += variable_name 
-                if len(node.dependencies) > 0:
-                    code += ",\n"
-                    for port_code in node.get_dependencies_code():
-                        code += "\t" + port_code + ",\n"
-                    code = code[:-2]
-                code += "\n)\n"
-                node_dependencies.append(variable_name)
-                code += "\n"
-                copy_nodes.remove(node)
-                for p in node.sources:
-                    for target, target_port in node.sources[p]:
-                        target.past_dependency(target, target_port)
-                break
-        return code
+
+        # Input and Output nodes only pass their dependencies to the next nodes,
+        # as they don't need to be generated
+        for node in schedule_nodes(self.nodes, _is_stage_io_node):
+            node_name = node.node_name
+            variable_name = context.get_variable_name(node)
+            if node_count.get(node_name) is None:
+                node_count[node_name] = 1
+            else:
+                node_count[node_name] += 1
+            if node_count[node_name] > 1:
+                variable_name += "_" + str(node_count[node_name])
+                context.set_variable_name(node, variable_name)
+            if context.fragment_cache is None:
+                self.__emit_task(emitter, node, variable_name, context)
+                continue
+            # The code of a node and its task only depend on the type, params, names and
+            # wiring of the node, so identical nodes share it through the cache
+            indent = emitter.indent_text
+            wiring = node.get_dependency_wiring(context)
+            fragment = context.get_fragment(
+                node, "task", lambda: self.__render_task(indent, node, variable_name, context),
+                variable_name, self.r_name, indent, wiring,
+            )
+            emitter.line(fragment)
+
+    def __render_task(self, indent : str, node, variable_name : str, context) -> str:
+        # The fragment is rendered without indentation and without its last line
+        # break, so the emitter it is added to indents every line of it
+        emitter = CodeEmitter(indent)
+        self.__emit_task(emitter, node, variable_name, context)
+        return emitter.getvalue()[:-1]
+
+    def __emit_task(self, emitter : CodeEmitter, node, variable_name : str, context) -> None:
+        node.emit_code(emitter, context)
+        emitter.line(self.r_name + ".add_task(")
+        with emitter.indent():
+            if len(node.dependencies) > 0:
+                emitter.line(variable_name + ",")
+                port_codes = node.get_dependencies_code(context)
+                for port_code in port_codes[:-1]:
+                    emitter.line(port_code + ",")
+                emitter.line(port_codes[-1])
+            else:
+                emitter.line(variable_name)
+        emitter.line(")")
+        emitter.line()
     
     def generate_main_code(self):
         code = ""
@@ -169,6 +203,17 @@ class Step:
         """
         Generates the import statements for the dependencies of the current step.
 
+        Returns:
+            str: The import statements for the dependencies of the current step.
+        """
+        emitter = CodeEmitter()
+        self.emit_dependencies_code(emitter)
+        return emitter.getvalue()
+
+    def emit_dependencies_code(self, emitter : CodeEmitter, context=None) -> None:
+        """
+        Adds the import statements for the dependencies of the current step to an emitter.
+
         This function iterates over each node in the step and retrieves its dependencies.
         It then collects the dependencies into a dictionary, where the keys are the module names
         and the values are sets of the specific dependencies for each module.
@@ -180,53 +225,135 @@ class Step:
         dependencies dictionary and constructing the import statement for each module. The import
         statement includes the module name and the specific dependencies for that module.
 
+        Args:
+            emitter (CodeEmitter): The emitter the code is added to.
+            context (GenerationContext): The state of the generation run, if any. The
+                dependencies of the nodes other than Input and Output are shared through
+                its fragment cache.
+
         Returns:
-            str: The import statements for the dependencies of the current step.
+            None
         """
         dependencies = {}
         for node in self.nodes:
-            node_dep = node.get_dependencies()
+            if context is None or _is_stage_io_node(node):
+                node_dep = node.get_dependencies()
+            else:
+                node_dep = context.get_fragment(node, "imports", node.get_dependencies)
             for dep in node_dep.keys():
                 if dep not in dependencies:
                     dependencies[dep] = set()
                 dependencies[dep].update(node_dep[dep])
 
-        code = ""
         if "orchestration" not in dependencies:
             dependencies["orchestration"] = set()
         dependencies["orchestration"].add("Stage")
         for dep, val in dependencies.items():
-            code += "from mls_lib." + dep + " import " + ", ".join(sorted(val)) + "\n"
-        return code
+            emitter.line("from mls_lib." + dep + " import " + ", ".join(sorted(val)))
 
     def get_output(self, source):
         return "NO OUTPUT IN PACKAGE: " + self.name
-    def get_output_code(self):
+    def get_output_code(self, context=None):
         """
         Generates the code for setting the output of the current step.
 
+        Args:
+            context (GenerationContext): The naming state of the generation run, if any.
+
+        Returns:
+            str: The generated code for setting the output of the step.
+        """
+        emitter = CodeEmitter()
+        self.emit_output_code(emitter, context)
+        return emitter.getvalue()
+
+    def emit_output_code(self, emitter : CodeEmitter, context=None) -> None:
+        """
+        Adds the code for setting the output of the current step to an emitter.
+
         This function iterates over each node in the step and checks if the node is an 'Output' node.
         If it is, the function generates the code for setting the output of the step using the 
         'get_step_output' method of the orchestrator.
 
+        Args:
+            emitter (CodeEmitter): The emitter the code is added to.
+            context (GenerationContext): The naming state of the generation run, if any.
+
         Returns:
-            str: The generated code for setting the output of the step.
+            None
         """
-        code = ""
         for node in self.nodes:
             if node.node_name == 'Output':
                 if len(node.dependencies) > 0:
                     dep, port, _, _ = node.dependencies[0]
-                    code += self.r_name + ".add_output('" + node.get_param('key') + "', "
-                    code += "(" + \
-                        dep.variable_name + ", '" + port + "'))\n"
-        return code
+                    dep_name = dep.variable_name if context is None \
+                        else context.get_variable_name(dep)
+                    emitter.line(
+                        self.r_name + ".add_output('" + node.get_param('key') + "', "
+                        + "(" + dep_name + ", '" + port + "'))"
+                    )
         
-    def get_node(self, note_id):
+    def get_wiring_fingerprint(self) -> tuple:
+        """
+        Gets the connections between the nodes of the step, with each node given by its
+        position in the step, so steps with the same graph share it.
+
+        Returns:
+            tuple: The dependencies and the sources of each node, in the order of the
+            nodes and of their connections, which is the order the nodes are scheduled in.
+            They are flattened, with each list preceded by its length.
+        """
+        positions = {node: position for position, node in enumerate(self.nodes)}
+        get_position = positions.get
+        wiring = []
         for node in self.nodes:
-            if node.node_id == note_id:
-                return node
-        return None
+            wiring.append(len(node.dependencies))
+            for source, source_port, _, target_port in node.dependencies:
+                wiring += (get_position(source), source_port, target_port)
+            wiring.append(len(node.sources))
+            for port, targets in node.sources.items():
+                wiring += (port, len(targets))
+                for target, target_port in targets:
+                    wiring += (get_position(target), target_port)
+        return tuple(wiring)
+
+    def get_fingerprint(self, context) -> tuple:
+        """
+        Gets a fingerprint of everything the module of this step is generated from: its
+        names, the type, params and variable name of each node, and their connections.
+
+        Steps with the same fingerprint generate the same module, whatever the ids of
+        their nodes.
+
+        Parameters:
+            context (GenerationContext): The state of the generation run, which keeps the
+                fragment key of each node.
+
+        Returns:
+            tuple: The fingerprint, or None if the code of any node can not be shared.
+        """
+        nodes = []
+        for node in self.nodes:
+            node_key = context.get_fragment_key(node)
+            if node_key is None:
+                return None
+            nodes.append((node_key, context.get_variable_name(node)))
+        return (
+            self.name, self.original_name, self.r_name, tuple(nodes),
+            self.get_wiring_fingerprint(),
+        )
+
+    def get_node(self, node_id : str):
+        """
+        Retrieves a node of the step by its ID.
+
+        Args:
+            node_id (str): The ID of the node to retrieve.
+
+        Returns:
+            Node: The node with the given ID, or None if the step has no such node.
+        """
+        return self.node_index.get(node_id)
 
     def add_main_connection(self, source, source_port, target_port):
         self.dependencies.append((source, source_port, target_port))
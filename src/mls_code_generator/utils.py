@@ -2,6 +2,43 @@
 This module contains utility functions for the code generator.
 """
 
+import hashlib
+import json
+import os
+
+def canonical_hash(*payloads):
+    """
+    Computes a hash of the given JSON payloads that does not depend on key order or formatting.
+
+    Args:
+        *payloads: The JSON-serializable payloads to hash.
+
+    Returns:
+        str: The hexadecimal SHA-256 of the canonical serialization of the payloads.
+    """
+    serialized = json.dumps(
+        payloads, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    )
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+def resolve_inside(directory, name):
+    """
+    Resolves the path of a file requested by name, if it is inside the given directory.
+
+    Args:
+        directory (str): The directory the file must be in.
+        name (str): The name of the file, relative to the directory.
+
+    Returns:
+        str: The canonical path of the file, the same for every spelling of its name,
+        or None if the path leads out of the directory.
+    """
+    root = os.path.realpath(directory)
+    path = os.path.realpath(os.path.join(root, name))
+    if os.path.commonpath([root, path]) != root or path == root:
+        return None
+    return path
+
 def fix_editor(content):
     """
     Fixes the editor content by reorganizing its modules, nodes, and connections.
@@ -0,0 +1,176 @@
+""" Validation: Checks the graph of a pipeline before it is loaded. """
+
+class PipelineValidationError(ValueError):
+    """ PipelineValidationError: Raised when the graph of a pipeline can not be generated. """
+    def __init__(self, errors : list) -> None:
+        """
+        Initializes a PipelineValidationError.
+
+        Parameters:
+            errors (list): The errors found in the pipeline. Each error is a dictionary
+                with a "code", a "step", a "message" and the ids involved.
+        """
+        self.errors = errors
+        super().__init__("Invalid pipeline: " + "; ".join(error["message"] for error in errors))
+
+    def __reduce__(self):
+        # Keep the errors when the exception is sent back from a worker process
+        return (PipelineValidationError, (self.errors,))
+
+def _get_params(node : dict) -> dict:
+    # Nodes fixed by fix_editor have their params at the top, raw editor nodes under "data"
+    if 'params' in node:
+        return node['params']
+    return node['data']['params']
+
+def _validate_connections(step_id : str, step : dict, errors : list) -> dict:
+    """
+    Checks that the connections of a step only refer to nodes of the step.
+
+    Parameters:
+        step_id (str): The id of the step.
+        step (dict): The nodes and connections of the step.
+        errors (list): The list the errors are added to.
+
+    Returns:
+        dict: The ids of the targets of each node, by node id. Connections to unknown
+        targets are left out, and the ones from unknown sources are kept under None,
+        as they can never be satisfied.
+    """
+    targets = {node['id']: [] for node in step['nodes']}
+    targets[None] = []
+    for connection in step['connections']:
+        source = connection['source']
+        target = connection['target']
+        for end in (source, target):
+            if end not in targets or end is None:
+                errors.append({
+                    "code": "unknown_node",
+                    "step": step_id,
+                    "node": end,
+                    "connection": connection,
+                    "message": "Connection " + str(source) + " -> " + str(target) +
+                        " in step " + step_id + " refers to unknown node " + str(end),
+                })
+        if target not in targets or target is None:
+            continue
+        targets[source if source in targets else None].append(target)
+    return targets
+
+def _validate_order(step_id : str, targets : dict, errors : list) -> None:
+    """
+    Checks that every node of a step can be scheduled after its dependencies.
+
+    The nodes that are never released by a topological sort are split with a second
+    sort over the reversed remaining graph: the ones it can not release either are
+    in, or between, cycles, and the rest only wait for them or for unknown nodes.
+
+    Parameters:
+        step_id (str): The id of the step.
+        targets (dict): The ids of the targets of each node, by node id.
+        errors (list): The list the errors are added to.
+
+    Returns:
+        None
+    """
+    pending = {node_id: 0 for node_id in targets}
+    for node_targets in targets.values():
+        for target in node_targets:
+            pending[target] += 1
+
+    ready = [node_id for node_id in targets if node_id is not None and pending[node_id] == 0]
+    while ready:
+        node_id = ready.pop()
+        for target in targets[node_id]:
+            pending[target] -= 1
+            if pending[target] == 0:
+                ready.append(target)
+
+    blocked = [node_id for node_id in targets if node_id is not None and pending[node_id] > 0]
+    if not blocked:
+        return
+
+    blocked_set = set(blocked)
+    remaining_targets = {
+        node_id: sum(1 for target in targets[node_id] if target in blocked_set)
+        for node_id in blocked
+    }
+    sources = {node_id: [] for node_id in blocked}
+    for node_id in blocked:
+        for target in targets[node_id]:
+            if target in blocked_set:
+                sources[target].append(node_id)
+
+    peeled = [node_id for node_id in blocked if remaining_targets[node_id] == 0]
+    unreachable = set()
+    while peeled:
+        node_id = peeled.pop()
+        unreachable.add(node_id)
+        for source in sources[node_id]:
+            remaining_targets[source] -= 1
+            if remaining_targets[source] == 0:
+                peeled.append(source)
+
+    cycle = [node_id for node_id in blocked if node_id not in unreachable]
+    if cycle:
+        errors.append({
+            "code": "cycle",
+            "step": step_id,
+            "nodes": cycle,
+            "message": "Step " + step_id + " has a cycle through nodes " + ", ".join(cycle),
+        })
+    unreachable = [node_id for node_id in blocked if node_id in unreachable]
+    if unreachable:
+        errors.append({
+            "code": "unreachable",
+            "step": step_id,
+            "nodes": unreachable,
+            "message": "Nodes " + ", ".join(unreachable) + " of step " + step_id +
+                " depend on inputs that are never produced",
+        })
+
+def validate_pipeline(content : dict) -> None:
+    """
+    Checks that the graph of a pipeline can be generated, in time linear in its size.
+
+    Every step is checked for connections to unknown nodes, for cycles and for nodes
+    that can never be scheduled because they depend on a cycle or on an unknown node.
+    The stages of the root step must also exist, or be linked to a stage that exists.
+
+    Parameters:
+        content (dict): The modules of the pipeline, either fixed by fix_editor or as
+            sent by the editor.
+
+    Returns:
+        None
+
+    Raises:
+        PipelineValidationError: If the pipeline has any error. All the errors found
+            are reported together.
+    """
+    errors = []
+    if 'root' not in content:
+        raise PipelineValidationError([{
+            "code": "unknown_step",
+            "step": "root",
+            "message": "The pipeline has no root step",
+        }])
+
+    for node in content['root']['nodes']:
+        if node['id'] in content:
+            continue
+        link = _get_params(node).get('link', {}).get('value', "")
+        if link not in content or link == 'root':
+            errors.append({
+                "code": "unknown_step",
+                "step": "root",
+                "node": node['id'],
+                "message": "Stage " + node['id'] + " does not exist and is not linked to a stage",
+            })
+
+    for step_id, step in content.items():
+        targets = _validate_connections(step_id, step, errors)
+        _validate_order(step_id, targets, errors)
+
+    if errors:
+        raise PipelineValidationError(errors)
@@ -1,70 +1,784 @@
 """server.py: Server for the mls_code_generator."""
 
+import multiprocessing
 import os
-import shutil
-import uuid
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 
-from flask import Flask, json, request
+from flask import Flask, Response, g, json, request
 from flask_cors import cross_origin, CORS
 from waitress import serve
 
-from mls_code_generator.configuration_loader import ConfigLoader
-from mls_code_generator.code_generator import CodeGenerator
+from mls_code_generator.archive import LibraryArchive
+from mls_code_generator.artifact_cache import DiskArtifactCache, MemoryArtifactCache
+from mls_code_generator.configuration_loader import ConfigRegistry
 from mls_code_generator.code_packer import CodePacker
-from mls_code_generator.pipeline_loader import PipelineLoader
-from mls_code_generator.types import Pipeline
-from mls_code_generator.utils import fix_editor
+from mls_code_generator.fragment_cache import FragmentCache
+from mls_code_generator.generation import (
+    UnknownNodesError,
+    generate_archive,
+    generate_package_files,
+    init_worker,
+    run_files_job,
+    run_generation_job,
+)
+from mls_code_generator.jobs import JobManager, QueueFullError
+from mls_code_generator.manifest import (
+    ManifestStore,
+    build_manifest,
+    diff_manifests,
+    get_result_hash,
+    read_package_files,
+)
+from mls_code_generator.metrics import SIZE_BUCKETS, MetricsRegistry, PhaseTimer
+from mls_code_generator.response_cache import FileResponseCache
+from mls_code_generator.utils import canonical_hash, resolve_inside
+from mls_code_generator.validation import PipelineValidationError, validate_pipeline
 
 app = Flask(__name__)
 
+MLS_PATH = "./mls_lib/mls_lib/"
+CONFIG_PATH = "./mls_code_generator_config/"
+EDITORS_PATH = CONFIG_PATH + "templates/"
+MLS_LIBRARY = LibraryArchive(MLS_PATH)
+ARCHIVE_CACHE = MemoryArtifactCache(
+    int(os.getenv("ARCHIVE_CACHE_BYTES", str(64 * 1024 * 1024)))
+)
+ARCHIVE_CACHE_DIR = os.getenv("ARCHIVE_CACHE_DIR", "")
+SHARED_ARCHIVE_CACHE = (
+    DiskArtifactCache(
+        ARCHIVE_CACHE_DIR,
+        int(os.getenv("ARCHIVE_CACHE_DIR_BYTES", str(1024 * 1024 * 1024))),
+    )
+    if ARCHIVE_CACHE_DIR
+    else None
+)
+RESPONSE_CACHE = FileResponseCache(int(os.getenv("RESPONSE_CACHE_SIZE", "64")))
+CONFIG_REGISTRY = ConfigRegistry(int(os.getenv("CONFIG_REGISTRY_SIZE", "16")))
+# The fragment cache is off by default. It makes the first generation of a pipeline
+# slower, as every fragment is fingerprinted and stored (about 63 ms instead of 46 ms
+# for 500 stages in benchmarks/fragment_cache.py), and repeated or edited pipelines
+# faster (about 25 ms). Set FRAGMENT_CACHE_SIZE to the number of fragments to keep,
+# such as 4096, when the same pipelines are generated again and again.
+# FRAGMENT_CACHE_BYTES bounds the characters of the stored code, not of the keys.
+FRAGMENT_CACHE_SIZE = int(os.getenv("FRAGMENT_CACHE_SIZE", "0"))
+FRAGMENT_CACHE = (
+    FragmentCache(
+        FRAGMENT_CACHE_SIZE, int(os.getenv("FRAGMENT_CACHE_BYTES", str(64 * 1024 * 1024)))
+    )
+    if FRAGMENT_CACHE_SIZE > 0
+    else None
+)
+MANIFEST_STORE = ManifestStore(int(os.getenv("MANIFEST_STORE_SIZE", "1024")))
+JOB_MANAGER = None
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", str(os.cpu_count() or 1)))
+# Hashes of the nodes payloads already sent to the worker pool with a batch
+POOL_NODES_HASHES = set()
+BATCH_MAX_PIPELINES = int(os.getenv("BATCH_MAX_PIPELINES", "100"))
+
+METRICS = MetricsRegistry()
+REQUESTS = METRICS.counter(
+    "mls_requests_total", "Requests handled by the server.", ("endpoint", "status")
+)
+REQUEST_SECONDS = METRICS.histogram(
+    "mls_request_seconds", "Time spent handling each request.", ("endpoint",)
+)
+REQUEST_BYTES = METRICS.histogram(
+    "mls_request_payload_bytes", "Size of the request payloads.", ("endpoint",), SIZE_BUCKETS
+)
+ARCHIVE_BYTES = METRICS.histogram(
+    "mls_archive_bytes", "Size of the generated archives.", (), SIZE_BUCKETS
+)
+PHASE_SECONDS = METRICS.histogram(
+    "mls_generation_phase_seconds", "Time spent in each phase of the generation.", ("phase",)
+)
+JOB_MANAGER_LOCK = threading.Lock()
+
+
+def get_cached_archive(cache_key):
+    """
+    Looks up a generated archive in the memory cache and then in the shared disk cache.
+
+    Archives found in the shared cache are kept in the memory cache as well.
+
+    Parameters:
+        cache_key (str): The hash of the payload that generated the archive.
+
+    Returns:
+        bytes: The archive, or None if no cache has it.
+    """
+    data = ARCHIVE_CACHE.get(cache_key)
+    if data is None and SHARED_ARCHIVE_CACHE is not None:
+        data = SHARED_ARCHIVE_CACHE.get(cache_key)
+        if data is not None:
+            ARCHIVE_CACHE.put(cache_key, data)
+    return data
+
+
+def get_cached_result_hash(cache_key):
+    """
+    Looks up the result hash of a generated archive, which is cached next to it.
+
+    Parameters:
+        cache_key (str): The hash of the payload that generated the archive.
+
+    Returns:
+        str: The result hash, or None if no cache has it, as for the archives of
+        asynchronous jobs.
+    """
+    result_hash = get_cached_archive(cache_key + "-result")
+    return None if result_hash is None else result_hash.decode("ascii")
+
+
+def store_archive(cache_key, data, result_hash=None):
+    """
+    Stores a generated archive in the memory cache and in the shared disk cache.
+
+    Parameters:
+        cache_key (str): The hash of the payload that generated the archive.
+        data (bytes): The archive.
+        result_hash (str): The result hash of the archive, kept under a key of its
+            own so cache hits do not read the archive again, if known.
+
+    Returns:
+        None
+    """
+    ARCHIVE_CACHE.put(cache_key, data)
+    if SHARED_ARCHIVE_CACHE is not None:
+        SHARED_ARCHIVE_CACHE.put(cache_key, data)
+    if result_hash is not None:
+        store_archive(cache_key + "-result", result_hash.encode("ascii"))
+
+
+def resolve_nodes(content):
+    """
+    Resolves the nodes configuration of a request.
+
+    Requests either upload the nodes payload in "nodes", or refer to a configuration
+    already known by the server with its hash in "nodes_hash".
+
+    Parameters:
+        content (dict): The request payload.
+
+    Returns:
+        tuple: The hash of the nodes payload and its ConfigLoader, which is None
+        if the hash is not known by the server.
+    """
+    if "nodes" in content:
+        return CONFIG_REGISTRY.load(content["nodes"])
+    nodes_hash = content["nodes_hash"]
+    return nodes_hash, CONFIG_REGISTRY.get(nodes_hash)
+
+
+def unknown_nodes_response(nodes_hash):
+    """
+    Returns the error sent when a request refers to a nodes configuration the server does not know.
+
+    Parameters:
+        nodes_hash (str): The hash sent by the client.
+
+    Returns:
+        tuple: The JSON error and the 409 status code.
+    """
+    return {
+        "error": "unknown_nodes_hash",
+        "message": "Unknown nodes configuration, send the nodes payload again",
+        "nodes_hash": nodes_hash,
+    }, 409
+
+
+def invalid_pipeline_response(error, pipeline=None):
+    """
+    Returns the error sent when the graph of a pipeline can not be generated.
+
+    Parameters:
+        error (PipelineValidationError): The validation error.
+        pipeline (str): The name of the pipeline of a batch, if any.
+
+    Returns:
+        tuple: The JSON error and the 400 status code.
+    """
+    response = {
+        "error": "invalid_pipeline",
+        "message": str(error),
+        "errors": error.errors,
+    }
+    if pipeline is not None:
+        response["pipeline"] = pipeline
+    return response, 400
+
+
+def store_result(files, library_hash):
+    """
+    Stores the manifest of a generated package, so it can be the base of a delta.
+
+    Parameters:
+        files (dict): The package files, without the MLS library.
+        library_hash (str): The content hash of the MLS library of the result.
+
+    Returns:
+        tuple: The hash of the result and its manifest.
+    """
+    manifest = build_manifest(files)
+    result_hash = get_result_hash(manifest, library_hash)
+    MANIFEST_STORE.put(result_hash, manifest, library_hash)
+    return result_hash, manifest
+
 
 @app.route("/api/create_app", methods=["GET", "POST"])
-@cross_origin()
+@cross_origin(expose_headers=["X-Nodes-Hash", "X-Result-Hash"])
 def create_app():
     """
     Creates a new application by generating code from the provided configuration.
 
     This function takes a JSON payload containing the application configuration and code,
-    generates the necessary code files, packages them into a ZIP archive, and returns the archive.
+    generates the necessary code files, packages them into an in-memory ZIP archive,
+    and returns the archive. Archives are cached by a canonical hash of the payload,
+    in memory and, when ARCHIVE_CACHE_DIR is set, in a directory shared by all the
+    server replicas, so repeated requests for the same pipeline are not generated again.
+
+    Compiled nodes configurations are kept by the hash of their payload, which is sent
+    back in the X-Nodes-Hash header. Clients can send that hash as "nodes_hash" instead
+    of uploading the "nodes" payload again; unknown hashes are answered with a 409.
+    Pipelines whose graph can not be generated are answered with a 400 that lists
+    every error found.
+
+    The hash of the result is sent in the X-Result-Hash header. Clients that already
+    have a previous result can send its hash as "base_hash" to receive only the files
+    that changed, see create_app_delta.
 
     Parameters:
         content (dict): A dictionary containing the application configuration and code.
 
     Returns:
-        bytes: The ZIP archive containing the generated code files.
+        Response: The ZIP archive containing the generated code files.
     """
     content = request.json
-    code_json = fix_editor(content["code"])
+    nodes_hash, node_configuration = resolve_nodes(content)
+    if "base_hash" in content:
+        return create_app_delta(content, nodes_hash, node_configuration)
+    # The key and the archive use the same version of the library, even if it changes
+    library = MLS_LIBRARY.pin()
+    cache_key = canonical_hash(content["code"], nodes_hash, library.get_hash())
+
+    data = get_cached_archive(cache_key)
+    if data is None:
+        if node_configuration is None:
+            return unknown_nodes_response(nodes_hash)
+        timer = PhaseTimer()
+        try:
+            data = generate_archive(
+                content["code"], node_configuration, library, timer, FRAGMENT_CACHE
+            )
+        except PipelineValidationError as error:
+            return invalid_pipeline_response(error)
+        for phase, seconds in timer.timings.items():
+            PHASE_SECONDS.observe(seconds, phase=phase)
+        ARCHIVE_BYTES.observe(len(data))
+        result_hash, _ = store_result(read_package_files(data), library.get_hash())
+        store_archive(cache_key, data, result_hash)
+    else:
+        result_hash = get_cached_result_hash(cache_key)
+        if result_hash is None:
+            result_hash, _ = store_result(read_package_files(data), library.get_hash())
+            store_archive(cache_key, data, result_hash)
+
+    response = Response(data, mimetype="application/zip")
+    response.headers["X-Nodes-Hash"] = nodes_hash
+    response.headers["X-Result-Hash"] = result_hash
+    return response
+
+
+def create_app_delta(content, nodes_hash, node_configuration):
+    """
+    Generates an application and returns the files that changed since a previous result.
+
+    The result is described by a manifest with the hash of each generated file, and
+    identified by a hash of that manifest and of the MLS library. The manifests of
+    recent results are kept in memory by this server, also the ones of the full
+    archives, whose hash is sent in their X-Result-Hash header. The files of the new
+    result are compared with the ones of the result given by "base_hash". When that
+    result is not known, which is also the case when "base_hash" is null, every file
+    is sent.
+    The manifests are not shared between server processes or replicas, unlike the
+    archives in ARCHIVE_CACHE_DIR. A "base_hash" sent by another replica, or by a
+    full archive found in the cache without being generated by this process, is not
+    known, so the whole result is sent.
+    The MLS library is never sent: "library_changed" tells the client that its copy
+    may be outdated, so it should download the full archive again.
+
+    Parameters:
+        content (dict): The payload of /api/create_app, with the "base_hash" of the
+            previous result of the client, or null.
+        nodes_hash (str): The hash of the nodes configuration.
+        node_configuration (ConfigLoader): The nodes configuration, or None if the
+            hash is not known by the server.
+
+    Returns:
+        tuple: The JSON delta, the status code and the headers. The delta has the
+        "result_hash" of the new result, the "base_hash" it was compared with, or
+        null, the changed "files" with their contents, the "removed" file names, the
+        whole "manifest", the "library_hash" and "library_changed".
+    """
+    if node_configuration is None:
+        return unknown_nodes_response(nodes_hash)
+    timer = PhaseTimer()
+    try:
+        files = generate_package_files(content["code"], node_configuration, timer, FRAGMENT_CACHE)
+    except PipelineValidationError as error:
+        return invalid_pipeline_response(error)
+    for phase, seconds in timer.timings.items():
+        PHASE_SECONDS.observe(seconds, phase=phase)
+
+    library_hash = MLS_LIBRARY.get_hash()
+    result_hash, manifest = store_result(files, library_hash)
+
+    base = None
+    if content["base_hash"]:
+        base = MANIFEST_STORE.get(content["base_hash"])
+    if base is None:
+        changed, removed = sorted(files), []
+        library_changed = True
+    else:
+        changed, removed = diff_manifests(base[0], manifest)
+        library_changed = base[1] != library_hash
+
+    return {
+        "result_hash": result_hash,
+        "base_hash": content["base_hash"] if base is not None else None,
+        "files": {name: files[name] for name in changed},
+        "removed": removed,
+        "manifest": manifest,
+        "library_hash": library_hash,
+        "library_changed": library_changed,
+    }, 200, {"X-Nodes-Hash": nodes_hash}
 
-    node_configuration = ConfigLoader(content=content["nodes"])
-    pipeline_loader = PipelineLoader(code_json, node_configuration)
 
-    pipeline = Pipeline()
-    pipeline.load_pipeline(pipeline_loader)
-    code_generator = CodeGenerator()
-    code_generator.generate_code(pipeline)
+def get_job_manager():
+    """
+    Returns the JobManager of the server, starting its process pool on first use.
+
+    The workers compress the MLS library and compile the server nodes configuration
+    when they start, so jobs only pay for the generation of their pipeline. They are
+    spawned rather than forked, as the server process runs several threads.
 
-    path_head = "./" + str(uuid.uuid4())
-    path = path_head + "/src/"
-    os.mkdir(path_head)
-    os.mkdir(path)
+    Returns:
+        JobManager: The JobManager of the server.
+    """
+    global JOB_MANAGER
+    with JOB_MANAGER_LOCK:
+        if JOB_MANAGER is None:
+            nodes_path = CONFIG_PATH + "nodes.json"
+            nodes = load_json(nodes_path)["nodes"] if os.path.exists(nodes_path) else None
+            executor = ProcessPoolExecutor(
+                max_workers=JOB_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_worker,
+                initargs=(MLS_PATH, nodes, FRAGMENT_CACHE_SIZE),
+            )
+            JOB_MANAGER = JobManager(
+                executor,
+                max_pending=int(os.getenv("JOB_MAX_PENDING", "64")),
+                ttl=float(os.getenv("JOB_TTL", "600")),
+            )
+        return JOB_MANAGER
+
+
+def batch_folder_names(pipelines):
+    """
+    Chooses a unique and safe folder name for each pipeline of a batch.
+
+    Parameters:
+        pipelines (list): The pipelines of the batch, each one with an optional "name".
+
+    Returns:
+        list: The folder names, in the same order as the pipelines.
+    """
+    folders = []
+    used = set()
+    for i, pipeline in enumerate(pipelines):
+        name = str(pipeline.get("name") or "pipeline_" + str(i + 1))
+        name = name.replace("/", "_").replace("\\", "_").strip(". ") or "pipeline_" + str(i + 1)
+        folder = name
+        count = 1
+        while folder in used:
+            count += 1
+            folder = name + "_" + str(count)
+        used.add(folder)
+        folders.append(folder)
+    return folders
+
+
+@app.route("/api/create_apps", methods=["POST"])
+@cross_origin(expose_headers=["X-Nodes-Hash"])
+def create_apps():
+    """
+    Creates several applications that share one nodes configuration in a single request.
+
+    The payload contains "nodes" (or "nodes_hash") and a "pipelines" list, where each
+    pipeline has its editor "code" and an optional "name". The pipelines are generated
+    in parallel by the worker pool, which shares the compiled nodes configuration and
+    the compressed MLS library across the whole batch.
+
+    The pipelines are submitted through the JobManager, so they count towards the
+    JOB_MAX_PENDING jobs of the pool with the asynchronous jobs, and batches that do
+    not fit are answered with a 503. The nodes payload is sent with the first jobs of
+    the first batch that uses it, and again only to the workers that ask for it by
+    failing a job. All of these jobs are submitted again together.
+
+    Parameters:
+        content (dict): A dictionary containing the nodes configuration and the pipelines.
+
+    Returns:
+        Response: A ZIP archive with one folder per pipeline, a 400 if a pipeline is
+        not valid, a 409 if the nodes hash is unknown, a 413 if the batch has more
+        than BATCH_MAX_PIPELINES or JOB_MAX_PENDING pipelines, or a 503 if too many
+        jobs are pending.
+    """
+    content = request.json
+    pipelines = content["pipelines"]
+    job_manager = get_job_manager()
+    max_pipelines = min(BATCH_MAX_PIPELINES, job_manager.max_pending)
+    if len(pipelines) > max_pipelines:
+        return {
+            "error": "batch_too_large",
+            "message": "A batch can contain at most " + str(max_pipelines) + " pipelines",
+        }, 413
+
+    nodes_hash, node_configuration = resolve_nodes(content)
+    if node_configuration is None:
+        return unknown_nodes_response(nodes_hash)
+
+    folders = batch_folder_names(pipelines)
+    codes = [pipeline["code"] for pipeline in pipelines]
+    try:
+        futures = submit_batch_files(job_manager, codes, nodes_hash, node_configuration)
+    except QueueFullError:
+        return queue_full_response()
+    packages = dict.fromkeys(folders)
+    retries = []
+    try:
+        for folder, code, future in zip(folders, codes, futures):
+            try:
+                packages[folder] = future.result()
+            except UnknownNodesError:
+                retries.append((folder, code))
+        if retries:
+            # The workers that did not have the nodes payload get it for all of their
+            # pipelines at once
+            futures = job_manager.submit_batch(
+                run_files_job,
+                [(code, node_configuration.content, nodes_hash) for _, code in retries],
+            )
+            for (folder, _), future in zip(retries, futures):
+                packages[folder] = future.result()
+    except PipelineValidationError as error:
+        return invalid_pipeline_response(error, folder)
+    except QueueFullError:
+        return queue_full_response()
+    finally:
+        # Nothing is left running in the pool once the request has failed
+        for pending in futures:
+            pending.cancel()
 
     code_packer = CodePacker()
-    code_packer.generate_package(
-        code=code_generator.get_modules(),
-        params=code_generator.get_params(),
-        write_path=path,
-        mls_path="./mls_lib/mls_lib/",
+    data = code_packer.generate_batch_archive(packages, MLS_LIBRARY.pin())
+    response = Response(data, mimetype="application/zip")
+    response.headers["X-Nodes-Hash"] = nodes_hash
+    return response
+
+
+def submit_batch_files(job_manager, codes, nodes_hash, node_configuration):
+    """
+    Submits the pipelines of a batch to the worker pool.
+
+    The first time a nodes payload is used in a batch, it is sent with as many jobs
+    as there are workers, so that most workers compile it with their first job. The
+    other jobs only carry the hash, and the ones that reach a worker without the
+    payload fail with an UnknownNodesError to be submitted again.
+
+    Parameters:
+        job_manager (JobManager): The JobManager of the server.
+        codes (list): The editor code of each pipeline.
+        nodes_hash (str): The hash of the nodes payload.
+        node_configuration (ConfigLoader): The nodes configuration.
+
+    Returns:
+        list: The futures of the jobs, in the same order as the pipelines.
+
+    Raises:
+        QueueFullError: If the batch does not fit in the pending jobs of the pool.
+    """
+    with JOB_MANAGER_LOCK:
+        send = 0 if nodes_hash in POOL_NODES_HASHES else JOB_WORKERS
+    futures = job_manager.submit_batch(
+        run_files_job,
+        [
+            (code, node_configuration.content if index < send else None, nodes_hash)
+            for index, code in enumerate(codes)
+        ],
     )
-    shutil.make_archive(path_head, "zip", path_head)
+    with JOB_MANAGER_LOCK:
+        # The workers only keep the last few payloads they compiled, so the older
+        # ones are sent again after a while
+        if len(POOL_NODES_HASHES) >= CONFIG_REGISTRY.max_size:
+            POOL_NODES_HASHES.clear()
+        POOL_NODES_HASHES.add(nodes_hash)
+    return futures
 
-    file = open(path_head + ".zip", "rb")
-    data = file.read()
-    file.close()
-    os.remove(path_head + ".zip")
-    shutil.rmtree(path_head)
 
-    return data
+def queue_full_response():
+    """
+    Returns the error sent when the worker pool has too many pending jobs.
+
+    Returns:
+        tuple: The JSON error and the 503 status code.
+    """
+    return {"error": "queue_full", "message": "Too many pending jobs, try again later"}, 503
+
+
+def job_status(job):
+    """
+    Returns the JSON description of a job.
+
+    Parameters:
+        job (Job): The job.
+
+    Returns:
+        dict: The id, the status and the error, if any, of the job.
+    """
+    status = {"job_id": job.id, "status": job.get_status()}
+    if status["status"] == "failed":
+        status["error"] = job.get_error()
+    return status
+
+
+@app.route("/api/jobs", methods=["POST"])
+@cross_origin()
+def submit_job():
+    """
+    Submits the generation of an application as an asynchronous job.
+
+    The payload is the same as the one of /api/create_app. The generation runs in a
+    pool of worker processes, so it does not hold a server thread while it runs.
+
+    Parameters:
+        content (dict): A dictionary containing the application configuration and code.
+
+    Returns:
+        tuple: The JSON description of the job and the 202 status code, a 400 if the
+        pipeline is not valid, a 409 if the nodes hash is unknown, or a 503 if too many
+        jobs are pending.
+    """
+    content = request.json
+    nodes_hash, node_configuration = resolve_nodes(content)
+    library_hash = MLS_LIBRARY.get_hash()
+    cache_key = canonical_hash(content["code"], nodes_hash, library_hash)
+    job_manager = get_job_manager()
+
+    data = get_cached_archive(cache_key)
+    if data is not None:
+        return job_status(job_manager.complete((library_hash, data))), 202
+    if node_configuration is None:
+        return unknown_nodes_response(nodes_hash)
+    try:
+        validate_pipeline(content["code"]["modules"])
+    except PipelineValidationError as error:
+        return invalid_pipeline_response(error)
+
+    try:
+        job = job_manager.submit(
+            run_generation_job,
+            content["code"],
+            node_configuration.content,
+            nodes_hash,
+            # The worker packs its own copy of the library, so the archive is stored
+            # under the hash of the version it packed
+            on_result=lambda result: store_archive(
+                canonical_hash(content["code"], nodes_hash, result[0]), result[1]
+            ),
+        )
+    except QueueFullError:
+        return queue_full_response()
+    return job_status(job), 202
+
+
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+@cross_origin()
+def get_job(job_id):
+    """
+    Returns the status of a job.
+
+    Parameters:
+        job_id (str): The id of the job.
+
+    Returns:
+        dict: The JSON description of the job, or a 404 if it does not exist or has expired.
+    """
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return {"error": "unknown_job", "job_id": job_id}, 404
+    return job_status(job)
+
+
+@app.route("/api/jobs/<job_id>/result", methods=["GET"])
+@cross_origin()
+def get_job_result(job_id):
+    """
+    Returns the archive generated by a job.
+
+    Parameters:
+        job_id (str): The id of the job.
+
+    Returns:
+        Response: The ZIP archive, a 404 if the job does not exist or has expired,
+        a 409 if it has not finished yet, or a 500 if it failed.
+    """
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return {"error": "unknown_job", "job_id": job_id}, 404
+    status = job_status(job)
+    if status["status"] == "failed":
+        return status, 500
+    if status["status"] != "done":
+        return status, 409
+    _, data = job.future.result()
+    return Response(data, mimetype="application/zip")
+
+
+def cache_stats():
+    """
+    Returns the counters of every cache of the server.
+
+    Returns:
+        dict: The counters of each cache, by cache name.
+    """
+    stats = {
+        "archive_memory": ARCHIVE_CACHE.stats(),
+        "config_registry": CONFIG_REGISTRY.stats(),
+        "manifests": MANIFEST_STORE.stats(),
+        "responses": RESPONSE_CACHE.stats(),
+    }
+    if FRAGMENT_CACHE is not None:
+        stats["fragments"] = FRAGMENT_CACHE.stats()
+    if SHARED_ARCHIVE_CACHE is not None:
+        stats["archive_disk"] = SHARED_ARCHIVE_CACHE.stats()
+    return stats
+
+
+@app.route("/api/cache_stats", methods=["GET"])
+@cross_origin()
+def get_cache_stats():
+    """
+    Returns the counters of every cache of the server.
+
+    Parameters:
+        None
+
+    Returns:
+        dict: The counters of each cache, by cache name.
+    """
+    return cache_stats()
+
+
+def scrape_cache_stats():
+    """
+    Returns the counters of every cache, read once per request.
+
+    The collectors of a scrape of /metrics share them, so the caches are only read
+    once per scrape.
+
+    Returns:
+        dict: The counters of each cache, by cache name.
+    """
+    if "cache_stats" not in g:
+        g.cache_stats = cache_stats()
+    return g.cache_stats
+
+
+def collect_cache_counter(counter):
+    """
+    Returns a collector that reads one counter of every cache.
+
+    Parameters:
+        counter (str): The name of the counter in the stats of the caches.
+
+    Returns:
+        callable: The collector.
+    """
+    return lambda: [
+        ((name,), stats[counter])
+        for name, stats in scrape_cache_stats().items()
+        if counter in stats
+    ]
+
+
+def collect_jobs():
+    """
+    Returns the number of jobs in each status.
+
+    Returns:
+        list: The status and the number of jobs of each series.
+    """
+    if JOB_MANAGER is None:
+        return []
+    return [((status,), count) for status, count in JOB_MANAGER.stats().items()]
+
+
+METRICS.add_collector(
+    "mls_cache_hits_total", "Lookups served by each cache.", "counter", ("cache",),
+    collect_cache_counter("hits"),
+)
+METRICS.add_collector(
+    "mls_cache_misses_total", "Lookups missed by each cache.", "counter", ("cache",),
+    collect_cache_counter("misses"),
+)
+METRICS.add_collector(
+    "mls_cache_entries", "Entries kept by each cache.", "gauge", ("cache",),
+    collect_cache_counter("entries"),
+)
+METRICS.add_collector(
+    "mls_jobs", "Generation jobs in each status.", "gauge", ("status",), collect_jobs
+)
+
+
+@app.before_request
+def start_request_timer():
+    g.start_time = time.perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response):
+    """
+    Records the count, duration and payload size of every request.
+
+    Parameters:
+        response (Response): The response of the request.
+
+    Returns:
+        Response: The same response.
+    """
+    endpoint = request.endpoint or "unknown"
+    REQUESTS.inc(endpoint=endpoint, status=response.status_code)
+    REQUEST_SECONDS.observe(time.perf_counter() - g.start_time, endpoint=endpoint)
+    if request.content_length:
+        REQUEST_BYTES.observe(request.content_length, endpoint=endpoint)
+    return response
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """
+    Returns the metrics of the server in the Prometheus text format.
+
+    Parameters:
+        None
+
+    Returns:
+        Response: The metrics.
+    """
+    return Response(METRICS.render(), mimetype="text/plain; version=0.0.4")
 
 
 @app.route("/", methods=["GET", "POST"])
@@ -82,6 +796,50 @@ def home():
     return "hello from mls_code_generator"
 
 
+def load_json(path):
+    """
+    Loads a JSON file.
+
+    Parameters:
+        path (str): The path of the JSON file.
+
+    Returns:
+        The parsed content of the file.
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def cached_json_response(key, paths, build):
+    """
+    Returns a JSON response built from files, cached until any of the files changes.
+
+    The response is stored serialized and gzipped, so hot requests do no parsing or
+    serialization. Clients sending a matching If-None-Match header receive a 304.
+
+    Parameters:
+        key (str): The name of the response in the cache.
+        paths (list): The files the response is built from.
+        build (callable): A function without arguments that returns the response content.
+
+    Returns:
+        Response: The JSON response.
+    """
+    cached = RESPONSE_CACHE.get(
+        key, paths, lambda: (json.dumps(build()) + "\n").encode("utf-8")
+    )
+    if cached.etag in request.if_none_match:
+        response = Response(status=304)
+    elif request.accept_encodings["gzip"]:
+        response = Response(cached.gzip_body, mimetype="application/json")
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        response = Response(cached.body, mimetype="application/json")
+    response.set_etag(cached.etag)
+    response.vary.add("Accept-Encoding")
+    return response
+
+
 @app.route("/api/get_config", methods=["GET", "POST"])
 @cross_origin()
 def get_config():
@@ -91,51 +849,53 @@ def get_config():
     This function loads the configuration from three JSON files:
     nodes.json, options.json, and sockets.json.
     It returns a dictionary containing the loaded configurations.
+    The response is cached until any of the files changes.
 
     Parameters:
         None
 
     Returns:
-        dict: A dictionary containing the node, option, and socket configurations.
+        Response: A JSON response containing the node, option, and socket configurations.
     """
-    node_config_path = "./mls_code_generator_config/nodes.json"
-    options_config_path = "./mls_code_generator_config/options.json"
-    socket_config_path = "./mls_code_generator_config/sockets.json"
-
-    with open(node_config_path, "r", encoding="utf-8") as file:
-        node_config = json.load(file)
-
-    with open(options_config_path, "r", encoding="utf-8") as file:
-        options_config = json.load(file)
-
-    with open(socket_config_path, "r", encoding="utf-8") as file:
-        socket_config = json.load(file)
-
-    return {"nodes": node_config, "options": options_config, "sockets": socket_config}
+    node_config_path = CONFIG_PATH + "nodes.json"
+    options_config_path = CONFIG_PATH + "options.json"
+    socket_config_path = CONFIG_PATH + "sockets.json"
+
+    return cached_json_response(
+        "config",
+        [node_config_path, options_config_path, socket_config_path],
+        lambda: {
+            "nodes": load_json(node_config_path),
+            "options": load_json(options_config_path),
+            "sockets": load_json(socket_config_path),
+        },
+    )
 
 
 @app.route("/api/get_base_editor", methods=["GET", "POST"])
 @cross_origin()
 def get_base_editor():
-    path_to_editors = "./mls_code_generator_config/templates/"
-    return json.load(open(path_to_editors + "base_editor.json", "r", encoding="utf-8"))
+    path = resolve_inside(EDITORS_PATH, "base_editor.json")
+    return cached_json_response("editor:" + path, [path], lambda: load_json(path))
 
 
 @app.route("/api/get_editor", methods=["GET", "POST"])
 @cross_origin()
 def get_editor():
-    path_to_editors = "./mls_code_generator_config/templates/"
     editor_path = str(request.data.decode("utf-8"))
-    return json.load(open(path_to_editors + editor_path, "r", encoding="utf-8"))
+    # Every spelling of the same file shares one cache entry, and paths leading out
+    # of the editors directory are rejected
+    path = resolve_inside(EDITORS_PATH, editor_path)
+    if path is None:
+        return {"error": "unknown_editor", "message": "The editor does not exist."}, 404
+    return cached_json_response("editor:" + path, [path], lambda: load_json(path))
 
 
 @app.route("/api/get_available_editor", methods=["GET", "POST"])
 @cross_origin()
 def get_available_editor():
-    path_to_editors = "./mls_code_generator_config/templates/"
-    return json.load(
-        open(path_to_editors + "available_editors.json", "r", encoding="utf-8")
-    )
+    path = resolve_inside(EDITORS_PATH, "available_editors.json")
+    return cached_json_response("editor:" + path, [path], lambda: load_json(path))
 
 
 if __name__ == "__main__":
@@ -144,6 +904,10 @@ if __name__ == "__main__":
 
     execution_mode = os.getenv("EXECUTION_MODE", "debug")
 
+    MLS_LIBRARY.refresh()
+    if os.path.exists(CONFIG_PATH + "nodes.json"):
+        CONFIG_REGISTRY.load(load_json(CONFIG_PATH + "nodes.json")["nodes"])
+
     HOST = "0.0.0.0"
     PORT = 5050
 